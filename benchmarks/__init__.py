@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmarks of PathMe viewer on a synthetic corpus of pathways.
+
+Run the benchmarks and write their timings to a JSON file with:
+
+.. code-block:: sh
+
+    python -m benchmarks run --scale small --output results.json
+
+and flag the regressions between two runs with:
+
+.. code-block:: sh
+
+    python -m benchmarks compare baseline.json results.json
+"""
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""Command line interface of the benchmarks."""
+
+import json
+import logging
+import sys
+
+import click
+
+from .compare import FAILED, IMPROVEMENT, REGRESSION, compare_results
+from .corpus import SCALES
+from .suite import run_benchmarks
+
+
+@click.group(help='PathMe viewer benchmarks')
+def main():
+    """Run the benchmarks command line interface."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+
+
+@main.command()
+@click.option('--scale', type=click.Choice(sorted(SCALES)), default='small', show_default=True,
+              help='Number of synthetic pathways')
+@click.option('--repeat', type=int, default=5, show_default=True, help='Number of runs of each benchmark')
+@click.option('--seed', type=int, default=0, show_default=True, help='Seed of the synthetic corpus')
+@click.option('-c', '--connection', help='Connection to an empty database. Defaults to a temporary SQLite database')
+@click.option('-k', '--select', help='Only run the benchmarks whose name contains this string')
+@click.option('-o', '--output', type=click.File('w'), default='-', help='Output JSON file. Defaults to stdout')
+def run(scale, repeat, seed, connection, select, output):
+    """Run the benchmarks on a synthetic corpus and write their timings as JSON."""
+    results = run_benchmarks(scale=scale, repeat=repeat, seed=seed, connection=connection, selected=select)
+    json.dump(results, output, indent=2, sort_keys=True)
+    output.write('\n')
+
+
+@main.command()
+@click.argument('baseline', type=click.File())
+@click.argument('current', type=click.File())
+@click.option('--threshold', type=float, default=0.2, show_default=True,
+              help='Relative slowdown above which a benchmark regressed')
+@click.option('--min-difference', type=float, default=0.001, show_default=True,
+              help='Seconds below which a change is ignored')
+@click.option('--statistic', type=click.Choice(['min', 'median', 'mean']), default='median', show_default=True)
+def compare(baseline, current, threshold, min_difference, statistic):
+    """Compare two runs of the benchmarks. Exits with an error if any benchmark regressed or started failing."""
+    rows = compare_results(
+        json.load(baseline),
+        json.load(current),
+        threshold=threshold,
+        min_difference=min_difference,
+        statistic=statistic,
+    )
+
+    def format_time(value):
+        return '-' if value is None else '{:.4f}'.format(value)
+
+    width = max((len(name) for name, *_ in rows), default=0)
+
+    for name, old, new, ratio, status in rows:
+        click.echo('{}  {:>9}  {:>9}  {:>6}  {}'.format(
+            name.ljust(width),
+            format_time(old),
+            format_time(new),
+            '-' if ratio is None else '{:.2f}x'.format(ratio),
+            status.upper() if status in {REGRESSION, IMPROVEMENT, FAILED} else status,
+        ))
+
+    if any(status == REGRESSION or (status == FAILED and old is not None) for _, old, _, _, status in rows):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""Comparison of the timings of two benchmark runs."""
+
+__all__ = [
+    'REGRESSION',
+    'IMPROVEMENT',
+    'UNCHANGED',
+    'ADDED',
+    'REMOVED',
+    'FAILED',
+    'compare_results',
+]
+
+#: Status of a benchmark between two runs
+REGRESSION = 'regression'
+IMPROVEMENT = 'improvement'
+UNCHANGED = 'unchanged'
+ADDED = 'added'
+REMOVED = 'removed'
+FAILED = 'failed'
+
+
+def compare_results(baseline, current, threshold=0.2, min_difference=0.001, statistic='median'):
+    """Compare the timings of two runs of the benchmarks.
+
+    A benchmark regressed if it got slower by more than the threshold and by more than the minimum difference, which
+    ignores the noise of the fastest benchmarks.
+
+    :param dict baseline: results of the reference run
+    :param dict current: results of the new run
+    :param float threshold: relative change of the timings above which a benchmark changed
+    :param float min_difference: seconds below which a change is ignored
+    :param str statistic: statistic of the timings compared ("min", "median" or "mean")
+    :return: name, baseline timing, current timing, ratio and status of each benchmark
+    :rtype: list[tuple[str,Optional[float],Optional[float],Optional[float],str]]
+    """
+    baseline_benchmarks = baseline['benchmarks']
+    current_benchmarks = current['benchmarks']
+
+    rv = []
+
+    for name in sorted(set(baseline_benchmarks) | set(current_benchmarks)):
+        old = baseline_benchmarks.get(name, {}).get(statistic)
+        new = current_benchmarks.get(name, {}).get(statistic)
+
+        if name not in current_benchmarks:
+            rv.append((name, old, None, None, REMOVED))
+            continue
+
+        if 'error' in current_benchmarks[name]:
+            rv.append((name, old, None, None, FAILED))
+            continue
+
+        if old is None:
+            rv.append((name, None, new, None, ADDED))
+            continue
+
+        ratio = new / old if old else None
+
+        if new - old > min_difference and (ratio is None or ratio > 1 + threshold):
+            status = REGRESSION
+        elif old - new > min_difference and ratio is not None and ratio < 1 / (1 + threshold):
+            status = IMPROVEMENT
+        else:
+            status = UNCHANGED
+
+        rv.append((name, old, new, ratio, status))
+
+    return rv
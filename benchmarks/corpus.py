@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+"""Generation of a synthetic corpus of pathways.
+
+The number of nodes of the pathways of each resource follows a log-normal distribution close to the one of the converted
+KEGG, Reactome and WikiPathways pathways. Genes are drawn from a shared pool with a heavy-tailed popularity so hub genes
+appear in many pathways, as in the real databases, which gives realistic merges and gene set overlaps.
+"""
+
+import bisect
+import itertools as itt
+import math
+import random
+
+from pybel import BELGraph
+from pybel.dsl import abundance, bioprocess, complex_abundance, pmod, protein, rna
+
+from pathme_viewer.load_db import _prepare_pathway_model
+
+__all__ = [
+    'RESOURCE_PROFILES',
+    'SCALES',
+    'generate_pathway',
+    'generate_corpus',
+    'load_corpus',
+]
+
+#: Distribution of the size of the pathways of each resource
+RESOURCE_PROFILES = {
+    'kegg': dict(median_nodes=70, sigma=0.6, min_nodes=5, max_nodes=600, edges_per_node=1.4),
+    'reactome': dict(median_nodes=250, sigma=0.9, min_nodes=10, max_nodes=4000, edges_per_node=1.2),
+    'wikipathways': dict(median_nodes=40, sigma=0.7, min_nodes=5, max_nodes=400, edges_per_node=1.1),
+}
+
+#: Number of pathways generated for each resource
+SCALES = {
+    'tiny': {'kegg': 6, 'reactome': 3, 'wikipathways': 3},
+    'small': {'kegg': 30, 'reactome': 10, 'wikipathways': 20},
+    'medium': {'kegg': 150, 'reactome': 50, 'wikipathways': 100},
+    'large': {'kegg': 330, 'reactome': 250, 'wikipathways': 400},
+}
+
+#: Number of genes in the shared pool
+NUMBER_OF_GENES = 8000
+#: Number of chemicals in the shared pool
+NUMBER_OF_CHEMICALS = 2000
+
+#: Kinds of nodes with their relative frequency
+NODE_KINDS = (
+    ('protein', 60),
+    ('chemical', 15),
+    ('complex', 10),
+    ('rna', 5),
+    ('modified_protein', 5),
+    ('bioprocess', 5),
+)
+
+#: Relations with their relative frequency
+RELATIONS = (
+    ('increases', 45),
+    ('decreases', 25),
+    ('directly_increases', 10),
+    ('association', 10),
+    ('directly_decreases', 10),
+)
+
+
+class _WeightedChoice(object):
+    """Draw items with given weights in logarithmic time."""
+
+    def __init__(self, items, weights):
+        self.items = items
+        self.cumulative_weights = list(itt.accumulate(weights))
+
+    def __call__(self, rng):
+        return self.items[bisect.bisect(self.cumulative_weights, rng.random() * self.cumulative_weights[-1])]
+
+
+# Genes ranked by a Zipf-like popularity
+_choose_gene = _WeightedChoice(
+    ['GENE{}'.format(i) for i in range(NUMBER_OF_GENES)],
+    [1 / (rank + 10) for rank in range(NUMBER_OF_GENES)],
+)
+_choose_chemical = _WeightedChoice(
+    ['chemical{}'.format(i) for i in range(NUMBER_OF_CHEMICALS)],
+    [1 / (rank + 10) for rank in range(NUMBER_OF_CHEMICALS)],
+)
+_choose_node_kind = _WeightedChoice(*zip(*NODE_KINDS))
+_choose_relation = _WeightedChoice(*zip(*RELATIONS))
+
+
+def _generate_node(rng):
+    """Generate a random node.
+
+    :param random.Random rng: random number generator
+    :rtype: pybel.dsl.BaseEntity
+    """
+    kind = _choose_node_kind(rng)
+
+    if kind == 'protein':
+        return protein('HGNC', _choose_gene(rng))
+
+    if kind == 'chemical':
+        return abundance('CHEBI', _choose_chemical(rng))
+
+    if kind == 'complex':
+        return complex_abundance([protein('HGNC', _choose_gene(rng)) for _ in range(rng.randint(2, 4))])
+
+    if kind == 'rna':
+        return rna('HGNC', _choose_gene(rng))
+
+    if kind == 'modified_protein':
+        return protein('HGNC', _choose_gene(rng), variants=[pmod('Ph')])
+
+    return bioprocess('GO', 'process{}'.format(rng.randrange(500)))
+
+
+def _get_number_of_nodes(rng, profile):
+    """Draw the number of nodes of a pathway.
+
+    :param random.Random rng: random number generator
+    :param dict profile: size distribution of the pathways of a resource
+    :rtype: int
+    """
+    number_of_nodes = int(rng.lognormvariate(math.log(profile['median_nodes']), profile['sigma']))
+    return min(max(number_of_nodes, profile['min_nodes']), profile['max_nodes'])
+
+
+def generate_pathway(rng, resource_name, pathway_id):
+    """Generate a random pathway of a resource.
+
+    :param random.Random rng: random number generator
+    :param str resource_name: name of the resource
+    :param str pathway_id: identifier of the pathway
+    :rtype: pybel.BELGraph
+    """
+    profile = RESOURCE_PROFILES[resource_name]
+
+    graph = BELGraph(
+        name='{} pathway {}'.format(resource_name, pathway_id),
+        version='1.0.0',
+        description='Synthetic {} pathway'.format(resource_name),
+        authors='PathMe benchmarks',
+        contact='benchmarks@pathme',
+    )
+
+    # Duplicates are removed keeping the order so the corpus does not depend on the hash seed
+    nodes = list(dict.fromkeys(_generate_node(rng) for _ in range(_get_number_of_nodes(rng, profile))))
+
+    if len(nodes) < 2:
+        nodes.append(protein('HGNC', _choose_gene(rng)))
+
+    citation = '{}:{}'.format(resource_name, pathway_id)
+    evidence = 'Extracted from {}'.format(resource_name)
+
+    for _ in range(int(len(nodes) * profile['edges_per_node'])):
+        u, v = rng.sample(nodes, 2)
+        relation = _choose_relation(rng)
+
+        if relation == 'association':
+            graph.add_association(u, v, citation=citation, evidence=evidence)
+        else:
+            graph.add_qualified_edge(u, v, relation=relation, citation=citation, evidence=evidence)
+
+    return graph
+
+
+def generate_corpus(scale='small', seed=0):
+    """Generate the pathways of a synthetic corpus.
+
+    :param str scale: number of pathways of each resource (see :data:`SCALES`)
+    :param int seed: seed of the random number generator
+    :return: resource name, pathway identifier and graph of the pathways
+    :rtype: iter[tuple[str,str,pybel.BELGraph]]
+    """
+    rng = random.Random(seed)
+
+    for resource_name, number_of_pathways in sorted(SCALES[scale].items()):
+        for i in range(number_of_pathways):
+            pathway_id = '{}{:05d}'.format(resource_name[:3], i)
+            yield resource_name, pathway_id, generate_pathway(rng, resource_name, pathway_id)
+
+
+def load_corpus(manager, scale='small', seed=0):
+    """Generate a synthetic corpus and load it in a database.
+
+    :param pathme_viewer.manager.Manager manager: PathMe manager
+    :param str scale: number of pathways of each resource (see :data:`SCALES`)
+    :param int seed: seed of the random number generator
+    :return: resource name to number of pathways, nodes and edges
+    :rtype: dict[str,dict[str,int]]
+    """
+    summary = {}
+
+    def iterate_pathway_dicts():
+        for resource_name, pathway_id, graph in generate_corpus(scale=scale, seed=seed):
+            counts = summary.setdefault(resource_name, {'pathways': 0, 'nodes': 0, 'edges': 0})
+            counts['pathways'] += 1
+            counts['nodes'] += graph.number_of_nodes()
+            counts['edges'] += graph.number_of_edges()
+
+            yield _prepare_pathway_model(pathway_id, resource_name, graph)
+
+    manager.bulk_upsert_pathways(iterate_pathway_dicts())
+
+    return summary
@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+
+"""Timing of the main operations of PathMe viewer on a synthetic corpus.
+
+Every benchmark runs a function a number of times after an optional setup (not timed) that usually clears the caches
+of the manager, so the timings measure the work and not the cache lookups. Benchmarks that fail are reported with their
+error instead of their timings.
+"""
+
+import datetime
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import pybel
+from flask import Flask
+
+from pathme_viewer.centrality import get_betweenness_centrality
+from pathme_viewer.graph_utils import export_graph, merge_pathways, prepare_venn_diagram_data, to_json_custom
+from pathme_viewer.manager import Manager
+from pathme_viewer.nodes import NodeStore
+from pathme_viewer.paths import PathEnumeration, get_path_index
+from .corpus import load_corpus
+
+__all__ = [
+    'EXPORT_FORMATS',
+    'time_function',
+    'run_benchmarks',
+]
+
+log = logging.getLogger(__name__)
+
+#: Formats of the graph export benchmarks
+EXPORT_FORMATS = ('json', 'bel', 'csv', 'graphml', 'bytes')
+
+#: Number of node pairs of the path benchmarks
+NUMBER_OF_PATH_QUERIES = 100
+
+#: Queries of the node suggestion benchmark
+SUGGESTION_QUERIES = ('GENE1', 'gene12', 'chemical', 'p(HGNC:GENE7', 'complex', 'process4', 'Ph')
+
+
+def time_function(function, repeat=5, setup=None):
+    """Time a function.
+
+    :param function: function without arguments
+    :param int repeat: number of runs
+    :param setup: function without arguments called before each run, not timed
+    :return: timing statistics in seconds
+    :rtype: dict
+    """
+    times = []
+
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+
+        t = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - t)
+
+    return {
+        'repeat': repeat,
+        'times': times,
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.mean(times),
+    }
+
+
+def _clear_caches(manager, decoded_graphs=True):
+    """Clear the caches of the manager.
+
+    :param pathme_viewer.manager.Manager manager: PathMe manager
+    :param bool decoded_graphs: also clear the decoded pathway graphs
+    """
+    if decoded_graphs:
+        manager.graph_cache.clear()
+
+    manager.merged_graph_cache.clear()
+    manager.path_index_cache.clear()
+    manager.centrality_cache.clear()
+    manager.response_cache.clear()
+
+
+def _get_selections(manager):
+    """Choose the sets of pathways merged by the benchmarks.
+
+    :param pathme_viewer.manager.Manager manager: PathMe manager
+    :return: name of each selection to its pathway identifier to resource name dictionary
+    :rtype: dict[str,dict[str,str]]
+    """
+    def get_largest(resource_name, number):
+        pathways = sorted(
+            manager.get_pathways_from_resource(resource_name),
+            key=lambda pathway: (-pathway.number_of_nodes, pathway.pathway_id),
+        )
+        return {
+            pathway.pathway_id: pathway.resource_name
+            for pathway in pathways[:number]
+        }
+
+    def get_first(resource_name, number):
+        pathways = sorted(manager.get_pathways_from_resource(resource_name), key=lambda pathway: pathway.pathway_id)
+        return {
+            pathway.pathway_id: pathway.resource_name
+            for pathway in pathways[:number]
+        }
+
+    selections = {
+        'kegg-2': get_first('kegg', 2),
+        'kegg-10': get_first('kegg', 10),
+        'reactome-largest-3': get_largest('reactome', 3),
+    }
+
+    mixed = {}
+    for resource_name in ('kegg', 'reactome', 'wikipathways'):
+        mixed.update(get_first(resource_name, 3))
+    selections['mixed-9'] = mixed
+
+    return selections
+
+
+def _get_node_pairs(index, number, seed):
+    """Draw pairs of nodes of a path index.
+
+    :param pathme_viewer.paths.PathIndex index: path index
+    :param int number: number of pairs
+    :param int seed: seed of the random number generator
+    :rtype: list[tuple[int,int]]
+    """
+    rng = random.Random(seed)
+    return [
+        (rng.randrange(len(index)), rng.randrange(len(index)))
+        for _ in range(number)
+    ]
+
+
+def _read_response(response):
+    """Read the whole body of a response, including the streamed ones.
+
+    :param flask.Response response: response
+    :rtype: bytes
+    """
+    response.direct_passthrough = False
+    return response.get_data()
+
+
+def _create_app(connection):
+    """Create the web application, imported here since it needs all the web dependencies.
+
+    :param str connection: SQLAlchemy connection string
+    :rtype: flask.Flask
+    """
+    from pathme_viewer.web.web import create_app
+
+    return create_app(connection=connection)
+
+
+def _iterate_benchmarks(app, manager, connection, selections, seed):
+    """Iterate over the benchmarks.
+
+    Each benchmark must be run before the next one is generated since the functions refer to the current selection.
+
+    :param flask.Flask app: application with the manager
+    :param pathme_viewer.manager.Manager manager: PathMe manager
+    :param str connection: SQLAlchemy connection string of the database
+    :param dict[str,dict[str,str]] selections: sets of pathways merged by the benchmarks
+    :param int seed: seed of the random number generator
+    :return: name, function and setup of each benchmark
+    :rtype: iter[tuple[str,types.FunctionType,Optional[types.FunctionType]]]
+    """
+    yield 'create_app', lambda: _create_app(connection), None
+
+    for name, pathways in sorted(selections.items()):
+        yield 'merge_pathways[{}]'.format(name), lambda: merge_pathways(pathways), lambda: _clear_caches(manager)
+
+        yield (
+            'merge_pathways_decoded[{}]'.format(name),
+            lambda: merge_pathways(pathways),
+            lambda: _clear_caches(manager, decoded_graphs=False),
+        )
+
+        graph = merge_pathways(pathways)
+
+        yield 'to_json_custom[{}]'.format(name), lambda: to_json_custom(graph), None
+
+        for export_format in EXPORT_FORMATS:
+            yield (
+                'export_graph[{},{}]'.format(export_format, name),
+                lambda: _read_response(export_graph(graph, export_format)),
+                None,
+            )
+
+        yield (
+            'export_graph[json-stream,{}]'.format(name),
+            lambda: _read_response(export_graph(graph, 'json', stream=True)),
+            None,
+        )
+
+        yield 'prepare_venn_diagram_data[{}]'.format(name), lambda: prepare_venn_diagram_data(manager, pathways), None
+
+        yield (
+            'path_index[{}]'.format(name),
+            lambda: get_path_index(manager, pathways),
+            lambda: manager.path_index_cache.clear(),
+        )
+
+        index = get_path_index(manager, pathways)
+        pairs = _get_node_pairs(index, NUMBER_OF_PATH_QUERIES, seed)
+
+        yield (
+            'shortest_paths[{}]'.format(name),
+            lambda: [index.shortest_path(source, target) for source, target in pairs],
+            None,
+        )
+
+        yield (
+            'shortest_paths_undirected[{}]'.format(name),
+            lambda: [index.shortest_path(source, target, undirected=True) for source, target in pairs],
+            None,
+        )
+
+        yield (
+            'all_paths[{}]'.format(name),
+            lambda: [
+                list(PathEnumeration(index, source, target, cutoff=7).iterate_paths(max_paths=100, time_budget=1))
+                for source, target in pairs[:10]
+            ],
+            None,
+        )
+
+        yield (
+            'centrality[{}]'.format(name),
+            lambda: get_betweenness_centrality(manager, pathways),
+            lambda: manager.centrality_cache.clear(),
+        )
+
+    yield 'node_suggestion_index', lambda: app.nodes.index, app.nodes.reset
+
+    yield (
+        'node_suggestion',
+        lambda: [app.nodes.suggest(query, limit=50) for query in SUGGESTION_QUERIES],
+        lambda: app.nodes.index,
+    )
+
+
+def _get_metadata():
+    """Return the description of the environment of a run.
+
+    :rtype: dict
+    """
+    return {
+        'date': datetime.datetime.utcnow().isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'pybel': pybel.get_version(),
+    }
+
+
+def run_benchmarks(scale='small', repeat=5, seed=0, connection=None, selected=None):
+    """Generate a synthetic corpus and time the operations of PathMe viewer on it.
+
+    :param str scale: number of pathways of each resource (see :data:`benchmarks.corpus.SCALES`)
+    :param int repeat: number of runs of each benchmark
+    :param int seed: seed of the random number generator
+    :param Optional[str] connection: SQLAlchemy connection string of an empty database. Defaults to a temporary SQLite
+     database
+    :param Optional[str] selected: only run the benchmarks whose name contains this string
+    :return: JSON dictionary with the timings
+    :rtype: dict
+    """
+    directory = None
+
+    if connection is None:
+        directory = tempfile.TemporaryDirectory(prefix='pathme-benchmarks-')
+        connection = 'sqlite:///{}'.format(os.path.join(directory.name, 'pathme.db'))
+
+    try:
+        manager = Manager.from_connection(connection=connection)
+
+        t = time.perf_counter()
+        corpus = load_corpus(manager, scale=scale, seed=seed)
+        load_time = time.perf_counter() - t
+
+        log.info('Loaded the corpus in %.2f seconds', load_time)
+
+        # The analyses only need the manager and the node store of the application
+        app = Flask(__name__)
+        app.pathme_manager = manager
+        app.nodes = NodeStore(manager)
+
+        results = {
+            'load_corpus': {'repeat': 1, 'times': [load_time], 'min': load_time, 'median': load_time,
+                            'mean': load_time},
+        }
+
+        with app.test_request_context():
+            selections = _get_selections(manager)
+
+            for name, function, setup in _iterate_benchmarks(app, manager, connection, selections, seed):
+                if selected is not None and selected not in name:
+                    continue
+
+                try:
+                    results[name] = time_function(function, repeat=repeat, setup=setup)
+                except Exception as e:
+                    log.exception('Benchmark %s failed', name)
+                    results[name] = {'error': '{}: {}'.format(type(e).__name__, e)}
+                else:
+                    log.info('%s: %.4f seconds', name, results[name]['median'])
+
+            selection_sizes = {}
+            for name, pathways in sorted(selections.items()):
+                graph = merge_pathways(pathways)
+                selection_sizes[name] = {
+                    'pathways': len(pathways),
+                    'nodes': graph.number_of_nodes(),
+                    'edges': graph.number_of_edges(),
+                }
+
+        manager.session.remove()
+
+    finally:
+        if directory is not None:
+            directory.cleanup()
+
+    return {
+        'metadata': dict(_get_metadata(), scale=scale, repeat=repeat, seed=seed),
+        'corpus': corpus,
+        'selections': selection_sizes,
+        'benchmarks': results,
+    }
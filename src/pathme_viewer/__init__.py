@@ -56,34 +56,102 @@ modified by changing the default parameters (run: "python3 -m pathme_viewer web
 """
 
 import logging
-
-from compath.constants import MODULE_NAME
-from compath_utils import CompathManager
-from pkg_resources import VersionConflict, iter_entry_points, UnknownExtra
+import threading
+from collections.abc import Mapping
 
 log = logging.getLogger(__name__)
 
-managers = {}
 
-for entry_point in iter_entry_points(group=MODULE_NAME, name=None):
-    entry = entry_point.name
+def load_managers():
+    """Load the managers of the ComPath plugins registered as entry points.
+
+    :return: name of each entry point to its manager class
+    :rtype: dict[str,type]
+    """
+    from compath.constants import MODULE_NAME
+    from compath_utils import CompathManager
+    from pkg_resources import VersionConflict, iter_entry_points, UnknownExtra
+
+    rv = {}
+
+    for entry_point in iter_entry_points(group=MODULE_NAME, name=None):
+        entry = entry_point.name
+
+        try:
+            bio2bel_module = entry_point.load()
+        except UnknownExtra:
+            log.exception('Unknown extra in %s', entry)
+            continue
+        except VersionConflict:
+            log.exception('Version conflict in %s', entry)
+            continue
+
+        try:
+            ExternalManager = bio2bel_module.Manager
+        except AttributeError:
+            log.warning('%s does not have a top-level Manager class', entry)
+            continue
+
+        if not issubclass(ExternalManager, CompathManager):
+            log.warning('%s:%s is not a standard ComPath manager class', entry, ExternalManager)
+
+        rv[entry] = ExternalManager
+
+    return rv
+
+
+class ManagerRegistry(Mapping):
+    """Read-only mapping of the ComPath plugins to their manager classes.
+
+    Loading the plugins imports every Bio2BEL package installed, which takes seconds, so their entry points are only
+    resolved the first time the registry is accessed and the result is kept.
+    """
+
+    def __init__(self, loader=load_managers):
+        """Init the registry.
+
+        :param loader: function returning the managers by name
+        """
+        self._loader = loader
+        self._managers = None
+        self._lock = threading.Lock()
+
+    def _get_managers(self):
+        """Load the plugins on first call and return them."""
+        if self._managers is None:
+            with self._lock:
+                if self._managers is None:
+                    self._managers = self._loader()
+
+        return self._managers
+
+    @property
+    def loaded(self):
+        """Return if the entry points have been resolved.
+
+        :rtype: bool
+        """
+        return self._managers is not None
+
+    def __getitem__(self, key):
+        """Return the manager class of a plugin, loading the plugins if needed."""
+        return self._get_managers()[key]
+
+    def __iter__(self):
+        """Iterate over the names of the plugins, loading them if needed."""
+        return iter(self._get_managers())
+
+    def __len__(self):
+        """Return the number of plugins, loading them if needed."""
+        return len(self._get_managers())
 
-    try:
-        bio2bel_module = entry_point.load()
-    except UnknownExtra:
-        log.exception('Unknown extra in %s', entry)
-        continue
-    except VersionConflict:
-        log.exception('Version conflict in %s', entry)
-        continue
+    def __repr__(self):
+        """Return a representation of the registry without loading the plugins."""
+        if not self.loaded:
+            return '<{} (not loaded)>'.format(self.__class__.__name__)
 
-    try:
-        ExternalManager = bio2bel_module.Manager
-    except AttributeError:
-        log.warning('%s does not have a top-level Manager class', entry)
-        continue
+        return '<{} {}>'.format(self.__class__.__name__, sorted(self._managers))
 
-    if not issubclass(ExternalManager, CompathManager):
-        log.warning('%s:%s is not a standard ComPath manager class', entry, ExternalManager)
 
-    managers[entry] = ExternalManager
+#: Name of each ComPath plugin to its manager class, loaded on first access
+managers = ManagerRegistry()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+"""This module contains the in-memory caches used by PathMe viewer."""
+
+import threading
+import time
+from collections import OrderedDict
+
+__all__ = [
+    'LRUCache',
+]
+
+
+class LRUCache(object):
+    """Thread-safe least recently used cache bounded by number of entries and/or total size.
+
+    Entries can optionally expire after a time to live.
+    """
+
+    def __init__(self, max_entries=None, max_size=None, ttl=None):
+        """Init the cache.
+
+        :param Optional[int] max_entries: maximum number of entries kept. Unbounded if None
+        :param Optional[int] max_size: maximum sum of the sizes of the entries kept. Unbounded if None
+        :param Optional[float] ttl: seconds after which an entry expires. Never expire if None
+        """
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._data = OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        """Return the number of entries in the cache."""
+        return len(self._data)
+
+    def __contains__(self, key):
+        """Check if a key is in the cache without counting it as a hit/miss."""
+        return key in self._data
+
+    @property
+    def size(self):
+        """Return the sum of the sizes of the entries in the cache.
+
+        :rtype: int
+        """
+        return self._size
+
+    def get(self, key, default=None):
+        """Get an entry and mark it as the most recently used one.
+
+        :param key: key of the entry
+        :param default: value returned if the key is not in the cache
+        """
+        with self._lock:
+            try:
+                value, _, expires = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expires is not None and expires < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                self.expirations += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size=1):
+        """Add an entry and evict the least recently used ones if the cache is over budget.
+
+        :param key: key of the entry
+        :param value: value of the entry
+        :param int size: size of the entry, accounted against ``max_size``
+        """
+        with self._lock:
+            # The previous value is stale even if the new one is too large to be cached
+            self._remove(key)
+
+            if self.max_size is not None and size > self.max_size:
+                return
+
+            expires = None if self.ttl is None else time.monotonic() + self.ttl
+
+            self._data[key] = value, size, expires
+            self._size += size
+
+            while self._data and self._is_over_budget():
+                self._popitem()
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        """Remove an entry from the cache.
+
+        :param key: key of the entry
+        :param default: value returned if the key is not in the cache
+        """
+        with self._lock:
+            entry = self._remove(key)
+
+        return default if entry is None else entry[0]
+
+    def discard_where(self, predicate):
+        """Remove all entries whose keys match a predicate.
+
+        :param predicate: function taking a key and returning a boolean
+        :return: number of entries removed
+        :rtype: int
+        """
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+
+            for key in keys:
+                self._remove(key)
+
+        return len(keys)
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+
+    def stats(self):
+        """Return the usage statistics of the cache.
+
+        :rtype: dict
+        """
+        return {
+            'entries': len(self._data),
+            'size': self._size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+    def _is_over_budget(self):
+        if self.max_entries is not None and len(self._data) > self.max_entries:
+            return True
+
+        return self.max_size is not None and self._size > self.max_size
+
+    def _popitem(self):
+        _, (_, size, _) = self._data.popitem(last=False)
+        self._size -= size
+
+    def _remove(self, key):
+        entry = self._data.pop(key, None)
+
+        if entry is not None:
+            self._size -= entry[1]
+
+        return entry
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+"""This module contains the betweenness centrality service.
+
+Exact betweenness centrality runs a shortest path search from every node, so large graphs are approximated by only
+searching from a sample of pivot nodes drawn with a fixed seed. Rankings are cached by the manager per set of pathways
+and the ones of single pathways are precomputed when the pathways are loaded.
+"""
+
+import logging
+import time
+
+import networkx as nx
+
+from .constants import CENTRALITY_EXACT_MAX_NODES, CENTRALITY_SAMPLES, CENTRALITY_SEED
+from .graph_utils import merge_pathways
+from .models import hash_bel
+
+__all__ = [
+    'get_number_of_samples',
+    'calculate_betweenness_centrality',
+    'get_betweenness_centrality',
+]
+
+log = logging.getLogger(__name__)
+
+
+def get_number_of_samples(number_of_nodes, samples=None):
+    """Return the number of pivots used to calculate the betweenness centrality of a graph.
+
+    :param int number_of_nodes: number of nodes of the graph
+    :param Optional[int] samples: requested number of pivots. Chosen by the size of the graph if None
+    :return: number of pivots or None if the exact betweenness centrality is calculated
+    :rtype: Optional[int]
+    """
+    if samples is None:
+        if number_of_nodes <= CENTRALITY_EXACT_MAX_NODES:
+            return None
+
+        samples = CENTRALITY_SAMPLES
+
+    if samples >= number_of_nodes:
+        return None
+
+    return samples
+
+
+def calculate_betweenness_centrality(graph, samples=None, seed=CENTRALITY_SEED):
+    """Calculate the betweenness centrality of the nodes of a graph.
+
+    :param pybel.BELGraph graph: BEL graph
+    :param Optional[int] samples: number of pivots. Chosen by the size of the graph if None
+    :param int seed: seed of the pivot sampling
+    :return: number of pivots used (None if exact) and the BEL strings of the nodes with their scores by decreasing score
+    :rtype: tuple[Optional[int],list[tuple[str,float]]]
+    """
+    samples = get_number_of_samples(graph.number_of_nodes(), samples)
+
+    # Parallel edges do not change the shortest paths so the calculation runs on the simple graph
+    simple_graph = nx.DiGraph()
+    simple_graph.add_nodes_from(graph)
+    simple_graph.add_edges_from(graph.edges())
+
+    t = time.time()
+    scores = nx.betweenness_centrality(simple_graph, k=samples, seed=seed)
+
+    log.debug(
+        'Calculated the betweenness centrality of %d nodes (%s) in %.2f seconds',
+        graph.number_of_nodes(),
+        'exact' if samples is None else '{} pivots'.format(samples),
+        time.time() - t,
+    )
+
+    ranking = sorted(
+        ((node.as_bel(), score) for node, score in scores.items()),
+        key=lambda item: (-item[1], item[0]),
+    )
+
+    return samples, ranking
+
+
+def get_betweenness_centrality(manager, pathways, samples=None, seed=CENTRALITY_SEED):
+    """Get the betweenness centrality of the nodes of the merge of a set of pathways.
+
+    The result is read from the cache of the manager, from the scores precomputed at load time for single pathways or
+    calculated on the merged graph, in that order.
+
+    :param pathme_viewer.manager.Manager manager: PathMe manager
+    :param dict[str,str] pathways: pathway identifier to resource name dictionary
+    :param Optional[int] samples: number of pivots. Chosen by the size of the graph if None
+    :param int seed: seed of the pivot sampling
+    :return: SHA-512 of the nodes with their scores by decreasing score
+    :rtype: list[tuple[str,float]]
+    """
+    key = manager.get_merged_graph_key(pathways), samples, seed
+
+    rv = manager.centrality_cache.get(key)
+
+    if rv is not None:
+        return rv
+
+    if len(pathways) == 1 and seed == CENTRALITY_SEED:
+        (pathway_id, resource_name), = pathways.items()
+        pathway = manager.get_pathway_by_id(pathway_id, resource_name)
+
+        if pathway is not None:
+            precomputed = manager.get_pathway_centrality(pathway)
+
+            # Only valid if it was calculated with the same number of pivots
+            if precomputed is not None and precomputed[0] == get_number_of_samples(pathway.number_of_nodes, samples):
+                rv = precomputed[1]
+
+    if rv is None:
+        _, ranking = calculate_betweenness_centrality(merge_pathways(pathways), samples=samples, seed=seed)
+        rv = [
+            (hash_bel(bel), score)
+            for bel, score in ranking
+        ]
+
+    manager.centrality_cache.set(key, rv)
+
+    return rv
@@ -4,39 +4,15 @@
 
 from __future__ import print_function
 
+import gzip
 import logging
 import os
 
 import click
-from bio2bel_chebi import Manager as ChebiManager
-
-from bio2bel_hgnc import Manager as HgncManager
-from pathme.constants import (
-    KEGG,
-    KEGG_DIR,
-    RDF_WIKIPATHWAYS,
-    REACTOME,
-    REACTOME_DIR,
-    WIKIPATHWAYS,
-    WIKIPATHWAYS_DIR,
-    WIKIPATHWAYS_FILES,
-    ensure_pathme_folders
-)
-from pathme.utils import make_downloader
-from pathme.wikipathways.utils import (
-    get_file_name_from_url,
-    unzip_file
-)
-from pybel import union
-from .constants import DEFAULT_CACHE_CONNECTION, DATABASE_STYLE_DICT
-from .load_db import load_kegg, load_reactome, load_wikipathways
-from .manager import Manager
-from .models import Base
 
-log = logging.getLogger(__name__)
+from .constants import DEFAULT_CACHE_CONNECTION, DATABASE_STYLE_DICT, INTERSECTION, JACCARD
 
-# Ensure data folders are created
-ensure_pathme_folders()
+log = logging.getLogger(__name__)
 
 
 def set_debug(level):
@@ -52,6 +28,20 @@ def set_debug_param(debug):
         set_debug(10)
 
 
+def _get_manager(connection=None):
+    """Connect to the database.
+
+    The manager is imported here, as are the dependencies of each command (including PyBEL), so the command line
+    starts quickly.
+
+    :param Optional[str] connection: connection string
+    :rtype: pathme_viewer.manager.Manager
+    """
+    from .manager import Manager
+
+    return Manager.from_connection(connection=connection)
+
+
 @click.group(help='PathMe')
 def main():
     """Main click method"""
@@ -78,12 +68,42 @@ def web(host, port, template, static, verbose):
     app.run(host=host, port=port)
 
 
+@main.command()
+@click.option('-m', '--module', default='pathme_viewer.cli', show_default=True, help='Module imported')
+@click.option('-n', '--number', type=int, default=20, show_default=True, help='Number of slowest modules reported')
+@click.option('-p', '--packages', is_flag=True, help='Sum the times by top-level package')
+def profile_imports(module, number, packages):
+    """Profile the time taken to import a module of PathMe in a new interpreter."""
+    from .import_time import get_package_times, profile_imports as _profile_imports
+
+    try:
+        import_times = _profile_imports(module)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+    total = sum(import_time.self_time for import_time in import_times)
+    click.echo('{} modules imported in {:.3f} s'.format(len(import_times), total / 1e6))
+
+    if packages:
+        rows = get_package_times(import_times)
+    else:
+        rows = [
+            (import_time.module, import_time.cumulative_time)
+            for import_time in sorted(import_times, key=lambda import_time: import_time.cumulative_time, reverse=True)
+        ]
+
+    for name, microseconds in rows[:number]:
+        click.echo('{:>9.3f} s  {}'.format(microseconds / 1e6, name))
+
+
 @main.group()
 @click.option('-c', '--connection', help='Cache connection. Defaults to {}'.format(DEFAULT_CACHE_CONNECTION))
 @click.pass_context
 def manage(ctx, connection):
     """Manage the database."""
-    ctx.obj = Manager.from_connection(connection)
+    from .models import Base
+
+    ctx.obj = _get_manager(connection)
     Base.metadata.bind = ctx.obj.engine
     Base.query = ctx.obj.session.query_property()
     ctx.obj.create_all()
@@ -98,7 +118,7 @@ def drop(debug, yes, connection):
     set_debug_param(debug)
 
     if yes or click.confirm('Do you really want to delete the PathMe DB'):
-        m = Manager.from_connection(connection=connection)
+        m = _get_manager(connection)
         click.echo('Deleting PathMe DB')
         m.drop_all()
         m.create_all()
@@ -106,14 +126,32 @@ def drop(debug, yes, connection):
 
 @manage.command(help='Load Pathways')
 @click.option('-c', '--connection', help='Cache connection. Defaults to {}'.format(DEFAULT_CACHE_CONNECTION))
-@click.option('-kp', '--kegg_path', help='KEGG data folder. Defaults to {}'.format(KEGG_DIR))
-@click.option('-rp', '--reactome_path', help='Reactome data folder. Defaults to {}'.format(REACTOME_DIR))
-@click.option('-wp', '--wikipathways_path', help='WikiPathways data folder. Defaults to {}'.format(WIKIPATHWAYS_DIR))
+@click.option('-kp', '--kegg_path', help='KEGG data folder. Defaults to the PathMe KEGG folder')
+@click.option('-rp', '--reactome_path', help='Reactome data folder. Defaults to the PathMe Reactome folder')
+@click.option('-wp', '--wikipathways_path', help='WikiPathways data folder. Defaults to the PathMe WikiPathways folder')
 @click.option('-f', '--flatten', help='Flat complexes/composites. Defaults to False')
 @click.option('-y', '--yes', help='Skip confirmation', is_flag=True)
-def load(connection, kegg_path, reactome_path, wikipathways_path, flatten, yes):
+@click.option('-w', '--workers', type=int, help='Number of processes used to convert the files to BEL. Defaults to 1')
+def load(connection, kegg_path, reactome_path, wikipathways_path, flatten, yes, workers):
     """Loads databases into PathMe DB."""
-    manager = Manager.from_connection(connection=connection)
+    from bio2bel_chebi import Manager as ChebiManager
+    from bio2bel_hgnc import Manager as HgncManager
+    from pathme.constants import (
+        KEGG,
+        RDF_WIKIPATHWAYS,
+        REACTOME,
+        WIKIPATHWAYS,
+        WIKIPATHWAYS_FILES,
+        ensure_pathme_folders,
+    )
+    from pathme.utils import make_downloader
+    from pathme.wikipathways.utils import get_file_name_from_url, unzip_file
+    from .load_db import load_kegg, load_reactome, load_wikipathways
+
+    # Ensure data folders are created
+    ensure_pathme_folders()
+
+    manager = _get_manager(connection)
 
     log.info('Initiating HGNC Manager')
     hgnc_manager = HgncManager()
@@ -121,6 +159,9 @@ def load(connection, kegg_path, reactome_path, wikipathways_path, flatten, yes):
     log.info('Initiating ChEBI Manager')
     chebi_manager = ChebiManager()
 
+    # Only the pathways whose files changed since the last load are converted and written
+    summaries = {}
+
     """Load KEGG"""
 
     # User must agree to KEGG License
@@ -132,43 +173,39 @@ def load(connection, kegg_path, reactome_path, wikipathways_path, flatten, yes):
     ):
         click.echo('You have read and accepted the conditions stated above.\n')
 
-        # Check if kegg is already in the database
-        kegg_pathways = manager.get_pathways_from_resource(KEGG)
-
-        if len(kegg_pathways) < 300:
-            load_kegg(manager, hgnc_manager, chebi_manager, kegg_path, flatten)
-        else:
-            log.info('KEGG seems to be already in the database')
+        summaries[KEGG] = load_kegg(manager, hgnc_manager, chebi_manager, kegg_path, flatten, workers=workers)
 
     """Load WikiPathways"""
 
     cached_file = os.path.join(WIKIPATHWAYS_FILES, get_file_name_from_url(RDF_WIKIPATHWAYS))
     make_downloader(RDF_WIKIPATHWAYS, cached_file, WIKIPATHWAYS_FILES, unzip_file)
 
-    # Check if wikipathways is already in the database
-    wikipathways_pathways = manager.get_pathways_from_resource(WIKIPATHWAYS)
-
-    if len(wikipathways_pathways) < 300:
-        load_wikipathways(manager, hgnc_manager, wikipathways_path)
-    else:
-        log.info('WikiPathways seems to be already in the database')
+    summaries[WIKIPATHWAYS] = load_wikipathways(manager, hgnc_manager, wikipathways_path, workers=workers)
 
     """Load Reactome"""
 
-    # Check if Reactome is already in the database
-    reactome_pathways = manager.get_pathways_from_resource(REACTOME)
+    summaries[REACTOME] = load_reactome(manager, hgnc_manager, reactome_path, workers=workers)
 
-    if len(reactome_pathways) < 2000:
-        load_reactome(manager, hgnc_manager, reactome_path)
-    else:
-        log.info('Reactome seems to be already in the database')
+    manager.build_search_index()
+
+    click.echo('Summary of the load')
+    click.echo('-------------------')
+    for database, summary in summaries.items():
+        click.echo('{}: {} added, {} updated, {} unchanged, {} removed{}'.format(
+            DATABASE_STYLE_DICT[database],
+            summary['added'],
+            summary['updated'],
+            summary['unchanged'],
+            summary['removed'],
+            ', {} failed'.format(summary['failed']) if summary['failed'] else '',
+        ))
 
 
 @manage.command(help='Summarizes Entries in Database')
 @click.option('-c', '--connection', help='Defaults to {}'.format(DEFAULT_CACHE_CONNECTION))
 def summarize(connection):
     """Summarize all."""
-    m = Manager.from_connection(connection=connection)
+    m = _get_manager(connection)
 
     pathway_count = m.count_pathways_by_resource()
 
@@ -182,24 +219,157 @@ def summarize(connection):
             click.echo('{}: {} pathways'.format(DATABASE_STYLE_DICT[database], number_of_pathways))
 
 
-@manage.command(help='Export pathways to tsv')
+@manage.command(help='Rebuild the node index, gene sets, centrality, relations and name search index of the pathways')
 @click.option('-c', '--connection', help='Defaults to {}'.format(DEFAULT_CACHE_CONNECTION))
-@click.option('-a', '--all', is_flag=True)
-def export_to_tsv(connection, all):
-    """Summarize all."""
-    m = Manager.from_connection(connection=connection)
+def reindex(connection):
+    """Rebuild the node to pathway index."""
+    m = _get_manager(connection)
 
-    if all:
+    click.echo('Indexing nodes of {} pathways'.format(m.count_pathways()))
+
+    number_of_pathways = m.reindex()
+
+    click.echo('{} pathways have been indexed'.format(number_of_pathways))
+
+
+@manage.command(help='Rewrite the pathway blobs with a given compression format')
+@click.option('-c', '--connection', help='Defaults to {}'.format(DEFAULT_CACHE_CONNECTION))
+@click.option('-f', '--blob-format',
+              help='raw, zlib, lzma or zstd (if installed). Defaults to the format of the new pathways')
+def recompress(connection, blob_format):
+    """Migrate the stored pathways to a blob format."""
+    from .storage import DEFAULT_BLOB_FORMAT, get_blob_formats
+
+    blob_format = blob_format or DEFAULT_BLOB_FORMAT
+
+    if blob_format not in get_blob_formats():
+        raise click.BadParameter(
+            'available formats: {}'.format(', '.join(get_blob_formats())),
+            param_hint="'-f' / '--blob-format'",
+        )
+
+    m = _get_manager(connection)
+
+    summary = m.recompress_pathways(blob_format=blob_format)
+
+    click.echo('{} pathways recompressed ({} to {} bytes), {} already in {} format'.format(
+        summary['recompressed'],
+        summary['size_before'],
+        summary['size_after'],
+        summary['unchanged'],
+        blob_format,
+    ))
+
+
+@manage.command(help='Measure the size and decoding time of the pathway blobs with each compression format')
+@click.option('-c', '--connection', help='Defaults to {}'.format(DEFAULT_CACHE_CONNECTION))
+@click.option('-n', '--number', type=int, default=200, show_default=True, help='Number of pathways sampled')
+@click.option('-l', '--zstd-level', type=int, multiple=True,
+              help='Compression level of zstd measured. Can be repeated. Defaults to the level of new pathways')
+def measure_formats(connection, number, zstd_level):
+    """Compare the blob formats on the stored pathways."""
+    from .storage import decompress_blob, measure_blob_formats
+
+    m = _get_manager(connection)
+
+    pickles = []
+    for pathway in m.iterate_pathways_with_blobs():
+        if len(pickles) == number:
+            break
+
+        pickles.append(decompress_blob(pathway.blob, pathway.blob_format))
+
+    if not pickles:
+        click.echo('Database is empty')
+        return
+
+    click.echo('Blob formats measured on {} pathways'.format(len(pickles)))
+    click.echo('{:<8} {:>12} {:>7} {:>11} {:>11}'.format('format', 'bytes', 'ratio', 'encode (s)', 'decode (s)'))
+
+    for row in measure_blob_formats(pickles, zstd_levels=zstd_level):
+        click.echo('{format:<8} {size:>12} {ratio:>7.3f} {encode_time:>11.3f} {decode_time:>11.3f}'.format(**row))
+
+
+@manage.command(help='Calculate the gene set overlaps between all pairs of pathways')
+@click.option('-c', '--connection', help='Defaults to {}'.format(DEFAULT_CACHE_CONNECTION))
+@click.option('-d', '--database', multiple=True, type=click.Choice(list(DATABASE_STYLE_DICT)),
+              help='Databases whose pathways are compared. All databases if not given')
+@click.option('-m', '--metric', type=click.Choice([JACCARD, INTERSECTION]), default=JACCARD, show_default=True)
+@click.option('-t', '--threshold', type=float, default=0.0, show_default=True, help='Minimum score of the overlaps')
+@click.option('-k', '--top-k', type=int, help='Maximum number of overlaps reported per pathway')
+@click.option('-o', '--output', type=click.File('w'), default='pathme_overlaps.tsv', show_default=True)
+def overlaps(connection, database, metric, threshold, top_k, output):
+    """Export the overlap matrix to a TSV file."""
+    from .overlap import get_overlap_matrix
+
+    m = _get_manager(connection)
+
+    if database:
         pathways = [
-            pathway.as_bel()
-            for pathway in m.get_all_pathways()
+            pathway
+            for resource_name in database
+            for pathway in m.get_pathways_from_resource(resource_name)
         ]
+    else:
+        pathways = m.get_all_pathways()
+
+    matrix = get_overlap_matrix(m, pathways)
+
+    print('resource\tpathway_id\tother_resource\tother_pathway_id\tintersection\tjaccard', file=output)
+
+    for i, row in matrix.iterate_rows(metric=metric, threshold=threshold, top_k=top_k):
+        for j, intersection, jaccard in row:
+            print('{}\t{}\t{}\t{}\t{}\t{:.6f}'.format(*matrix.keys[i], *matrix.keys[j], intersection, jaccard), file=output)
+
+    click.echo('Overlaps of {} pathways exported to {}'.format(len(matrix), output.name))
+
+
+@manage.command(help='Report the node pairs with contradictory relations across all pathways')
+@click.option('-c', '--connection', help='Defaults to {}'.format(DEFAULT_CACHE_CONNECTION))
+@click.option('-o', '--output', type=click.File('w'), default='pathme_contradictions.tsv', show_default=True)
+def contradictions(connection, output):
+    """Export the contradiction report to a TSV file."""
+    m = _get_manager(connection)
+
+    report = m.get_contradiction_report()
+
+    print('source\ttarget\trelations\tpathways', file=output)
+
+    for entry in report:
+        print('{}\t{}\t{}\t{}'.format(
+            entry['source'],
+            entry['target'],
+            ','.join(entry['relations']),
+            ','.join('{}:{}'.format(*pathway) for pathway in entry['pathways']),
+        ), file=output)
+
+    click.echo('{} contradicting node pairs exported to {}'.format(len(report), output.name))
+
+
+@manage.command(help='Export the distinct triplets of all pathways to tsv')
+@click.option('-c', '--connection', help='Defaults to {}'.format(DEFAULT_CACHE_CONNECTION))
+@click.option('-a', '--all', is_flag=True)
+@click.option('-o', '--output', default='pathme_triplets.tsv', show_default=True,
+              help='Output file. Compressed with gzip if it ends with .gz')
+@click.option('-w', '--workers', type=int, help='Number of processes decoding the pathways')
+def export_to_tsv(connection, all, output, workers):
+    """Export the triplets of all pathways."""
+    from .export import export_triplets
+
+    m = _get_manager(connection)
+
+    if all:
+        open_file = gzip.open if output.endswith('.gz') else open
 
-        graph = union(pathways)
+        with open_file(output, 'wt') as f:
+            summary = export_triplets(m, f, workers=workers)
 
-        with open("pathme_triplets.tsv", "w") as f:
-            for sub, obj, data in graph.edges(data=True):
-                print("%s\t%s\t%s" % (sub.as_bel(), data['relation'], obj.as_bel()), file=f)
+        click.echo('{} triplets from {} pathways exported to {} ({} duplicates skipped)'.format(
+            summary['triplets'],
+            summary['pathways'],
+            output,
+            summary['duplicates'],
+        ))
 
 
 if __name__ == '__main__':
@@ -22,6 +22,64 @@ MODULE_NAME = 'pathme_viewer'
 PATHME_DIR = os.environ.get('PATHME_DIRECTORY', os.path.join(os.path.expanduser('~'), '.pathme'))
 DEFAULT_CACHE_CONNECTION = get_connection(MODULE_NAME)
 
+#: Maximum number of decoded pathway graphs kept in memory by the manager
+GRAPH_CACHE_MAX_ENTRIES = int(os.environ.get('PATHME_GRAPH_CACHE_MAX_ENTRIES', 256))
+#: Maximum size (in bytes of the serialized graphs) of the decoded pathway graphs kept in memory by the manager
+GRAPH_CACHE_MAX_SIZE = int(os.environ.get('PATHME_GRAPH_CACHE_MAX_SIZE', 512 * 1024 * 1024))
+#: Maximum number of merged graphs kept in memory by the manager
+MERGED_GRAPH_CACHE_MAX_ENTRIES = int(os.environ.get('PATHME_MERGED_GRAPH_CACHE_MAX_ENTRIES', 64))
+#: Maximum size (in number of nodes and edges) of the merged graphs kept in memory by the manager
+MERGED_GRAPH_CACHE_MAX_SIZE = int(os.environ.get('PATHME_MERGED_GRAPH_CACHE_MAX_SIZE', 2000000))
+#: Seconds after which a cached merged graph is rebuilt
+MERGED_GRAPH_CACHE_TTL = int(os.environ.get('PATHME_MERGED_GRAPH_CACHE_TTL', 3600))
+#: Codec used to compress new pathway blobs (raw, zlib, lzma or zstd). Defaults to the fastest available one
+BLOB_FORMAT = os.environ.get('PATHME_BLOB_FORMAT')
+#: Compression level of the zstd blobs. Higher levels compress much slower for smaller blobs that decode as fast
+BLOB_ZSTD_LEVEL = int(os.environ.get('PATHME_BLOB_ZSTD_LEVEL', 3))
+#: Folder where the pathway overlap matrices are cached
+OVERLAP_CACHE_DIR = os.environ.get('PATHME_OVERLAP_CACHE_DIR', os.path.join(PATHME_DIR, 'overlaps'))
+#: Maximum number of overlap matrices kept in the cache folder. The least recently used ones are removed first
+OVERLAP_CACHE_MAX_FILES = int(os.environ.get('PATHME_OVERLAP_CACHE_MAX_FILES', 32))
+#: Number of pathways whose overlaps are calculated at once
+OVERLAP_CHUNK_SIZE = 500
+#: Minimum number of characters sent per chunk by the streamed exports
+STREAM_BUFFER_SIZE = 64 * 1024
+#: Graphs with up to this number of nodes get their exact betweenness centrality, larger ones are approximated
+CENTRALITY_EXACT_MAX_NODES = int(os.environ.get('PATHME_CENTRALITY_EXACT_MAX_NODES', 1000))
+#: Number of pivots sampled to approximate the betweenness centrality of large graphs
+CENTRALITY_SAMPLES = int(os.environ.get('PATHME_CENTRALITY_SAMPLES', 200))
+#: Seed of the pivot sampling so the approximated scores are reproducible
+CENTRALITY_SEED = 0
+#: Maximum number of betweenness centrality rankings kept in memory by the manager
+CENTRALITY_CACHE_MAX_ENTRIES = int(os.environ.get('PATHME_CENTRALITY_CACHE_MAX_ENTRIES', 256))
+#: Default and maximum number of paths returned at once by the all paths API
+PATHS_MAX_PATHS = int(os.environ.get('PATHME_PATHS_MAX_PATHS', 1000))
+PATHS_MAX_PATHS_LIMIT = int(os.environ.get('PATHME_PATHS_MAX_PATHS_LIMIT', 100000))
+#: Default and maximum number of seconds spent enumerating paths by the all paths API
+PATHS_TIME_BUDGET = float(os.environ.get('PATHME_PATHS_TIME_BUDGET', 10))
+PATHS_TIME_BUDGET_LIMIT = float(os.environ.get('PATHME_PATHS_TIME_BUDGET_LIMIT', 60))
+#: Maximum number of source/target pairs answered at once by the batch shortest paths API
+PATHS_BATCH_MAX_PAIRS = int(os.environ.get('PATHME_PATHS_BATCH_MAX_PAIRS', 10000))
+#: Maximum number of responses of the graph APIs kept in memory by the manager
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('PATHME_RESPONSE_CACHE_MAX_ENTRIES', 512))
+#: Maximum size (in bytes of the gzipped bodies) of the responses of the graph APIs kept in memory by the manager
+RESPONSE_CACHE_MAX_SIZE = int(os.environ.get('PATHME_RESPONSE_CACHE_MAX_SIZE', 256 * 1024 * 1024))
+#: Number of threads running the background jobs
+JOBS_MAX_WORKERS = int(os.environ.get('PATHME_JOBS_MAX_WORKERS', 2))
+#: Maximum number of background jobs waiting for a thread
+JOBS_MAX_PENDING = int(os.environ.get('PATHME_JOBS_MAX_PENDING', 100))
+#: Seconds during which the results of the background jobs are kept after they finish
+JOBS_RESULT_TTL = int(os.environ.get('PATHME_JOBS_RESULT_TTL', 600))
+#: Send the durations of the phases of the requests in a Server-Timing header
+SERVER_TIMING = os.environ.get('PATHME_SERVER_TIMING', '').lower() in {'1', 'true', 'yes'}
+#: Default and maximum number of nodes returned by the node suggestion API
+NODE_SUGGESTION_LIMIT = 50
+NODE_SUGGESTION_MAX_LIMIT = 500
+
+#: Metrics of the gene set overlaps between pathways
+JACCARD = 'jaccard'
+INTERSECTION = 'intersection'
+
 HUMAN_WIKIPATHWAYS = os.path.join(WIKIPATHWAYS_FILES, 'wp', 'Human')
 
 FORMAT = 'format'
@@ -31,6 +89,8 @@ UNDIRECTED = 'undirected'
 PATHS_METHOD = 'paths_method'
 RANDOM_PATH = 'random'
 COLLAPSE_TO_GENES = 'collapse_to_genes'
+STREAM = 'stream'
+ASYNC = 'async'
 
 BLACK_LIST = {
     COLLAPSE_TO_GENES,
@@ -40,4 +100,6 @@ BLACK_LIST = {
     UNDIRECTED,
     PATHS_METHOD,
     RANDOM_PATH,
+    STREAM,
+    ASYNC,
 }
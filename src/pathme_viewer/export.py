@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+"""This module contains the streaming export of the triplets of all the pathways in the database.
+
+Pathways are decoded one at a time, optionally in a pool of processes, and their triplets are written as soon as they
+are produced. Triplets already written are remembered by a 64-bit hash of their line instead of the line itself.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+from collections import Counter
+
+import tqdm
+
+from .graph_utils import get_bel_getter
+from .manager import Manager
+from .models import Pathway
+
+__all__ = [
+    'iterate_graph_triplets',
+    'hash_line',
+    'export_triplets',
+]
+
+log = logging.getLogger(__name__)
+
+#: Number of pathways sent at once to an export worker
+EXPORT_CHUNK_SIZE = 20
+
+
+def iterate_graph_triplets(graph):
+    """Iterate over the subject, relation and object of the edges of a graph as BEL strings.
+
+    :param pybel.BELGraph graph: BEL graph
+    :rtype: iter[tuple[str,str,str]]
+    """
+    get_bel = get_bel_getter(graph)
+
+    for u, v, relation in graph.edges(data='relation'):
+        yield get_bel(u), relation, get_bel(v)
+
+
+def hash_line(line):
+    """Hash a line to a 64-bit integer.
+
+    With 64 bits, the probability of any collision among ten million lines is in the order of one in a million.
+
+    :param str line: line
+    :rtype: int
+    """
+    return int.from_bytes(hashlib.blake2b(line.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _get_pathway_lines(pathway):
+    """Return the distinct triplet lines of a pathway with their hashes.
+
+    :param Pathway pathway: pathway
+    :rtype: list[tuple[int,str]]
+    """
+    lines = {
+        '{}\t{}\t{}\n'.format(*triplet)
+        for triplet in iterate_graph_triplets(pathway.as_bel())
+    }
+
+    return [
+        (hash_line(line), line)
+        for line in sorted(lines)
+    ]
+
+
+def _iterate_pathway_chunks(manager, network_ids):
+    """Iterate over the pathways in chunks, loading their blobs.
+
+    :param pathme_viewer.manager.Manager manager: PathMe manager
+    :param list[int] network_ids: primary keys of the pathways
+    :rtype: iter[list[Pathway]]
+    """
+    for i in range(0, len(network_ids), EXPORT_CHUNK_SIZE):
+        chunk = network_ids[i:i + EXPORT_CHUNK_SIZE]
+
+        yield manager._query_pathways(load_blob=True).filter(Pathway.id.in_(chunk)).order_by(Pathway.id).all()
+
+        # Forget the blobs of the chunk
+        manager.session.expunge_all()
+
+
+#: State of an export worker process, set by :func:`_init_export_worker`
+_worker_state = {}
+
+
+def _init_export_worker(connection):
+    """Initialize an export worker process with its own connection to the database.
+
+    :param str connection: SQLAlchemy connection string
+    """
+    _worker_state['manager'] = Manager.from_connection(connection=connection)
+
+
+def _export_in_worker(network_ids):
+    """Get the triplet lines of a chunk of pathways in a worker process.
+
+    :param list[int] network_ids: primary keys of the pathways
+    :rtype: list[list[tuple[int,str]]]
+    """
+    manager = _worker_state['manager']
+
+    return [
+        _get_pathway_lines(pathway)
+        for pathways in _iterate_pathway_chunks(manager, network_ids)
+        for pathway in pathways
+    ]
+
+
+def _iterate_lines_by_pathway(manager, network_ids, workers=None):
+    """Iterate over the triplet lines of each pathway, in the order of the primary keys.
+
+    :param pathme_viewer.manager.Manager manager: PathMe manager
+    :param list[int] network_ids: primary keys of the pathways
+    :param Optional[int] workers: number of worker processes. Pathways are decoded in the current process if None or 1
+    :rtype: iter[list[tuple[int,str]]]
+    """
+    if not workers or workers < 2:
+        for pathways in _iterate_pathway_chunks(manager, network_ids):
+            for pathway in pathways:
+                yield _get_pathway_lines(pathway)
+        return
+
+    partitions = [
+        network_ids[i:i + EXPORT_CHUNK_SIZE]
+        for i in range(0, len(network_ids), EXPORT_CHUNK_SIZE)
+    ]
+
+    with multiprocessing.Pool(
+            processes=workers,
+            initializer=_init_export_worker,
+            initargs=(str(manager.engine.url),)
+    ) as pool:
+        # imap returns the results in the same order as the partitions
+        for lines_by_pathway in pool.imap(_export_in_worker, partitions):
+            yield from lines_by_pathway
+
+
+def export_triplets(manager, file, workers=None, use_tqdm=True):
+    """Write the distinct triplets of all the pathways in the database as tab-separated lines.
+
+    :param pathme_viewer.manager.Manager manager: PathMe manager
+    :param file: file opened in text mode
+    :param Optional[int] workers: number of worker processes decoding the pathways
+    :param bool use_tqdm: show a progress bar
+    :return: number of pathways exported, triplets written and duplicate triplets skipped
+    :rtype: collections.Counter
+    """
+    network_ids = [network_id for network_id, in manager.session.query(Pathway.id).order_by(Pathway.id)]
+
+    lines_by_pathway = _iterate_lines_by_pathway(manager, network_ids, workers=workers)
+
+    if use_tqdm:
+        lines_by_pathway = tqdm.tqdm(lines_by_pathway, total=len(network_ids), desc='Exporting pathways')
+
+    counter = Counter()
+    seen = set()
+
+    for lines in lines_by_pathway:
+        counter['pathways'] += 1
+
+        for line_hash, line in lines:
+            if line_hash in seen:
+                counter['duplicates'] += 1
+                continue
+
+            seen.add(line_hash)
+            file.write(line)
+            counter['triplets'] += 1
+
+    return counter
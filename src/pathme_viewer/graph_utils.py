@@ -2,24 +2,30 @@
 
 """This module contains the methods used to deal with BELGraphs."""
 
+import json
 import logging
-from operator import methodcaller
+from xml.sax.saxutils import escape, quoteattr
 
 import networkx as nx
-from flask import abort, Response, jsonify, send_file
+from flask import abort, Response, send_file, stream_with_context
 from flask import current_app
 from itertools import combinations
-from pybel import collapse_to_genes, to_bel_lines, to_bytes, to_csv, union
+from pybel import BELGraph, collapse_to_genes, to_bel_lines, to_bytes, to_csv
 from pybel.canonicalize import edge_to_bel
 from pybel.constants import *
 from pybel.dsl import BaseAbundance
-from pybel.io import from_bytes
-from pybel.struct import add_annotation_value
 from pybel.struct.summary import get_annotation_values_by_annotation
 from pybel_tools.summary.contradictions import relation_set_has_contradictions
 from six import BytesIO, StringIO
 
-from pathme_viewer.constants import BLACK_LIST, PATHWAYS_ARGUMENT, RESOURCES_ARGUMENT
+from pathme_viewer.constants import BLACK_LIST, PATHWAYS_ARGUMENT, RESOURCES_ARGUMENT, STREAM_BUFFER_SIZE
+from pathme_viewer.metrics import span
+from pathme_viewer.models import hash_bel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 log = logging.getLogger(__name__)
 
@@ -117,17 +123,83 @@ def get_annotations_from_request(request):
     return annotations
 
 
+def _add_provenance(data, pathway):
+    """Return a copy of the edge data with the annotations tracking the pathway of origin.
+
+    The annotation dictionaries are copied so the edge data of the cached graphs are never modified.
+
+    :param dict data: edge data
+    :param pathme_viewer.models.Pathway pathway: pathway of origin
+    :rtype: dict
+    """
+    annotations = {
+        annotation: dict(values)
+        for annotation, values in data.get(ANNOTATIONS, {}).items()
+    }
+
+    annotations.setdefault('Pathway name', {})[pathway.name] = True
+    annotations.setdefault('Database', {})[pathway.resource_name] = True
+    annotations.setdefault('PathwayID', {})[pathway.pathway_id] = True
+
+    rv = dict(data)
+    rv[ANNOTATIONS] = annotations
+    return rv
+
+
+def _join_pathway(target, graph, pathway):
+    """Add all nodes and edges from a pathway graph to the target graph, annotating their provenance.
+
+    Works like :func:`pybel.struct.left_full_join` but leaves the pathway graph untouched.
+
+    :param pybel.BELGraph target: merged graph (modified in place)
+    :param pybel.BELGraph graph: pathway graph
+    :param pathme_viewer.models.Pathway pathway: pathway
+    """
+    target.add_nodes_from(
+        (node, data)
+        for node, data in graph.nodes(data=True)
+        if node not in target
+    )
+    target.add_edges_from(
+        (u, v, key, _add_provenance(data, pathway))
+        for u, v, key, data in graph.edges(keys=True, data=True)
+        if u not in target or v not in target[u] or key not in target[u][v]
+    )
+
+    target.namespace_url.update(graph.namespace_url)
+    target.namespace_pattern.update(graph.namespace_pattern)
+    target.annotation_url.update(graph.annotation_url)
+    target.annotation_pattern.update(graph.annotation_pattern)
+
+    for keyword, values in graph.annotation_list.items():
+        target.annotation_list.setdefault(keyword, set()).update(values)
+
+    target.warnings.extend(graph.warnings)
+
+
 def merge_pathways(pathways):
     """Return merged graphs from pathways in the request.
 
+    Merged graphs are cached by the manager and shared between requests so they must not be modified in place.
+
     :param dict pathways: pathways to be merged
     :rtype: Optional[pybel.BELGraph]
     """
-    networks = []
+    manager = current_app.pathme_manager
+
+    graph = manager.get_merged_graph(pathways)
+
+    if graph is not None:
+        return graph
+
+    graph = BELGraph()
+    is_empty = True
+    selected_pathways = []
 
     for name, resource in pathways.items():
 
-        pathway = current_app.pathme_manager.get_pathway_by_id(name, resource)
+        with span('db'):
+            pathway = manager.get_pathway_by_id(name, resource)
 
         if not pathway:
             abort(
@@ -137,43 +209,165 @@ def merge_pathways(pathways):
                     name, resource)
             )
 
-        # Loads the BELGraph and adds annotations to track provenance later
-        graph = from_bytes(pathway.blob)
-
-        graph.annotation_list['Database'] = {'kegg', 'reactome', 'wikipathways'}
-        graph.annotation_pattern['PathwayID'] = '.*'
-        graph.annotation_pattern['Pathway name'] = '.*'
-        graph.annotation_list['Interesting edge'] = {'Contradicts', 'May contradict'}
-        add_annotation_key(graph)
+        selected_pathways.append(pathway)
 
-        add_annotation_value(graph, 'Pathway name', pathway.name)
-        add_annotation_value(graph, 'Database', pathway.resource_name)
-        add_annotation_value(graph, 'PathwayID', pathway.pathway_id)
+        # Loads the shared BELGraph. It is not modified since edges are copied with their provenance annotations
+        with span('decode'):
+            pathway_graph = manager.get_pathway_graph(pathway, copy=False)
 
         log.debug('Adding graph {} {}:with {} nodes and {} edges'.format(
-            name, resource, graph.number_of_nodes(), graph.number_of_edges())
+            name, resource, pathway_graph.number_of_nodes(), pathway_graph.number_of_edges())
         )
 
-        networks.append(graph)
+        if is_empty:
+            graph.document.update(pathway_graph.document)
+            is_empty = False
 
-    if not networks:
+        with span('union'):
+            _join_pathway(graph, pathway_graph, pathway)
+
+    if is_empty:
         abort(
             500,
             'Any pathway was requested. Please select at least one pathway.'
         )
 
-    graph = union(networks)
-    graph.name = 'Merged graph from {}'.format([graph.name for graph in networks])
+    graph.annotation_list['Database'] = {'kegg', 'reactome', 'wikipathways'}
+    graph.annotation_pattern['PathwayID'] = '.*'
+    graph.annotation_pattern['Pathway name'] = '.*'
+    graph.annotation_list['Interesting edge'] = {'Contradicts', 'May contradict'}
+
+    graph.name = 'Merged graph from {}'.format([pathway_id for pathway_id in pathways])
     graph.version = '0.0.0'
 
-    contradicting_edges = get_contradiction_summary(graph)
+    with span('contradictions'):
+        contradictions = manager.get_contradictions(selected_pathways)
+
+        if contradictions is None:  # some pathways were loaded before the relations were indexed
+            contradicting_edges = [(u, v) for u, v, _ in get_contradiction_summary(graph)]
+
+        elif contradictions:
+            hash_to_node = {
+                node.sha512: node
+                for node in graph
+            }
+            contradicting_edges = [
+                (hash_to_node[source_hash], hash_to_node[target_hash])
+                for source_hash, target_hash, _ in contradictions
+            ]
+
+        else:
+            contradicting_edges = []
+
+        for u, v in contradicting_edges:
+            label_graph_edges(graph, u, v, 'Interesting edge', 'Contradicts')
 
-    for u, v, _ in contradicting_edges:
-        label_graph_edges(graph, u, v, 'Interesting edge', 'Contradicts')
+    manager.set_merged_graph(pathways, graph)
 
     return graph
 
 
+def get_bel_getter(graph):
+    """Return a function returning the BEL string of a node of a graph, computed only once per node.
+
+    Nodes are hashed by their BEL string, so using them as dictionary keys computes it again at each lookup. Instead,
+    the BEL strings are memoized by node identity. The adjacency of a merged graph can contain objects equal to (but
+    distinct from) the nodes of the graph, which are memoized when they are first seen.
+
+    :type graph: pybel.BELGraph
+    :rtype: types.FunctionType
+    """
+    id_to_bel = {
+        id(node): node.as_bel()
+        for node in graph
+    }
+
+    def get_bel(node):
+        bel = id_to_bel.get(id(node))
+
+        if bel is None:
+            bel = id_to_bel[id(node)] = node.as_bel()
+
+        return bel
+
+    return get_bel
+
+
+def _edge_to_bel(u, v, data, get_bel):
+    """Return the BEL statement of an edge like :func:`pybel.canonicalize.edge_to_bel`.
+
+    The BEL strings of the nodes are reused when the edge has no modifiers.
+
+    :param pybel.dsl.BaseEntity u: source node
+    :param pybel.dsl.BaseEntity v: target node
+    :param dict data: edge data
+    :param get_bel: function returning the BEL string of a node (see :func:`get_bel_getter`)
+    :rtype: str
+    """
+    if SUBJECT in data or OBJECT in data:
+        return edge_to_bel(u, v, data)
+
+    return ' '.join((get_bel(u), data[RELATION], get_bel(v)))
+
+
+def _iterate_json_nodes(graph, get_bel, _id='id'):
+    """Iterate over the nodes of a graph sorted by BEL with the keys added to them for the network explorer.
+
+    :type graph: pybel.BELGraph
+    :param get_bel: function returning the BEL string of a node (see :func:`get_bel_getter`)
+    :param str _id: The key to use for the identifier of a node
+    :rtype: iter[tuple[pybel.dsl.BaseEntity,list[tuple[str,str]]]]
+    """
+    for node in sorted(graph, key=get_bel):
+        bel = get_bel(node)
+
+        # The identifier is the same as pybel.dsl.BaseEntity.sha512
+        extra = [(_id, hash_bel(bel)), ('bel', bel)]
+
+        if VARIANTS in node or FUSION in node or MEMBERS in node:
+            extra.append(('cname', bel))
+
+        yield node, extra
+
+
+def _iterate_json_links(graph, get_bel):
+    """Iterate over the links of the network explorer, grouping the edges between each pair of nodes.
+
+    :type graph: pybel.BELGraph
+    :param get_bel: function returning the BEL string of a node (see :func:`get_bel_getter`)
+    :return: BEL strings of the source and target nodes, BEL statement and data of each edge and relation of the link
+     (None if no edge is causal)
+    :rtype: iter[tuple[str,str,list[tuple[str,dict]],Optional[str]]]
+    """
+    # The edges between a pair of nodes are contiguous when iterating over the adjacency
+    for u, neighbors in graph.adjacency():
+        source_bel = get_bel(u)
+
+        for v, keyed_data in neighbors.items():
+            target_bel = get_bel(v)
+            contexts = []
+            relation = None
+
+            # Two way edges are only kept in the direction of the sorted BEL strings
+            is_reversed = source_bel > target_bel
+
+            for data in keyed_data.values():
+                if is_reversed and data[RELATION] in TWO_WAY_RELATIONS:
+                    continue
+
+                contexts.append((_edge_to_bel(u, v, data, get_bel), data))
+
+                if data[RELATION] in CAUSAL_INCREASE_RELATIONS:
+                    relation = INCREASES
+
+                elif data[RELATION] in CAUSAL_DECREASE_RELATIONS:
+                    relation = DECREASES
+
+            # Avoids duplicate sending multiple edges between nodes with same relation
+            if contexts:
+                yield source_bel, target_bel, contexts, relation
+
+
 def to_json_custom(graph, _id='id', source='source', target='target'):
     """Prepares JSON for the biological network explorer
 
@@ -183,104 +377,285 @@ def to_json_custom(graph, _id='id', source='source', target='target'):
     :param str target: The key to use for the target node
     :rtype: dict
     """
+    get_bel = get_bel_getter(graph)
+
     result = {}
 
+    # BEL string of the nodes to their index
     mapping = {}
 
     result['nodes'] = []
-    for i, node in enumerate(sorted(graph, key=methodcaller('as_bel'))):
-        nd = node.copy()
-        nd[_id] = node.sha512
-        nd['bel'] = node.as_bel()
-        if VARIANTS in nd or FUSION in nd or MEMBERS in nd:
-            nd['cname'] = nd['bel']
+    for i, (node, extra) in enumerate(_iterate_json_nodes(graph, get_bel, _id=_id)):
+        nd = dict(node)
+        nd.update(extra)
         result['nodes'].append(nd)
-        mapping[node] = i
+        mapping[get_bel(node)] = i
+
+    result['links'] = []
+    for source_bel, target_bel, contexts, relation in _iterate_json_links(graph, get_bel):
+        link = {
+            source: mapping[source_bel],
+            target: mapping[target_bel],
+            'contexts': [],
+        }
+
+        for bel, data in contexts:
+            payload = {'bel': bel}
+            payload.update(data)
+            link['contexts'].append(payload)
+
+        if relation is not None:
+            link[RELATION] = relation
+
+        result['links'].append(link)
+
+    return result
+
+
+def _iterate_buffered(strings, buffer_size=STREAM_BUFFER_SIZE):
+    """Concatenate strings in chunks of at least a given size so responses are not sent in tiny writes.
+
+    :param iter[str] strings: strings
+    :param int buffer_size: minimum number of characters per chunk
+    :rtype: iter[str]
+    """
+    buffer = []
+    length = 0
 
-    edge_set = set()
+    for string in strings:
+        buffer.append(string)
+        length += len(string)
 
-    rr = {}
+        if length >= buffer_size:
+            yield ''.join(buffer)
+            buffer = []
+            length = 0
 
+    if buffer:
+        yield ''.join(buffer)
+
+
+def dumps_json(data):
+    """Serialize data to JSON, with orjson if it is installed.
+
+    :param data: JSON serializable data
+    :rtype: str
+    """
+    if orjson is not None:
+        return orjson.dumps(data).decode('utf-8')
+
+    return json.dumps(data)
+
+
+#: Separators between items and between keys and values in the output of :func:`dumps_json`
+_ITEM_SEPARATOR, _KEY_SEPARATOR = (',', ':') if orjson is not None else (', ', ': ')
+
+
+def _splice_json_object(encoded, before=(), after=()):
+    """Add keys at the start and at the end of a serialized JSON object without decoding it.
+
+    Used to add keys to nodes and edge data without copying them.
+
+    :param str encoded: serialized JSON object
+    :param iter[tuple[str,str]] before: keys and serialized values added at the start
+    :param iter[tuple[str,str]] after: keys and serialized values added at the end
+    :rtype: str
+    """
+    pieces = [dumps_json(key) + _KEY_SEPARATOR + value for key, value in before]
+
+    if encoded != '{}':
+        pieces.append(encoded[1:-1])
+
+    pieces.extend(dumps_json(key) + _KEY_SEPARATOR + value for key, value in after)
+
+    return '{' + _ITEM_SEPARATOR.join(pieces) + '}'
+
+
+def iterate_json(graph):
+    """Iterate over the JSON of the network explorer (see :func:`to_json_custom`) in pieces.
+
+    The nodes and the edge data are serialized directly, with the keys added by :func:`to_json_custom` spliced in
+    their JSON.
+
+    :type graph: pybel.BELGraph
+    :rtype: iter[str]
+    """
+    get_bel = get_bel_getter(graph)
+    mapping = {}
+
+    yield '{"nodes"' + _KEY_SEPARATOR + '['
+
+    for i, (node, extra) in enumerate(_iterate_json_nodes(graph, get_bel)):
+        mapping[get_bel(node)] = i
+
+        nd = _splice_json_object(dumps_json(node), after=[(key, dumps_json(value)) for key, value in extra])
+
+        yield nd if i == 0 else _ITEM_SEPARATOR + nd
+
+    yield ']' + _ITEM_SEPARATOR + '"links"' + _KEY_SEPARATOR + '['
+
+    for i, (source_bel, target_bel, contexts, relation) in enumerate(_iterate_json_links(graph, get_bel)):
+        items = [
+            ('source', str(mapping[source_bel])),
+            ('target', str(mapping[target_bel])),
+            ('contexts', '[' + _ITEM_SEPARATOR.join(
+                _splice_json_object(dumps_json(data), before=[('bel', dumps_json(bel))])
+                for bel, data in contexts
+            ) + ']'),
+        ]
+
+        if relation is not None:
+            items.append((RELATION, dumps_json(relation)))
+
+        link = _splice_json_object('{}', after=items)
+
+        yield link if i == 0 else _ITEM_SEPARATOR + link
+
+    yield ']}'
+
+
+def iterate_bel(graph):
+    """Iterate over the lines of the BEL Script of a graph.
+
+    :type graph: pybel.BELGraph
+    :rtype: iter[str]
+    """
+    for line in to_bel_lines(graph):
+        yield line + '\n'
+
+
+def iterate_csv(graph):
+    """Iterate over the lines of the tab-separated edge list of a graph, as written by :func:`pybel.to_csv`.
+
+    :type graph: pybel.BELGraph
+    :rtype: iter[str]
+    """
     for u, v, data in graph.edges(data=True):
+        yield '{}\t{}\n'.format(graph.edge_to_bel(u, v, edge_data=data, sep='\t'), json.dumps(data))
 
-        if data[RELATION] in TWO_WAY_RELATIONS and (u, v) != tuple(sorted((u, v), key=methodcaller('as_bel'))):
-            continue  # don't keep two way edges twice
 
-        entry_code = u, v
+def iterate_graphml(graph):
+    """Iterate over the lines of the GraphML of a graph, with the nodes canonicalized as in :func:`to_graphml`.
 
-        if entry_code not in edge_set:  # Avoids duplicate sending multiple edges between nodes with same relation
-            rr[entry_code] = {
-                source: mapping[u],
-                target: mapping[v],
-                'contexts': []
-            }
+    Unlike :func:`to_graphml`, no intermediate graph is built: nodes are written when they first appear in an edge.
 
-            edge_set.add(entry_code)
+    :type graph: pybel.BELGraph
+    :rtype: iter[str]
+    """
+    yield "<?xml version='1.0' encoding='utf-8'?>\n"
+    yield (
+        '<graphml xmlns="http://graphml.graphdrawing.org/xmlns" '
+        'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+        'xsi:schemaLocation="http://graphml.graphdrawing.org/xmlns '
+        'http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd">\n'
+    )
+    yield '  <key attr.name="relation" attr.type="string" for="edge" id="d0" />\n'
+    yield '  <key attr.name="bel" attr.type="string" for="edge" id="d1" />\n'
+    yield '  <graph edgedefault="directed">\n'
+
+    written_nodes = set()
 
-        payload = {
-            'bel': graph.edge_to_bel(u, v, data)
-        }
-        payload.update(data)
+    for u, v, key, edge_data in graph.edges(data=True, keys=True):
+        bel_string = edge_to_bel(u, v, edge_data).split(' ')
+        source, target = bel_string[0], bel_string[2]
 
-        if data[RELATION] in CAUSAL_INCREASE_RELATIONS:
-            rr[entry_code][RELATION] = INCREASES
+        for node in (source, target):
+            if node not in written_nodes:
+                written_nodes.add(node)
+                yield '    <node id={} />\n'.format(quoteattr(node))
 
-        elif data[RELATION] in CAUSAL_DECREASE_RELATIONS:
-            rr[entry_code][RELATION] = DECREASES
+        yield '    <edge source={} target={} id={}>\n'.format(quoteattr(source), quoteattr(target), quoteattr(str(key)))
+        yield '      <data key="d0">{}</data>\n'.format(escape(edge_data[RELATION]))
+        yield '      <data key="d1">{}</data>\n'.format(escape(graph.edge_to_bel(u, v, edge_data)))
+        yield '    </edge>\n'
 
-        rr[entry_code]['contexts'].append(payload)
+    yield '  </graph>\n'
+    yield '</graphml>\n'
 
-    result['links'] = list(rr.values())
 
-    return result
+#: Format to the function iterating over the serialization, the mimetype and the attachment name of the streamed exports
+STREAMED_FORMATS = {
+    'json': (iterate_json, 'application/json', None),
+    'bel': (iterate_bel, 'text/plain', None),
+    'graphml': (iterate_graphml, 'text/xml', 'graph.graphml'),
+    'csv': (iterate_csv, 'text/tab-separated-values', 'graph.tsv'),
+}
+
+
+def stream_graph(graph, format=None):
+    """Send a graph in a chunked response, serializing it while it is sent.
 
+    :param pybel.BELGraph graph: graph. It must not be modified until the response is sent
+    :param Optional[str] format: json (default), bel, graphml or csv
+    :rtype: flask.Response
+    """
+    try:
+        iterate_serialization, mimetype, attachment_filename = STREAMED_FORMATS[format or 'json']
+    except KeyError:
+        abort(500, '{} is not a valid format for streaming'.format(format))
+
+    headers = {}
+    if attachment_filename is not None:
+        headers['Content-Disposition'] = 'attachment; filename={}'.format(attachment_filename)
+
+    return Response(
+        stream_with_context(_iterate_buffered(iterate_serialization(graph))),
+        mimetype=mimetype,
+        headers=headers,
+    )
 
-def export_graph(graph, format=None):
+
+def export_graph(graph, format=None, stream=False):
     """Convert PyBEL graph to a different format.
 
     :param PyBEL graph graph: graph
     :param format: desire format
+    :param bool stream: send the graph in a chunked response while it is serialized. Not available for bytes
     :return: graph representation in different format
     """
-    if format is None or format == 'json':
-        data = to_json_custom(graph)
-        return jsonify(data)
-
-    elif format == 'bytes':
-        data = BytesIO(to_bytes(graph))
-        return send_file(
-            data,
-            mimetype='application/octet-stream',
-            as_attachment=True,
-            attachment_filename='graph.gpickle'
-        )
+    if stream and format != 'bytes':
+        return stream_graph(graph, format)
+
+    with span('serialize'):
+        if format is None or format == 'json':
+            data = ''.join(iterate_json(graph))
+            return Response(data, mimetype='application/json')
+
+        elif format == 'bytes':
+            data = BytesIO(to_bytes(graph))
+            return send_file(
+                data,
+                mimetype='application/octet-stream',
+                as_attachment=True,
+                attachment_filename='graph.gpickle'
+            )
 
-    elif format == 'bel':
-        data = '\n'.join(to_bel_lines(graph))
-        return Response(data, mimetype='text/plain')
-
-    elif format == 'graphml':
-        bio = BytesIO()
-        to_graphml(graph, bio)
-        bio.seek(0)
-        return send_file(
-            bio,
-            mimetype='text/xml',
-            attachment_filename='graph.graphml',
-            as_attachment=True
-        )
+        elif format == 'bel':
+            data = '\n'.join(to_bel_lines(graph))
+            return Response(data, mimetype='text/plain')
+
+        elif format == 'graphml':
+            bio = BytesIO()
+            to_graphml(graph, bio)
+            bio.seek(0)
+            return send_file(
+                bio,
+                mimetype='text/xml',
+                attachment_filename='graph.graphml',
+                as_attachment=True
+            )
 
-    elif format == 'csv':
-        bio = StringIO()
-        to_csv(graph, bio)
-        bio.seek(0)
-        data = BytesIO(bio.read().encode('utf-8'))
-        return send_file(
-            data,
-            mimetype="text/tab-separated-values",
-            attachment_filename="graph.tsv",
-            as_attachment=True
-        )
+        elif format == 'csv':
+            bio = StringIO()
+            to_csv(graph, bio)
+            bio.seek(0)
+            data = BytesIO(bio.read().encode('utf-8'))
+            return send_file(
+                data,
+                mimetype="text/tab-separated-values",
+                attachment_filename="graph.tsv",
+                as_attachment=True
+            )
 
     abort(500, '{} is not a valid format'.format(format))
 
@@ -355,16 +730,29 @@ def get_contradiction_summary(graph):
             yield u, v, relations
 
 
-def get_pathway_nodes(pathway):
-    """Return single nodes in pathway.
+def get_relation_summary(graph):
+    """Return the relations of the edges between each pair of nodes of a graph.
 
-    :param pathme_viewer.models.Pathway pathway: pathway entry
-    :return: BaseAbundance nodes
-    :rtype: list[pybel.dsl.BaseAbundance]
+    :param pybel.BELGraph graph: A BEL graph
+    :return: BEL strings of the source and target nodes to their set of relations
+    :rtype: dict[tuple[str,str],set[str]]
     """
-    # Loads the BELGraph
-    graph = from_bytes(pathway.blob)
+    get_bel = get_bel_getter(graph)
+
+    rv = {}
+    for u, v, relation in graph.edges(data=RELATION):
+        rv.setdefault((get_bel(u), get_bel(v)), set()).add(relation)
+
+    return rv
+
+
+def get_gene_bels(graph):
+    """Collapse a graph to genes in place and return the BEL strings of its single nodes.
 
+    :param pybel.BELGraph graph: A BEL graph. It is modified
+    :return: BEL strings of the BaseAbundance nodes
+    :rtype: set[str]
+    """
     collapse_to_genes(graph)
 
     # Return BaseAbundace BEL nodes
@@ -375,6 +763,18 @@ def get_pathway_nodes(pathway):
     }
 
 
+def get_pathway_nodes(manager, pathway):
+    """Return single nodes in pathway.
+
+    :param pathme_viewer.manager.Manager manager: Manager
+    :param pathme_viewer.models.Pathway pathway: pathway entry
+    :return: BEL strings of the BaseAbundance nodes
+    :rtype: set[str]
+    """
+    # Loads a copy of the BELGraph since it is collapsed in place
+    return get_gene_bels(manager.get_pathway_graph(pathway))
+
+
 def prepare_venn_diagram_data(manager, pathways):
     """Prepare Venn Diagram data.
 
@@ -383,6 +783,7 @@ def prepare_venn_diagram_data(manager, pathways):
     :rtype: dict
     """
     pathway_data = {}
+    pathway_list = []
     for pathway_id, resource in pathways.items():
         # Get pathway from DB
         pathway = manager.get_pathway_by_id(pathway_id, resource)
@@ -395,10 +796,19 @@ def prepare_venn_diagram_data(manager, pathways):
                 'Please check that you have used correctly the autocompletion form.'.format(
                     pathway_id, resource)
             )
-        # Get pathway nodes
-        nodes = get_pathway_nodes(pathway)
+        pathway_list.append(pathway)
+
+    # Gene sets are precomputed when the pathways are loaded
+    pathway_to_genes = manager.get_gene_sets(pathway_list)
+
+    for pathway in pathway_list:
+        genes = pathway_to_genes.get(pathway)
 
-        pathway_data[pathway.name] = nodes
+        # Pathways loaded with a previous version until the database is reindexed
+        if genes is None:
+            genes = get_pathway_nodes(manager, pathway)
+
+        pathway_data[pathway.name] = genes
 
     return pathway_data
 
@@ -436,12 +846,14 @@ def process_overlap_for_venn_diagram(pathways_nodes, skip_gene_set_info=False):
 
     # Perform intersection calculations
     for (set_1_name, set_1_values), (set_2_name, set_2_values) in combinations(pathways_nodes.items(), r=2):
+        intersection = set_1_values.intersection(set_2_values)
+
         # Only minimum info is returned
         if skip_gene_set_info:
             overlaps_venn_diagram.append(
                 {
                     'sets': [pathway_to_index[set_1_name], pathway_to_index[set_2_name]],
-                    'size': len(set_1_values.intersection(set_2_values)),
+                    'size': len(intersection),
                 }
             )
         # Returns gene set overlap/intersection information as well
@@ -449,8 +861,8 @@ def process_overlap_for_venn_diagram(pathways_nodes, skip_gene_set_info=False):
             overlaps_venn_diagram.append(
                 {
                     'sets': [pathway_to_index[set_1_name], pathway_to_index[set_2_name]],
-                    'size': len(set_1_values.intersection(set_2_values)),
-                    'bel_nodes': list(set_1_values.intersection(set_2_values)),
+                    'size': len(intersection),
+                    'bel_nodes': list(intersection),
                     'intersection': set_1_name + ' &#8745 ' + set_2_name
                 }
             )
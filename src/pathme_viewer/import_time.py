@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""This module contains the profiling of the time taken to import the modules of the package.
+
+The modules are imported in a fresh interpreter run with ``-X importtime`` (Python 3.7+), whose report gives the time
+taken by each module alone and with the modules it imported.
+"""
+
+import subprocess
+import sys
+from collections import Counter
+
+__all__ = [
+    'ImportTime',
+    'parse_import_times',
+    'profile_imports',
+    'get_package_times',
+]
+
+
+class ImportTime(object):
+    """Time taken to import a module."""
+
+    def __init__(self, module, self_time, cumulative_time, depth):
+        """Init the import time.
+
+        :param str module: name of the module
+        :param int self_time: microseconds spent in the module alone
+        :param int cumulative_time: microseconds spent in the module and in the modules it imported first
+        :param int depth: nesting level of the import (0 for the modules imported by the profiled one)
+        """
+        self.module = module
+        self.self_time = self_time
+        self.cumulative_time = cumulative_time
+        self.depth = depth
+
+    @property
+    def package(self):
+        """Return the top-level package of the module.
+
+        :rtype: str
+        """
+        return self.module.split('.', 1)[0]
+
+    def __repr__(self):
+        """Return the module and its cumulative time."""
+        return '<ImportTime {} {}us>'.format(self.module, self.cumulative_time)
+
+
+def parse_import_times(lines):
+    """Parse the report of ``-X importtime``, ignoring the other lines.
+
+    :param iter[str] lines: lines of the standard error of the interpreter
+    :rtype: list[ImportTime]
+    """
+    rv = []
+
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+
+        self_time, cumulative_time, name = line[len('import time:'):].split('|', 2)
+
+        # Header of the report
+        if not self_time.strip().isdigit():
+            continue
+
+        module = name.lstrip()
+
+        rv.append(ImportTime(
+            module=module.rstrip(),
+            self_time=int(self_time),
+            cumulative_time=int(cumulative_time),
+            depth=(len(name) - len(module) - 1) // 2,
+        ))
+
+    return rv
+
+
+def profile_imports(module='pathme_viewer.cli', python=None):
+    """Import a module in a new interpreter and return the time taken by each module imported.
+
+    :param str module: name of the module profiled
+    :param Optional[str] python: path to the interpreter. Defaults to the current one
+    :rtype: list[ImportTime]
+    :raises RuntimeError: if the module can not be imported
+    """
+    process = subprocess.run(
+        [python or sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+
+    if process.returncode != 0:
+        error = '\n'.join(line for line in process.stderr.splitlines() if not line.startswith('import time:'))
+        raise RuntimeError('Failed to import {}:\n{}'.format(module, error))
+
+    return parse_import_times(process.stderr.splitlines())
+
+
+def get_package_times(import_times):
+    """Sum the time taken by the modules of each top-level package.
+
+    :param list[ImportTime] import_times: times of the modules
+    :return: top-level packages and their microseconds, slowest first
+    :rtype: list[tuple[str,int]]
+    """
+    counter = Counter()
+
+    for import_time in import_times:
+        counter[import_time.package] += import_time.self_time
+
+    return counter.most_common()
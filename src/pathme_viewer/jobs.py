@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+
+"""This module contains the queue of background jobs running the expensive graph analytics.
+
+Jobs run in a pool of threads so they share the caches of the manager with the requests. Identical jobs (with the same
+key) are only run once while they are in progress and their results are kept for a while after they finish.
+"""
+
+import datetime
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .constants import JOBS_MAX_PENDING, JOBS_MAX_WORKERS, JOBS_RESULT_TTL
+
+__all__ = [
+    'PENDING',
+    'RUNNING',
+    'SUCCESS',
+    'FAILURE',
+    'Job',
+    'JobQueue',
+    'JobQueueFull',
+    'get_current_job',
+    'set_progress',
+]
+
+log = logging.getLogger(__name__)
+
+#: Statuses of a job
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCESS = 'success'
+FAILURE = 'failure'
+
+#: Job run by the current thread
+_local = threading.local()
+
+
+def get_current_job():
+    """Return the job run by the current thread.
+
+    :rtype: Optional[Job]
+    """
+    return getattr(_local, 'job', None)
+
+
+def set_progress(progress):
+    """Report the progress of the job run by the current thread. Does nothing outside of a job.
+
+    :param float progress: fraction of the work done
+    """
+    job = get_current_job()
+
+    if job is not None:
+        job.progress = min(max(progress, 0.0), 1.0)
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when too many jobs are waiting to be run."""
+
+
+class Job(object):
+    """Background job."""
+
+    def __init__(self, key):
+        """Init the job.
+
+        :param key: hashable description of the work, identical for identical jobs
+        """
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = PENDING
+        #: Fraction of the work done, if reported by the job
+        self.progress = None
+        self.result = None
+        #: Message of the error that made the job fail
+        self.error = None
+        self.created = datetime.datetime.utcnow()
+        self.started = None
+        self.finished = None
+
+    @property
+    def done(self):
+        """Return if the job has finished, successfully or not.
+
+        :rtype: bool
+        """
+        return self.status in {SUCCESS, FAILURE}
+
+    def to_json(self):
+        """Return the status of the job as a JSON dictionary.
+
+        :rtype: dict
+        """
+        return {
+            'id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'error': self.error,
+            'created': self.created.isoformat(),
+            'started': self.started and self.started.isoformat(),
+            'finished': self.finished and self.finished.isoformat(),
+        }
+
+
+class JobQueue(object):
+    """Pool of threads running jobs and keeping their results until they expire."""
+
+    def __init__(self, max_workers=JOBS_MAX_WORKERS, max_pending=JOBS_MAX_PENDING, result_ttl=JOBS_RESULT_TTL):
+        """Init the job queue.
+
+        :param int max_workers: number of threads running the jobs
+        :param int max_pending: maximum number of jobs waiting for a thread
+        :param float result_ttl: seconds during which the jobs are kept after they finish
+        """
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pathme-job')
+        self._jobs = {}
+        self._key_to_job = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of jobs kept."""
+        return len(self._jobs)
+
+    def submit(self, key, function, *args, **kwargs):
+        """Submit a job, or return the identical job in progress or finished successfully.
+
+        :param key: hashable description of the work, identical for identical jobs
+        :param function: function run by the job. Its return value is the result of the job
+        :rtype: Job
+        :raises JobQueueFull: if too many jobs are waiting to be run
+        """
+        with self._lock:
+            self._expire()
+
+            job = self._key_to_job.get(key)
+
+            # Failed jobs are run again
+            if job is not None and job.status != FAILURE:
+                return job
+
+            if sum(other.status == PENDING for other in self._jobs.values()) >= self.max_pending:
+                raise JobQueueFull('Too many jobs are waiting to be run')
+
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._key_to_job[key] = job
+
+        self._executor.submit(self._run, job, function, args, kwargs)
+
+        return job
+
+    def get(self, job_id):
+        """Get a job that did not expire.
+
+        :param str job_id: identifier of the job
+        :rtype: Optional[Job]
+        """
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait=True):
+        """Stop the threads once the submitted jobs are done.
+
+        :param bool wait: wait for the submitted jobs to be done
+        """
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job, function, args, kwargs):
+        """Run a job in a thread of the pool."""
+        job.status = RUNNING
+        job.started = datetime.datetime.utcnow()
+        _local.job = job
+
+        try:
+            result = function(*args, **kwargs)
+
+        except Exception as e:
+            log.exception('Job %s failed', job.id)
+            job.error = str(e)
+            status = FAILURE
+
+        else:
+            job.result = result
+            job.progress = 1.0
+            status = SUCCESS
+
+        finally:
+            _local.job = None
+
+        # Finished jobs must have their end time
+        job.finished = datetime.datetime.utcnow()
+        job.status = status
+
+    def _expire(self):
+        """Forget the jobs finished for longer than the time to live of the results. Must hold the lock."""
+        expired = datetime.datetime.utcnow() - datetime.timedelta(seconds=self.result_ttl)
+
+        for job in list(self._jobs.values()):
+            if job.done and job.finished < expired:
+                del self._jobs[job.id]
+
+                if self._key_to_job.get(job.key) is job:
+                    del self._key_to_job[job.key]
@@ -2,8 +2,11 @@
 
 """Utils to load the PathMe database."""
 
+import hashlib
 import logging
+import multiprocessing
 import os
+from collections import Counter
 from typing import List
 
 import tqdm
@@ -19,7 +22,10 @@ from pathme.reactome.utils import untar_file
 from pathme.utils import make_downloader
 from pathme.wikipathways.rdf_sparql import wikipathways_to_bel
 from pathme.wikipathways.utils import get_file_name_from_url, iterate_wikipathways_paths
+from .centrality import calculate_betweenness_centrality
 from .constants import HUMAN_WIKIPATHWAYS
+from .graph_utils import get_gene_bels, get_relation_summary
+from .storage import DEFAULT_BLOB_FORMAT, compress_blob
 
 log = logging.getLogger(__name__)
 
@@ -36,15 +42,34 @@ def get_files_in_folder(path: str) -> List[str]:
     ]
 
 
-def _prepare_pathway_model(pathway_id, database, bel_graph):
+def get_file_digest(path, chunk_size=1024 * 1024):
+    """Return the SHA-256 digest of a file.
+
+    :param str path: file path
+    :param int chunk_size: number of bytes read at once
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def _prepare_pathway_model(pathway_id, database, bel_graph, source_digest=None):
     """Prepare dictionary pathway model.
 
     :param str pathway_id: identifier
     :param str database: database name
-    :param pybel.BELGraph bel_graph: graph
+    :param pybel.BELGraph bel_graph: graph. It is collapsed to genes
+    :param Optional[str] source_digest: digest of the file the graph was loaded from
     :rtype: dict
     :return: pathway model in dict
     """
+    data = to_bytes(bel_graph)
+
     return {
         'pathway_id': pathway_id,
         'resource_name': database,
@@ -58,60 +83,305 @@ def _prepare_pathway_model(pathway_id, database, bel_graph):
         if isinstance(bel_graph.document.get('description'), str)
         else '{}'.format(bel_graph.document.get('description')),
         'pybel_version': bel_graph.pybel_version,
-        'blob': to_bytes(bel_graph)
+        'blob': compress_blob(data, blob_format=DEFAULT_BLOB_FORMAT),
+        'blob_format': DEFAULT_BLOB_FORMAT,
+        'blob_digest': hashlib.sha256(data).hexdigest(),
+        'source_digest': source_digest,
+        'nodes': {node.as_bel() for node in bel_graph},
+        'centrality': calculate_betweenness_centrality(bel_graph),
+        'relations': get_relation_summary(bel_graph),
+        # Last since the graph is collapsed in place
+        'genes': get_gene_bels(bel_graph),
     }
 
 
-def import_from_pickle(manager, folder, files, database):
+def _get_changed_files(folder, file_to_pathway_id, digests):
+    """Split the files whose content changed since they were loaded from the unchanged ones.
+
+    :param str folder: folder with the files
+    :param dict[str,str] file_to_pathway_id: file name to pathway identifier
+    :param dict[str,tuple] digests: pathway identifier to the source and blob digests stored in the database
+    :return: file name, pathway identifier and digest of the changed files, and the number of unchanged files
+    :rtype: tuple[list[tuple[str,str,str]],int]
+    """
+    changed_files = []
+    unchanged = 0
+
+    for file_name, pathway_id in file_to_pathway_id.items():
+        source_digest = get_file_digest(os.path.join(folder, file_name))
+
+        if digests.get(pathway_id, (None, None))[0] == source_digest:
+            unchanged += 1
+            continue
+
+        changed_files.append((file_name, pathway_id, source_digest))
+
+    return changed_files, unchanged
+
+
+def _sync_pathways(manager, database, pathway_dicts, file_to_pathway_id, digests, unchanged):
+    """Write the changed pathways and delete the pathways whose files disappeared.
+
+    :param pathme_viewer.manager.Manager manager: PathMe manager
+    :param str database: resource name
+    :param iter[dict] pathway_dicts: pathway models of the changed files
+    :param dict[str,str] file_to_pathway_id: file name to pathway identifier of all the files of the resource
+    :param dict[str,tuple] digests: pathway identifier to the digests stored in the database before loading
+    :param int unchanged: number of files skipped since their digests did not change
+    :return: number of pathways added, updated, unchanged and removed
+    :rtype: collections.Counter
+    """
+    written = manager.bulk_upsert_pathways(pathway_dicts, update_existing=True)
+
+    summary = Counter(
+        added=written['created'],
+        updated=written['updated'],
+        unchanged=unchanged + written['unchanged'],
+    )
+
+    # Never wipe a resource because its folder is empty or could not be listed
+    if not file_to_pathway_id:
+        log.warning('No %s files were found. Pathways in the database are kept', database)
+        return summary
+
+    removed_pathway_ids = set(digests) - set(file_to_pathway_id.values())
+
+    if removed_pathway_ids:
+        summary['removed'] = manager.delete_pathways(database, removed_pathway_ids)
+
+    return summary
+
+
+def _select_pickles(files, database, flatten=False):
+    """Map the pickles to the identifiers of their pathways, keeping a single pickle per pathway.
+
+    PathMe writes both a flattened and an unflattened graph of each KEGG pathway (e.g., ``hsa00010_flatten.pickle`` and
+    ``hsa00010_unflatten.pickle``). The requested variant is kept, or the other one if it is missing.
+
+    :param iter[str] files: file names
+    :param str database: resource name
+    :param bool flatten: keep the flattened KEGG graphs
+    :return: file name to pathway identifier
+    :rtype: dict[str,str]
+    """
+    if database != KEGG:
+        return {
+            file_name: os.path.splitext(file_name)[0]
+            for file_name in files
+        }
+
+    preferred_suffix = '_flatten' if flatten else '_unflatten'
+    pathway_id_to_file = {}
+
+    for file_name in sorted(files):
+        name = os.path.splitext(file_name)[0]
+        # KEGG files have a special format (prefix: unflatten/flatten needs to be removed)
+        pathway_id = name.split('_')[0]
+
+        if pathway_id not in pathway_id_to_file or name.endswith(preferred_suffix):
+            pathway_id_to_file[pathway_id] = file_name
+
+    return {
+        file_name: pathway_id
+        for pathway_id, file_name in pathway_id_to_file.items()
+    }
+
+
+def import_from_pickle(manager, folder, files, database, flatten=False):
     """Import folder with pickles into database.
 
+    Only the pickles that changed since the last import are loaded, and the pathways whose pickles disappeared are
+    deleted.
+
     :param pathme_viewer.manager.Manager manager: PathMe manager
     :param str folder: folder to be imported
     :param iter[str] files: iterator with file names
     :param str database: resource name
+    :param bool flatten: load the flattened KEGG graphs instead of the unflattened ones
+    :return: number of pathways added, updated, unchanged and removed
+    :rtype: collections.Counter
     """
-    for file_name in tqdm.tqdm(files, desc='Loading {} pickles to populate PathMe database'.format(database)):
-        file_path = os.path.join(folder, file_name)
+    file_to_pathway_id = _select_pickles(files, database, flatten=flatten)
 
-        bel_pathway = from_pickle(file_path)
+    digests = manager.get_pathway_digests(database)
+    changed_files, unchanged = _get_changed_files(folder, file_to_pathway_id, digests)
 
-        pathway_id = os.path.splitext(file_name)[0]
+    def iterate_pathway_dicts():
+        for file_name, pathway_id, source_digest in tqdm.tqdm(
+                changed_files,
+                desc='Loading {} pickles to populate PathMe database'.format(database)
+        ):
+            bel_pathway = from_pickle(os.path.join(folder, file_name))
 
-        # KEGG files have a special format (prefix: unflatten/flatten needs to be removed)
-        if database == KEGG:
-            pathway_id = pathway_id.split('_')[0]
-
-        pathway_dict = _prepare_pathway_model(pathway_id, database, bel_pathway)
+            yield _prepare_pathway_model(pathway_id, database, bel_pathway, source_digest=source_digest)
 
-        _ = manager.get_or_create_pathway(pathway_dict)
+    summary = _sync_pathways(manager, database, iterate_pathway_dicts(), file_to_pathway_id, digests, unchanged)
 
     log.info('%s has been loaded', database)
 
+    return summary
+
+
+class _ManagerSpec(object):
+    """Picklable recipe to instantiate a Bio2BEL manager in a worker process."""
+
+    def __init__(self, manager):
+        """Store the class and connection of a manager.
+
+        :param bio2bel.AbstractManager manager: manager
+        """
+        self.manager_cls = type(manager)
+        self.connection = str(manager.engine.url)
+
+    def build(self):
+        """Instantiate the manager."""
+        return self.manager_cls(connection=self.connection)
+
+
+#: State of a conversion worker process, set by :func:`_init_conversion_worker`
+_worker_state = {}
+
+
+def _init_conversion_worker(conversion_method, folder, database, kwargs):
+    """Initialize a conversion worker process.
 
-def import_from_pathme(manager, folder, files, conversion_method, database, **kwargs):
+    :param conversion_method: method converting a file into a BEL graph
+    :param str folder: folder with the files to be converted
+    :param str database: resource name
+    :param dict kwargs: keyword arguments of the conversion method
+    """
+    _worker_state.update(
+        conversion_method=conversion_method,
+        folder=folder,
+        database=database,
+        kwargs={
+            key: value.build() if isinstance(value, _ManagerSpec) else value
+            for key, value in kwargs.items()
+        },
+    )
+
+
+def _convert_in_worker(task):
+    """Convert a file in a worker process."""
+    file_name, source_digest = task
+    return _convert_file(file_name=file_name, source_digest=source_digest, **_worker_state)
+
+
+def _convert_file(conversion_method, folder, file_name, database, kwargs, source_digest=None):
+    """Convert a file to the pathway model.
+
+    :param conversion_method: method converting a file into a BEL graph
+    :param str folder: folder with the file
+    :param str file_name: file name
+    :param str database: resource name
+    :param dict kwargs: keyword arguments of the conversion method
+    :param Optional[str] source_digest: digest of the file
+    :return: file name, pathway model (None if the conversion failed) and error message (None if it succeeded)
+    :rtype: tuple[str,Optional[dict],Optional[str]]
+    """
+    try:
+        bel_pathway = conversion_method(os.path.join(folder, file_name), **kwargs)
+        pathway_dict = _prepare_pathway_model(
+            os.path.splitext(file_name)[0], database, bel_pathway, source_digest=source_digest
+        )
+    except Exception as e:
+        return file_name, None, '{}: {}'.format(type(e).__name__, e)
+
+    return file_name, pathway_dict, None
+
+
+def iterate_converted_pathways(folder, files, conversion_method, database, workers=None, **kwargs):
+    """Convert files to pathway models, optionally in a pool of processes, keeping the order of the files.
+
+    Bio2BEL managers in the keyword arguments are instantiated again in each worker process.
+
+    :param str folder: folder with the files to be converted
+    :param list[tuple[str,Optional[str]]] files: file names and their digests
+    :param conversion_method: method converting a file into a BEL graph
+    :param str database: resource name
+    :param Optional[int] workers: number of worker processes. Conversion runs in the current process if None or 1
+    :return: file name, pathway model (None if the conversion failed) and error message (None if it succeeded)
+    :rtype: iter[tuple[str,Optional[dict],Optional[str]]]
+    """
+    if not workers or workers < 2:
+        for file_name, source_digest in files:
+            yield _convert_file(conversion_method, folder, file_name, database, kwargs, source_digest=source_digest)
+        return
+
+    worker_kwargs = {
+        key: _ManagerSpec(value) if hasattr(value, 'engine') else value
+        for key, value in kwargs.items()
+    }
+
+    with multiprocessing.Pool(
+            processes=workers,
+            initializer=_init_conversion_worker,
+            initargs=(conversion_method, folder, database, worker_kwargs)
+    ) as pool:
+        # imap returns the results in the same order as the files
+        yield from pool.imap(_convert_in_worker, files)
+
+
+def import_from_pathme(manager, folder, files, conversion_method, database, workers=None, **kwargs):
     """Import a given folder into database based on a conversion method.
 
+    Only the files that changed since the last import are converted, and the pathways whose files disappeared are
+    deleted. Files are converted in a pool of processes if several workers are given, while the pathways are written
+    to the database by the current process. A failing file is logged and skipped.
+
     :param pathme_viewer.manager.Manager manager: PathMe manager
     :param str folder: folder to be imported
     :param iter[str] files: iterator with file names
     :param str database: resource name
+    :param Optional[int] workers: number of worker processes used for the conversion
+    :return: number of pathways added, updated, unchanged, removed and failed
+    :rtype: collections.Counter
     """
-    for file_name in tqdm.tqdm(files, desc='Converting {} to BEL to populate PathMe database'.format(database)):
-        file_path = os.path.join(folder, file_name)
+    # The loaders already selected the files of their format (KGML, OWL or Turtle)
+    file_to_pathway_id = {
+        file_name: os.path.splitext(file_name)[0]
+        for file_name in files
+    }
 
-        if not file_name.endswith('.pickle'):
-            continue
+    digests = manager.get_pathway_digests(database)
+    changed_files, unchanged = _get_changed_files(folder, file_to_pathway_id, digests)
+
+    failures = []
 
-        bel_pathway = conversion_method(file_path, **kwargs)
+    def iterate_pathway_dicts():
+        results = iterate_converted_pathways(
+            folder,
+            [(file_name, source_digest) for file_name, _, source_digest in changed_files],
+            conversion_method,
+            database,
+            workers=workers,
+            **kwargs
+        )
 
-        pathway_dict = _prepare_pathway_model(os.path.splitext(file_name)[0], database, bel_pathway)
+        for file_name, pathway_dict, error in tqdm.tqdm(
+                results,
+                total=len(changed_files),
+                desc='Converting {} to BEL to populate PathMe database'.format(database)
+        ):
+            if error is not None:
+                log.error('Failed to convert %s: %s', file_name, error)
+                failures.append(file_name)
+                continue
 
-        _ = manager.get_or_create_pathway(pathway_dict)
+            yield pathway_dict
 
-    log.info('%s has been loaded', database)
+    summary = _sync_pathways(manager, database, iterate_pathway_dicts(), file_to_pathway_id, digests, unchanged)
+
+    if failures:
+        summary['failed'] = len(failures)
+        log.warning('%s has been loaded. %d files could not be converted', database, len(failures))
+    else:
+        log.info('%s has been loaded', database)
+
+    return summary
 
 
-def load_kegg(manager, hgnc_manager, chebi_manager, folder=None, flatten=None):
+def load_kegg(manager, hgnc_manager, chebi_manager, folder=None, flatten=None, workers=None):
     """Load KEGG files in PathMe DB.
 
     :param pathme_viewer.manager.Manager manager: PathMe manager
@@ -119,13 +389,16 @@ def load_kegg(manager, hgnc_manager, chebi_manager, folder=None, flatten=None):
     :param bio2bel_chebi.Manager chebi_manager: ChEBI manager
     :param str folder: folder
     :param Optional[bool] flatten: flatten or not
+    :param Optional[int] workers: number of worker processes used for the conversion
+    :return: number of pathways added, updated, unchanged and removed
+    :rtype: collections.Counter
     """
     # 1. Check if there are pickles in the KEGG folder. If there are already pickles, use them to populate db
     pickles = get_files_in_folder(KEGG_BEL)
 
     if pickles:
         log.info('You seem to already have created BEL Graphs using PathMe. The database will be populated using those')
-        import_from_pickle(manager, KEGG_BEL, pickles, KEGG)
+        return import_from_pickle(manager, KEGG_BEL, pickles, KEGG, flatten=flatten is True)
 
     else:
         # 2. Check that KGML files are already downloaded
@@ -148,31 +421,35 @@ def load_kegg(manager, hgnc_manager, chebi_manager, folder=None, flatten=None):
             download_kgml_files(kegg_ids)
 
         # 3. Parse KGML files to populate DB
-        import_from_pathme(
+        return import_from_pathme(
             manager,
             kegg_data_folder,
             kgml_files,
             kegg_to_bel,
             KEGG,
+            workers=workers,
             hgnc_manager=hgnc_manager,
             chebi_manager=chebi_manager,
             flatten=True if flatten is True else False
         )
 
 
-def load_reactome(manager, hgnc_manager, folder=None):
+def load_reactome(manager, hgnc_manager, folder=None, workers=None):
     """Load Reactome files in PathMe DB.
 
     :param pathme_viewer.manager.Manager manager: PathMe manager
     :param bio2bel_hgnc.manager.Manager hgnc_manager: HGNC manager
     :param Optional[str] folder: folder
+    :param Optional[int] workers: number of worker processes used for the conversion
+    :return: number of pathways added, updated, unchanged and removed
+    :rtype: collections.Counter
     """
     # 1. Check if there are pickles in the Reactome folder. If there are already pickles, use them to populate db
     pickles = get_files_in_folder(REACTOME_BEL)
 
     if pickles:
         log.info('You seem to already have created BEL Graphs using PathMe. The database will be populated using those')
-        import_from_pickle(manager, REACTOME_BEL, pickles, REACTOME)
+        return import_from_pickle(manager, REACTOME_BEL, pickles, REACTOME)
 
     else:
         # 2. Check if RDF files are downloaded, if not download them
@@ -182,17 +459,18 @@ def load_reactome(manager, hgnc_manager, folder=None):
         make_downloader(RDF_REACTOME, cached_file, reactome_data_folder, untar_file)
 
         # 3. Parse RDF file to populate DB
-        import_from_pathme(
+        return import_from_pathme(
             manager,
             reactome_data_folder,
             ['Homo_sapiens.owl'],
             reactome_to_bel,
             REACTOME,
+            workers=workers,
             hgnc_manager=hgnc_manager
         )
 
 
-def load_wikipathways(manager, hgnc_manager, folder=None, connection=None, only_canonical=True):
+def load_wikipathways(manager, hgnc_manager, folder=None, connection=None, only_canonical=True, workers=None):
     """Load WikiPathways files in PathMe DB.
 
     :param pathme_viewer.manager.Manager manager: PathMe manager
@@ -200,13 +478,16 @@ def load_wikipathways(manager, hgnc_manager, folder=None, connection=None, only_
     :param Optional[str] folder: folder
     :param Optional[str] connection: database connection
     :param Optional[bool] only_canonical: only identifiers present in WP bio2bel db
+    :param Optional[int] workers: number of worker processes used for the conversion
+    :return: number of pathways added, updated, unchanged and removed
+    :rtype: collections.Counter
     """
     # 1. Check if there are pickles in the WikiPathways folder. If there are already pickles, use them to populate db
     pickles = get_files_in_folder(WIKIPATHWAYS_BEL)
 
     if pickles:
         log.info('You seem to already have created BEL Graphs using PathMe. The database will be populated using those')
-        import_from_pickle(manager, WIKIPATHWAYS_BEL, pickles, WIKIPATHWAYS)
+        return import_from_pickle(manager, WIKIPATHWAYS_BEL, pickles, WIKIPATHWAYS)
 
     else:
         # 2. Check if RDF files are downloaded, if not download them
@@ -219,11 +500,12 @@ def load_wikipathways(manager, hgnc_manager, folder=None, connection=None, only_
         )
 
         # 3. Parse RDF file to populate DB
-        import_from_pathme(
+        return import_from_pathme(
             manager,
             wikipathways_data_folder,
             files,
             wikipathways_to_bel,
             WIKIPATHWAYS,
+            workers=workers,
             hgnc_manager=hgnc_manager
         )
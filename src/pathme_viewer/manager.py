@@ -2,15 +2,34 @@
 
 """This module contains the PathMe database manager."""
 
+import datetime
 import logging
+from collections import Counter, defaultdict
+from copy import deepcopy
 
 from bio2bel.utils import get_connection
-from sqlalchemy import create_engine, func, and_
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import Integer, and_, cast, create_engine, distinct, func, or_
+from sqlalchemy.orm import aliased, scoped_session, sessionmaker, undefer
 from pybel import from_bytes
+from pybel_tools.summary.contradictions import relation_set_has_contradictions
 
-from .constants import MODULE_NAME
-from .models import Base, Pathway
+from .cache import LRUCache
+from .centrality import calculate_betweenness_centrality
+from .constants import (
+    CENTRALITY_CACHE_MAX_ENTRIES,
+    GRAPH_CACHE_MAX_ENTRIES,
+    GRAPH_CACHE_MAX_SIZE,
+    MERGED_GRAPH_CACHE_MAX_ENTRIES,
+    MERGED_GRAPH_CACHE_MAX_SIZE,
+    MERGED_GRAPH_CACHE_TTL,
+    MODULE_NAME,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_MAX_SIZE,
+)
+from .graph_utils import get_gene_bels, get_relation_summary
+from .models import Base, EdgeRelation, Gene, GeneSet, Node, Pathway, PathwayCentrality, hash_bel, network_node
+from .search import build_search_backend, get_search_backend
+from .storage import DEFAULT_BLOB_FORMAT, RAW, compress_blob, decompress_blob
 
 __all__ = [
     'Manager'
@@ -18,23 +37,77 @@ __all__ = [
 
 log = logging.getLogger(__name__)
 
+#: Maximum number of bound parameters used in a single ``IN`` clause (SQLite defaults to 999)
+IN_CLAUSE_CHUNK_SIZE = 500
+
+#: Keys of the pathway dictionaries written in the index tables instead of the pathway table
+INDEXED_PATHWAY_ATTRIBUTES = ('nodes', 'genes', 'centrality', 'relations')
+
+
+def _iterate_chunks(values, size=IN_CLAUSE_CHUNK_SIZE):
+    """Iterate over a list in chunks of a given size.
+
+    :param list values: values to split
+    :param int size: size of the chunks
+    :rtype: iter[list]
+    """
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
 
 class Manager(object):
     """Database manager."""
 
-    def __init__(self, engine, session):
-        """Init PathMe manager."""
+    def __init__(self, engine, session, graph_cache_max_entries=GRAPH_CACHE_MAX_ENTRIES,
+                 graph_cache_max_size=GRAPH_CACHE_MAX_SIZE, merged_graph_cache_max_entries=MERGED_GRAPH_CACHE_MAX_ENTRIES,
+                 merged_graph_cache_max_size=MERGED_GRAPH_CACHE_MAX_SIZE, merged_graph_cache_ttl=MERGED_GRAPH_CACHE_TTL,
+                 centrality_cache_max_entries=CENTRALITY_CACHE_MAX_ENTRIES,
+                 response_cache_max_entries=RESPONSE_CACHE_MAX_ENTRIES, response_cache_max_size=RESPONSE_CACHE_MAX_SIZE):
+        """Init PathMe manager.
+
+        :param engine: SQLAlchemy engine
+        :param session: SQLAlchemy session
+        :param Optional[int] graph_cache_max_entries: maximum number of decoded graphs kept in memory
+        :param Optional[int] graph_cache_max_size: maximum size (in bytes of the blobs) of the decoded graphs kept
+        :param Optional[int] merged_graph_cache_max_entries: maximum number of merged graphs kept in memory
+        :param Optional[int] merged_graph_cache_max_size: maximum size (in nodes and edges) of the merged graphs kept
+        :param Optional[float] merged_graph_cache_ttl: seconds after which a merged graph is rebuilt
+        :param Optional[int] centrality_cache_max_entries: maximum number of centrality rankings kept in memory
+        :param Optional[int] response_cache_max_entries: maximum number of responses of the graph APIs kept in memory
+        :param Optional[int] response_cache_max_size: maximum size (in bytes of the gzipped bodies) of the responses kept
+        """
         self.engine = engine
         self.session = session
+        self.graph_cache = LRUCache(max_entries=graph_cache_max_entries, max_size=graph_cache_max_size)
+        self.merged_graph_cache = LRUCache(
+            max_entries=merged_graph_cache_max_entries,
+            max_size=merged_graph_cache_max_size,
+            ttl=merged_graph_cache_ttl,
+        )
+        self.centrality_cache = LRUCache(max_entries=centrality_cache_max_entries)
+        # The path indexes are built from the merged graphs so they share their limits
+        self.path_index_cache = LRUCache(
+            max_entries=merged_graph_cache_max_entries,
+            max_size=merged_graph_cache_max_size,
+            ttl=merged_graph_cache_ttl,
+        )
+        self.response_cache = LRUCache(max_entries=response_cache_max_entries, max_size=response_cache_max_size)
         self.create_all()
+        self.search_backend = get_search_backend(self)
 
     @staticmethod
-    def from_connection(connection=None):
+    def from_connection(connection=None, **kwargs):
+        """Build a manager from a connection string.
+
+        :param Optional[str] connection: SQLAlchemy connection string. Defaults to the PathMe viewer database
+        :param kwargs: sizes of the caches of the manager (see :class:`Manager`)
+        :rtype: Manager
+        """
         connection = get_connection(MODULE_NAME, connection)
         engine = create_engine(connection)
         session_maker = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
         session = scoped_session(session_maker)
-        return Manager(engine, session)
+        return Manager(engine, session, **kwargs)
 
     def create_all(self, check_first=True):
         """Create tables for PathMe."""
@@ -42,6 +115,8 @@ class Manager(object):
 
     def drop_all(self, check_first=True):
         """Drop all tables for PathMe."""
+        self.search_backend.clear()
+        self.session.commit()
         Base.metadata.drop_all(self.engine, checkfirst=check_first)
 
     """Query methods"""
@@ -62,12 +137,56 @@ class Manager(object):
             Pathway.resource_name, func.count(Pathway.resource_name)
         ).group_by(Pathway.resource_name).all()
 
-    def get_all_pathways(self):
+    def count_pathways_from_resource(self, resource_name):
+        """Count the pathways of a given database.
+
+        :param str resource_name: name of the database
+        :rtype: int
+        """
+        return self.session.query(Pathway).filter(Pathway.resource_name == resource_name).count()
+
+    def _query_pathways(self, load_blob=False):
+        """Build a query over the pathways.
+
+        The blob column is deferred so it is only loaded, in the same round trip, if ``load_blob`` is set.
+
+        :param bool load_blob: load the pickled graphs together with the metadata
+        :rtype: sqlalchemy.orm.Query
+        """
+        query = self.session.query(Pathway)
+
+        if load_blob:
+            query = query.options(undefer('blob'))
+
+        return query
+
+    def get_all_pathways(self, load_blob=False):
         """Get all pathways in the database.
 
+        :param bool load_blob: load the pickled graphs together with the metadata
         :rtype: list[Pathway]
         """
-        return self.session.query(Pathway).all()
+        return self._query_pathways(load_blob=load_blob).all()
+
+    def iterate_pathways_with_blobs(self, resource_name=None, batch_size=100):
+        """Iterate over the pathways loading their pickled graphs in batches.
+
+        Each batch is fetched by primary key once the previous one has been consumed, so the session can be committed
+        or cleared between batches.
+
+        :param Optional[str] resource_name: name of the database. All databases if None
+        :param int batch_size: number of pathways fetched per round trip
+        :rtype: iter[Pathway]
+        """
+        query = self.session.query(Pathway.id)
+
+        if resource_name is not None:
+            query = query.filter(Pathway.resource_name == resource_name)
+
+        pathway_ids = [pathway_id for pathway_id, in query.order_by(Pathway.id)]
+
+        for chunk in _iterate_chunks(pathway_ids, size=batch_size):
+            yield from self._query_pathways(load_blob=True).filter(Pathway.id.in_(chunk)).order_by(Pathway.id).all()
 
     def get_all_pathway_graphs(self):
         """Get all pathway graphs.
@@ -75,10 +194,96 @@ class Manager(object):
         :rtype: list[pybel.BELGraph]
         """
         return [
-            from_bytes(pathway.blob)
-            for pathway in self.get_all_pathways()
+            pathway.as_bel()
+            for pathway in self.iterate_pathways_with_blobs()
         ]
 
+    def count_nodes(self):
+        """Count the distinct nodes in the database.
+
+        :rtype: int
+        """
+        return self.session.query(Node).count()
+
+    def iterate_node_bels(self, batch_size=10000):
+        """Iterate over the BEL strings of the distinct nodes in the database without decoding any pathway.
+
+        :param int batch_size: number of rows fetched at once
+        :rtype: iter[str]
+        """
+        for bel, in self.session.query(Node.bel).yield_per(batch_size):
+            yield bel
+
+    def get_pathway_graph(self, pathway, copy=True):
+        """Get the BEL graph of a pathway from the decoded graph cache, decoding it if needed.
+
+        Graphs returned with ``copy=False`` are shared with the cache and must not be modified.
+
+        :param Pathway pathway: pathway
+        :param bool copy: return a deep copy of the graph that can be safely modified
+        :rtype: pybel.BELGraph
+        """
+        key = pathway.resource_name, pathway.pathway_id, pathway.created
+
+        graph = self.graph_cache.get(key)
+
+        if graph is None:
+            data = decompress_blob(pathway.blob, pathway.blob_format)
+            graph = from_bytes(data)
+            self.graph_cache.set(key, graph, size=len(data))
+
+        return deepcopy(graph) if copy else graph
+
+    @staticmethod
+    def get_merged_graph_key(pathways):
+        """Return the canonical key of a set of pathways used by the merged graph cache.
+
+        :param dict[str,str] pathways: pathway identifier to resource name dictionary
+        :rtype: tuple[tuple[str,str]]
+        """
+        return tuple(sorted(
+            (resource_name, pathway_id)
+            for pathway_id, resource_name in pathways.items()
+        ))
+
+    def get_merged_graph(self, pathways):
+        """Get a cached merged graph.
+
+        :param dict[str,str] pathways: pathway identifier to resource name dictionary
+        :rtype: Optional[pybel.BELGraph]
+        """
+        return self.merged_graph_cache.get(self.get_merged_graph_key(pathways))
+
+    def set_merged_graph(self, pathways, graph):
+        """Cache a merged graph.
+
+        :param dict[str,str] pathways: pathway identifier to resource name dictionary
+        :param pybel.BELGraph graph: merged graph
+        """
+        self.merged_graph_cache.set(
+            self.get_merged_graph_key(pathways),
+            graph,
+            size=graph.number_of_nodes() + graph.number_of_edges(),
+        )
+
+    def _discard_cached_graphs(self, resource_name, pathway_id=None):
+        """Remove the graphs of a pathway, or of all pathways of a resource, and their results from the caches.
+
+        The decoded and merged graphs are removed with the results calculated on them.
+
+        :param str resource_name: name of the database
+        :param Optional[str] pathway_id: pathway identifier
+        """
+
+        def is_member(member):
+            return member[0] == resource_name and (pathway_id is None or member[1] == pathway_id)
+
+        self.graph_cache.discard_where(is_member)
+        self.merged_graph_cache.discard_where(lambda key: any(is_member(member) for member in key))
+        self.path_index_cache.discard_where(lambda key: any(is_member(member) for member in key))
+        self.centrality_cache.discard_where(lambda key: any(is_member(member) for member in key[0]))
+        self.response_cache.discard_where(lambda key: any(is_member(member) for member in key[2]))
+
     def get_pathway_by_id(self, pathway_id, resource_name):
         """Get pathway by canonical identifier.
 
@@ -89,6 +294,59 @@ class Manager(object):
         condition = and_(Pathway.pathway_id == pathway_id, Pathway.resource_name == resource_name)
         return self.session.query(Pathway).filter(condition).one_or_none()
 
+    def get_pathways_by_ids(self, pathways):
+        """Get several pathways by canonical identifier in a few queries.
+
+        :param dict[str,str] pathways: pathway identifier to resource name dictionary
+        :return: the pathways found, in no particular order
+        :rtype: list[Pathway]
+        """
+        rv = []
+
+        for chunk in _iterate_chunks(list(pathways)):
+            rv.extend(
+                pathway
+                for pathway in self.session.query(Pathway).filter(Pathway.pathway_id.in_(chunk))
+                if pathways[pathway.pathway_id] == pathway.resource_name
+            )
+
+        return rv
+
+    def get_pathway_versions(self, pathways):
+        """Get the version (creation timestamp) of several pathways, which changes every time a pathway is updated.
+
+        :param dict[str,str] pathways: pathway identifier to resource name dictionary
+        :return: sorted resource name, pathway identifier and version of the pathways or None if any is missing
+        :rtype: Optional[tuple[tuple[str,str,str]]]
+        """
+        rv = []
+
+        for chunk in _iterate_chunks(list(pathways)):
+            query = self.session.query(Pathway.resource_name, Pathway.pathway_id, Pathway.created).filter(
+                Pathway.pathway_id.in_(chunk)
+            )
+
+            rv.extend(
+                (resource_name, pathway_id, created.isoformat())
+                for resource_name, pathway_id, created in query
+                if pathways[pathway_id] == resource_name
+            )
+
+        if len(rv) != len(pathways):
+            return None
+
+        return tuple(sorted(rv))
+
+    def get_pathway_with_blob(self, pathway_id, resource_name):
+        """Get pathway by canonical identifier loading its pickled graph in the same query.
+
+        :param str pathway_id: pathway identifier
+        :param str resource_name: name of the database
+        :rtype: Optional[Pathway]
+        """
+        condition = and_(Pathway.pathway_id == pathway_id, Pathway.resource_name == resource_name)
+        return self._query_pathways(load_blob=True).filter(condition).one_or_none()
+
     def get_pathway_by_name(self, pathway_name, resource_name):
         """Get pathway by name.
 
@@ -99,27 +357,521 @@ class Manager(object):
         condition = and_(Pathway.name == pathway_name, Pathway.resource_name == resource_name)
         return self.session.query(Pathway).filter(condition).one_or_none()
 
-    def get_pathways_from_resource(self, resource_name):
+    def get_pathway_digests(self, resource_name):
+        """Get the digests of the source files and of the blobs of the pathways in a given database.
+
+        :param str resource_name: name of the database
+        :return: pathway identifier to the source file digest and the blob digest
+        :rtype: dict[str,tuple[Optional[str],Optional[str]]]
+        """
+        return {
+            pathway_id: (source_digest, blob_digest)
+            for pathway_id, source_digest, blob_digest in self.session.query(
+                Pathway.pathway_id, Pathway.source_digest, Pathway.blob_digest
+            ).filter(Pathway.resource_name == resource_name)
+        }
+
+    def get_pathways_from_resource(self, resource_name, load_blob=False):
         """Get pathways from a given database.
 
         :param str resource_name: name of the database
+        :param bool load_blob: load the pickled graphs together with the metadata
         :rtype: Optional[list[Pathway]]
         """
-        return self.session.query(Pathway).filter(Pathway.resource_name == resource_name).all()
+        return self._query_pathways(load_blob=load_blob).filter(Pathway.resource_name == resource_name).all()
+
+    def get_pathways_by_nodes(self, bel_nodes):
+        """Get the pathways containing any of the given nodes using the node index.
+
+        :param iter[str] bel_nodes: BEL strings of the nodes
+        :rtype: list[Pathway]
+        """
+        bel_hashes = [hash_bel(bel) for bel in set(bel_nodes)]
+
+        if not bel_hashes:
+            return []
+
+        return self.session.query(Pathway).join(Pathway.nodes).filter(Node.bel_hash.in_(bel_hashes)).distinct().all()
+
+    def _get_node_ids(self, bel_nodes, model=Node):
+        """Get the identifiers of the node entries for the given BEL strings, creating the missing ones.
+
+        :param iter[str] bel_nodes: BEL strings of the nodes
+        :param type model: model of the entries, :class:`Node` or :class:`Gene`
+        :rtype: dict[str,int]
+        """
+        hash_to_bel = {
+            hash_bel(bel): bel
+            for bel in bel_nodes
+        }
+
+        hash_to_id = {}
+        for chunk in _iterate_chunks(list(hash_to_bel)):
+            hash_to_id.update(
+                self.session.query(model.bel_hash, model.id).filter(model.bel_hash.in_(chunk)).all()
+            )
+
+        new_nodes = [
+            model(bel_hash=bel_hash, bel=bel)
+            for bel_hash, bel in hash_to_bel.items()
+            if bel_hash not in hash_to_id
+        ]
+
+        if new_nodes:
+            self.session.add_all(new_nodes)
+            self.session.flush()
+            hash_to_id.update((node.bel_hash, node.id) for node in new_nodes)
+
+        return {
+            bel: hash_to_id[bel_hash]
+            for bel_hash, bel in hash_to_bel.items()
+        }
+
+    def _index_pathway_nodes(self, pathway_to_bel_nodes):
+        """Replace the nodes indexed for the given pathways.
+
+        :param dict[Pathway,iter[str]] pathway_to_bel_nodes: pathway to the BEL strings of its nodes
+        """
+        network_ids = [pathway.id for pathway in pathway_to_bel_nodes]
+
+        for chunk in _iterate_chunks(network_ids):
+            self.session.execute(network_node.delete().where(network_node.c.network_id.in_(chunk)))
+
+        bel_to_id = self._get_node_ids({
+            bel
+            for bel_nodes in pathway_to_bel_nodes.values()
+            for bel in bel_nodes
+        })
+
+        rows = [
+            {'network_id': pathway.id, 'node_id': bel_to_id[bel]}
+            for pathway, bel_nodes in pathway_to_bel_nodes.items()
+            for bel in set(bel_nodes)
+        ]
+
+        if rows:
+            self.session.execute(network_node.insert(), rows)
+
+    def _index_pathway_genes(self, pathway_to_gene_bels):
+        """Replace the gene sets of the given pathways.
+
+        :param dict[Pathway,iter[str]] pathway_to_gene_bels: pathway to the BEL strings of its genes
+        """
+        network_ids = [pathway.id for pathway in pathway_to_gene_bels]
+
+        for chunk in _iterate_chunks(network_ids):
+            self.session.query(GeneSet).filter(GeneSet.network_id.in_(chunk)).delete(synchronize_session=False)
+
+        bel_to_id = self._get_node_ids(
+            {
+                bel
+                for gene_bels in pathway_to_gene_bels.values()
+                for bel in gene_bels
+            },
+            model=Gene,
+        )
+
+        rows = []
+        for pathway, gene_bels in pathway_to_gene_bels.items():
+            gene_ids = {bel_to_id[bel] for bel in gene_bels}
+            rows.append({'network_id': pathway.id, 'size': len(gene_ids), 'blob': GeneSet.pack_gene_ids(gene_ids)})
+
+        if rows:
+            self.session.execute(GeneSet.__table__.insert(), rows)
+
+    def get_gene_id_sets(self, pathways):
+        """Get the precomputed gene sets of pathways as sorted gene identifiers.
+
+        :param iter[Pathway] pathways: pathways
+        :return: pathway to the identifiers of its genes. Pathways without gene set are missing
+        :rtype: dict[Pathway,array.array]
+        """
+        id_to_pathway = {pathway.id: pathway for pathway in pathways}
+
+        rv = {}
+        for chunk in _iterate_chunks(list(id_to_pathway)):
+            rv.update(
+                (id_to_pathway[gene_set.network_id], gene_set.gene_ids)
+                for gene_set in self.session.query(GeneSet).filter(GeneSet.network_id.in_(chunk))
+            )
+
+        return rv
+
+    def get_gene_sets(self, pathways):
+        """Get the precomputed gene sets of pathways.
+
+        :param iter[Pathway] pathways: pathways
+        :return: pathway to the BEL strings of its genes. Pathways without gene set are missing
+        :rtype: dict[Pathway,set[str]]
+        """
+        pathway_to_gene_ids = self.get_gene_id_sets(pathways)
+
+        gene_id_to_bel = {}
+        for chunk in _iterate_chunks(sorted({
+            gene_id
+            for gene_ids in pathway_to_gene_ids.values()
+            for gene_id in gene_ids
+        })):
+            gene_id_to_bel.update(self.session.query(Gene.id, Gene.bel).filter(Gene.id.in_(chunk)))
+
+        return {
+            pathway: {gene_id_to_bel[gene_id] for gene_id in gene_ids}
+            for pathway, gene_ids in pathway_to_gene_ids.items()
+        }
+
+    def _index_pathway_centrality(self, pathway_to_centrality):
+        """Replace the precomputed betweenness centrality of the given pathways.
+
+        :param dict[Pathway,tuple[Optional[int],list[tuple[str,float]]]] pathway_to_centrality: pathway to the number
+         of pivots used (None if exact) and the BEL strings of its nodes with their scores by decreasing score
+        """
+        network_ids = [pathway.id for pathway in pathway_to_centrality]
+
+        for chunk in _iterate_chunks(network_ids):
+            self.session.query(PathwayCentrality).filter(PathwayCentrality.network_id.in_(chunk)).delete(
+                synchronize_session=False)
+
+        bel_to_id = self._get_node_ids({
+            bel
+            for _, ranking in pathway_to_centrality.values()
+            for bel, _ in ranking
+        })
+
+        rows = []
+        for pathway, (samples, ranking) in pathway_to_centrality.items():
+            row = PathwayCentrality.pack_ranking(
+                [bel_to_id[bel] for bel, _ in ranking],
+                [score for _, score in ranking],
+            )
+            row.update(network_id=pathway.id, samples=samples)
+            rows.append(row)
+
+        if rows:
+            self.session.execute(PathwayCentrality.__table__.insert(), rows)
+
+    def get_pathway_centrality(self, pathway):
+        """Get the precomputed betweenness centrality of a pathway.
+
+        :param Pathway pathway: pathway
+        :return: number of pivots used (None if exact) and the SHA-512 of the nodes with their scores by decreasing
+         score, or None if it was not precomputed
+        :rtype: Optional[tuple[Optional[int],list[tuple[str,float]]]]
+        """
+        centrality = self.session.query(PathwayCentrality).get(pathway.id)
+
+        if centrality is None:
+            return None
+
+        node_ids = centrality.node_ids
+
+        node_id_to_hash = {}
+        for chunk in _iterate_chunks(sorted(node_ids)):
+            node_id_to_hash.update(self.session.query(Node.id, Node.bel_hash).filter(Node.id.in_(chunk)))
+
+        return centrality.samples, [
+            (node_id_to_hash[node_id], score)
+            for node_id, score in zip(node_ids, centrality.scores)
+        ]
+
+    def _index_pathway_relations(self, pathway_to_relations):
+        """Replace the relations indexed for the node pairs of the given pathways.
+
+        :param dict[Pathway,dict[tuple[str,str],set[str]]] pathway_to_relations: pathway to the BEL strings of the
+         source and target nodes of its edges and their relations
+        """
+        network_ids = [pathway.id for pathway in pathway_to_relations]
+
+        for chunk in _iterate_chunks(network_ids):
+            self.session.query(EdgeRelation).filter(EdgeRelation.network_id.in_(chunk)).delete(
+                synchronize_session=False)
+
+        bel_to_id = self._get_node_ids({
+            bel
+            for pair_to_relations in pathway_to_relations.values()
+            for pair in pair_to_relations
+            for bel in pair
+        })
+
+        rows = [
+            {
+                'network_id': pathway.id,
+                'source_id': bel_to_id[source_bel],
+                'target_id': bel_to_id[target_bel],
+                'relations': EdgeRelation.join_relations(relations),
+                'contradicts': relation_set_has_contradictions(relations),
+            }
+            for pathway, pair_to_relations in pathway_to_relations.items()
+            for (source_bel, target_bel), relations in pair_to_relations.items()
+        ]
+
+        if rows:
+            self.session.execute(EdgeRelation.__table__.insert(), rows)
+
+    def _query_relations_with_hashes(self, *criteria):
+        """Query the indexed relations with the SHA-512 of their source and target nodes.
+
+        :rtype: sqlalchemy.orm.query.Query
+        """
+        source, target = aliased(Node), aliased(Node)
+
+        return self.session.query(
+            source.bel_hash, target.bel_hash, EdgeRelation.relations, EdgeRelation.network_id
+        ).join(
+            source, source.id == EdgeRelation.source_id
+        ).join(
+            target, target.id == EdgeRelation.target_id
+        ).filter(*criteria)
+
+    def get_contradictions(self, pathways):
+        """Get the node pairs with contradictory relations in the union of pathways from the relation index.
+
+        Only the pairs contradicting within a pathway and the pairs shared by several pathways are read.
+
+        :param list[Pathway] pathways: pathways
+        :return: SHA-512 of the source and target nodes and set of relations of the contradicting pairs, or None if
+         some of the pathways were not indexed
+        :rtype: Optional[list[tuple[str,str,set[str]]]]
+        """
+        network_ids = [pathway.id for pathway in pathways if pathway.number_of_edges]
+
+        if not network_ids:
+            return []
+
+        indexed = self.session.query(distinct(EdgeRelation.network_id)).filter(
+            EdgeRelation.network_id.in_(network_ids)).count()
+
+        if indexed < len(set(network_ids)):
+            return None
+
+        is_selected = EdgeRelation.network_id.in_(network_ids)
+
+        shared_pairs = self.session.query(EdgeRelation.source_id, EdgeRelation.target_id).filter(
+            is_selected
+        ).group_by(
+            EdgeRelation.source_id, EdgeRelation.target_id
+        ).having(
+            func.count() > 1
+        ).subquery()
+
+        rows = self._query_relations_with_hashes(is_selected, EdgeRelation.contradicts).union_all(
+            self._query_relations_with_hashes(is_selected).join(
+                shared_pairs,
+                and_(
+                    EdgeRelation.source_id == shared_pairs.c.source_id,
+                    EdgeRelation.target_id == shared_pairs.c.target_id,
+                )
+            )
+        )
+
+        pair_to_relations = defaultdict(set)
+        for source_hash, target_hash, relations, _ in rows:
+            pair_to_relations[source_hash, target_hash].update(EdgeRelation.split_relations(relations))
+
+        return [
+            (source_hash, target_hash, relations)
+            for (source_hash, target_hash), relations in sorted(pair_to_relations.items())
+            if relation_set_has_contradictions(relations)
+        ]
+
+    def get_contradiction_report(self):
+        """Get the node pairs with contradictory relations across all the pathways in the database.
+
+        Only the pairs contradicting within a pathway or having different relations in several pathways are read.
+
+        :return: BEL strings of the source and target nodes, their relations and the database and identifier of the
+         pathways containing them, by decreasing number of pathways
+        :rtype: list[dict]
+        """
+        candidate_pairs = self.session.query(EdgeRelation.source_id, EdgeRelation.target_id).group_by(
+            EdgeRelation.source_id, EdgeRelation.target_id
+        ).having(
+            or_(
+                func.max(cast(EdgeRelation.contradicts, Integer)) > 0,
+                func.count(distinct(EdgeRelation.relations)) > 1,
+            )
+        ).subquery()
+
+        rows = self.session.query(
+            EdgeRelation.source_id, EdgeRelation.target_id, EdgeRelation.relations, Pathway.resource_name,
+            Pathway.pathway_id,
+        ).join(
+            candidate_pairs,
+            and_(
+                EdgeRelation.source_id == candidate_pairs.c.source_id,
+                EdgeRelation.target_id == candidate_pairs.c.target_id,
+            )
+        ).join(
+            Pathway, Pathway.id == EdgeRelation.network_id
+        )
+
+        pair_to_relations = defaultdict(set)
+        pair_to_pathways = defaultdict(list)
+
+        for source_id, target_id, relations, resource_name, pathway_id in rows:
+            pair_to_relations[source_id, target_id].update(EdgeRelation.split_relations(relations))
+            pair_to_pathways[source_id, target_id].append((resource_name, pathway_id))
+
+        contradicting_pairs = [
+            pair
+            for pair, relations in pair_to_relations.items()
+            if relation_set_has_contradictions(relations)
+        ]
+
+        node_id_to_bel = {}
+        for chunk in _iterate_chunks(sorted({node_id for pair in contradicting_pairs for node_id in pair})):
+            node_id_to_bel.update(self.session.query(Node.id, Node.bel).filter(Node.id.in_(chunk)))
+
+        rv = [
+            {
+                'source': node_id_to_bel[source_id],
+                'target': node_id_to_bel[target_id],
+                'relations': sorted(pair_to_relations[source_id, target_id]),
+                'pathways': sorted(pair_to_pathways[source_id, target_id]),
+            }
+            for source_id, target_id in contradicting_pairs
+        ]
+
+        rv.sort(key=lambda entry: (-len(entry['pathways']), entry['source'], entry['target']))
+
+        return rv
 
     def create_pathway(self, pathway_dict):
         """Create pathway.
 
-        :param dict pathway_dict: pathway identifier
+        :param dict pathway_dict: pathway info. The optional "nodes", "genes", "centrality" and "relations" entries
+         contain the BEL strings to be indexed, the BEL strings of the gene set, the precomputed betweenness centrality
+         and the relations between each pair of nodes
         :rtype: Pathway
         """
+        pathway_dict = dict(pathway_dict)
+        bel_nodes = pathway_dict.pop('nodes', None)
+        gene_bels = pathway_dict.pop('genes', None)
+        centrality = pathway_dict.pop('centrality', None)
+        relations = pathway_dict.pop('relations', None)
+
         pathway = Pathway(**pathway_dict)
 
         self.session.add(pathway)
+        self.session.flush()
+        self._discard_cached_graphs(pathway.resource_name, pathway.pathway_id)
+
+        if bel_nodes:
+            self._index_pathway_nodes({pathway: bel_nodes})
+
+        if gene_bels is not None:
+            self._index_pathway_genes({pathway: gene_bels})
+
+        if centrality is not None:
+            self._index_pathway_centrality({pathway: centrality})
+
+        if relations is not None:
+            self._index_pathway_relations({pathway: relations})
+
+        self.search_backend.add([pathway])
+
         self.session.commit()
 
         return pathway
 
+    def reindex_pathway(self, pathway):
+        """Rebuild the node index, the gene set, the betweenness centrality and the relations of a pathway.
+
+        They are all calculated from the BEL graph of the pathway.
+
+        :param Pathway pathway: pathway
+        """
+        graph = pathway.as_bel()
+
+        self._index_pathway_nodes({pathway: {node.as_bel() for node in graph}})
+        self._index_pathway_centrality({pathway: calculate_betweenness_centrality(graph)})
+        self._index_pathway_relations({pathway: get_relation_summary(graph)})
+        # Last since the graph is collapsed in place
+        self._index_pathway_genes({pathway: get_gene_bels(graph)})
+
+    def build_search_index(self):
+        """Create or rebuild the pathway name search index of the database and use it for the next searches."""
+        self.search_backend = build_search_backend(self)
+
+    def reindex(self, batch_size=100):
+        """Rebuild the node index and the precomputed data of all pathways in the database, committing once per batch.
+
+        The pathway name search index is rebuilt afterwards.
+
+        :param int batch_size: number of pathways loaded per round trip and indexed per transaction
+        :return: number of pathways indexed
+        :rtype: int
+        """
+        number_of_pathways = 0
+
+        for pathway in self.iterate_pathways_with_blobs(batch_size=batch_size):
+            self.reindex_pathway(pathway)
+            number_of_pathways += 1
+
+            if not number_of_pathways % batch_size:
+                self.session.commit()
+                # Do not keep the blobs of the indexed pathways in memory
+                self.session.expunge_all()
+
+        self._delete_orphan_nodes()
+        self.session.commit()
+        self.session.expunge_all()
+
+        self.build_search_index()
+
+        return number_of_pathways
+
+    def recompress_pathways(self, blob_format=DEFAULT_BLOB_FORMAT, batch_size=100):
+        """Rewrite in place the blobs of the pathways stored with a different format, committing once per batch.
+
+        The pickled graphs do not change so neither their digests nor their timestamps are updated.
+
+        :param str blob_format: target blob format
+        :param int batch_size: number of pathways rewritten per transaction
+        :return: number of pathways recompressed and already in the format, and the sizes of the blobs before and
+         after recompression
+        :rtype: collections.Counter
+        """
+        # Fail before touching the database if the format is not available
+        compress_blob(b'', blob_format=blob_format)
+
+        counter = Counter()
+        pathway_ids = []
+
+        for pathway_id, pathway_blob_format in self.session.query(Pathway.id, Pathway.blob_format):
+            if (pathway_blob_format or RAW) == blob_format:
+                counter['unchanged'] += 1
+            else:
+                pathway_ids.append(pathway_id)
+
+        for chunk in _iterate_chunks(pathway_ids, size=batch_size):
+            for pathway in self._query_pathways(load_blob=True).filter(Pathway.id.in_(chunk)):
+                blob = compress_blob(decompress_blob(pathway.blob, pathway.blob_format), blob_format=blob_format)
+
+                counter['size_before'] += len(pathway.blob)
+                counter['size_after'] += len(blob)
+                counter['recompressed'] += 1
+
+                pathway.blob = blob
+                pathway.blob_format = blob_format
+
+            self.session.commit()
+
+        return counter
+
+    def _delete_orphan_nodes(self):
+        """Delete the nodes that are not present in any pathway."""
+        self.session.query(Node).filter(~Node.pathways.any()).delete(synchronize_session=False)
+
+    def _delete_pathway_entries(self, network_ids):
+        """Delete the node index entries, the gene sets, the centrality and the relations of the given pathways.
+
+        :param network_ids: primary keys of the pathways, as a list or a subquery
+        """
+        self.session.execute(network_node.delete().where(network_node.c.network_id.in_(network_ids)))
+
+        for model in (GeneSet, PathwayCentrality, EdgeRelation):
+            self.session.query(model).filter(model.network_id.in_(network_ids)).delete(synchronize_session=False)
+
     def delete_pathway(self, pathway_id, resource_name):
         """Delete a pathway.
 
@@ -130,16 +882,64 @@ class Manager(object):
         pathway = self.get_pathway_by_id(pathway_id, resource_name)
 
         if pathway:
+            self._delete_pathway_entries([pathway.id])
             self.session.delete(pathway)
+            self.search_backend.remove([pathway.id])
+            self._delete_orphan_nodes()
             self.session.commit()
+            self._discard_cached_graphs(resource_name, pathway_id)
             return True
 
         return False
 
+    def delete_pathways(self, resource_name, pathway_ids):
+        """Delete several pathways from a given database in a single transaction.
+
+        :param str resource_name: name of the database
+        :param iter[str] pathway_ids: pathway identifiers
+        :return: number of pathways deleted
+        :rtype: int
+        """
+        network_ids = []
+
+        for chunk in _iterate_chunks(list(pathway_ids)):
+            network_ids.extend(
+                network_id
+                for network_id, in self.session.query(Pathway.id).filter(
+                    Pathway.resource_name == resource_name,
+                    Pathway.pathway_id.in_(chunk)
+                )
+            )
+
+        for chunk in _iterate_chunks(network_ids):
+            self._delete_pathway_entries(chunk)
+            self.session.query(Pathway).filter(Pathway.id.in_(chunk)).delete(synchronize_session=False)
+
+        self.search_backend.remove(network_ids)
+        self._delete_orphan_nodes()
+        self.session.commit()
+
+        for pathway_id in pathway_ids:
+            self._discard_cached_graphs(resource_name, pathway_id)
+
+        return len(network_ids)
+
     def delete_all_pathways(self):
         """Delete all the pathways."""
+        self.session.execute(network_node.delete())
+        self.session.query(Node).delete()
+        self.session.query(GeneSet).delete()
+        self.session.query(Gene).delete()
+        self.session.query(PathwayCentrality).delete()
+        self.session.query(EdgeRelation).delete()
         self.session.query(Pathway).delete()
+        self.search_backend.clear()
         self.session.commit()
+        self.graph_cache.clear()
+        self.merged_graph_cache.clear()
+        self.path_index_cache.clear()
+        self.centrality_cache.clear()
+        self.response_cache.clear()
 
     def delete_pathways_from_resource(self, resource_name):
         """Delete pathways from a given database.
@@ -152,8 +952,14 @@ class Manager(object):
         if not pathways_in_resource:
             return False
 
+        network_ids = self.session.query(Pathway.id).filter(Pathway.resource_name == resource_name)
+        self._delete_pathway_entries(network_ids.subquery())
+
         pathways_in_resource.delete()
+        self.search_backend.remove_resource(resource_name)
+        self._delete_orphan_nodes()
         self.session.commit()
+        self._discard_cached_graphs(resource_name)
 
         return True
 
@@ -170,6 +976,144 @@ class Manager(object):
 
         return pathway
 
+    def bulk_upsert_pathways(self, pathway_dicts, batch_size=500, update_existing=False):
+        """Create pathways in batches, committing once per batch.
+
+        The keys of the pathways already in the database are fetched once so no lookup is made per pathway. When
+        updating, pathways whose blob digest did not change are only updated with their new source digest.
+
+        :param iter[dict] pathway_dicts: pathway info, as in :meth:`create_pathway`
+        :param int batch_size: number of pathways written per transaction
+        :param bool update_existing: update the pathways already in the database instead of skipping them
+        :return: number of pathways created, updated, unchanged and skipped
+        :rtype: collections.Counter
+        """
+        existing = {
+            (resource_name, pathway_id): (network_id, blob_digest)
+            for resource_name, pathway_id, network_id, blob_digest in self.session.query(
+                Pathway.resource_name, Pathway.pathway_id, Pathway.id, Pathway.blob_digest
+            )
+        }
+
+        counter = Counter()
+        batch = []
+
+        for pathway_dict in pathway_dicts:
+            batch.append(pathway_dict)
+
+            if len(batch) >= batch_size:
+                counter.update(self._write_pathway_batch(batch, existing, update_existing))
+                batch = []
+
+        if batch:
+            counter.update(self._write_pathway_batch(batch, existing, update_existing))
+
+        return counter
+
+    def _write_pathway_batch(self, pathway_dicts, existing, update_existing):
+        """Write a batch of pathways in a single transaction.
+
+        :param list[dict] pathway_dicts: pathway info
+        :param dict[tuple[str,str],tuple[int,Optional[str]]] existing: keys of the pathways in the database to their
+         primary keys and blob digests (updated in place)
+        :param bool update_existing: update the pathways already in the database instead of skipping them
+        :rtype: collections.Counter
+        """
+        counter = Counter()
+        key_to_pathway = {}
+        # Indexed attribute to the pathways and their rows
+        index_rows = {
+            attribute: {}
+            for attribute in INDEXED_PATHWAY_ATTRIBUTES
+        }
+
+        for pathway_dict in pathway_dicts:
+            pathway_dict = dict(pathway_dict)
+            rows = {
+                attribute: pathway_dict.pop(attribute, None)
+                for attribute in INDEXED_PATHWAY_ATTRIBUTES
+            }
+            key = pathway_dict['resource_name'], pathway_dict['pathway_id']
+
+            pathway, status = self._upsert_pathway(pathway_dict, key, key_to_pathway, existing, update_existing)
+            counter[status] += 1
+
+            if pathway is None:
+                continue
+
+            key_to_pathway[key] = pathway
+            self._discard_cached_graphs(*key)
+
+            for attribute, value in rows.items():
+                if value is not None:
+                    index_rows[attribute][pathway] = value
+
+        self.session.flush()
+
+        for key, pathway in key_to_pathway.items():
+            existing[key] = pathway.id, pathway.blob_digest
+
+        self._write_index_rows(index_rows)
+
+        self.search_backend.add(key_to_pathway.values())
+
+        self.session.commit()
+
+        return counter
+
+    def _upsert_pathway(self, pathway_dict, key, key_to_pathway, existing, update_existing):
+        """Create a pathway or update the pathway with the same key.
+
+        :param dict pathway_dict: pathway info without the indexed attributes
+        :param tuple[str,str] key: resource name and identifier of the pathway
+        :param dict[tuple[str,str],Pathway] key_to_pathway: pathways already written in this batch
+        :param dict[tuple[str,str],tuple[int,Optional[str]]] existing: keys of the pathways in the database to their
+         primary keys and blob digests
+        :param bool update_existing: update the pathway if it already exists instead of skipping it
+        :return: the pathway whose graph was written (None if it was skipped or did not change) and what was done
+         ("created", "updated", "unchanged" or "skipped")
+        :rtype: tuple[Optional[Pathway],str]
+        """
+        if key not in key_to_pathway and key not in existing:
+            pathway = Pathway(**pathway_dict)
+            self.session.add(pathway)
+            return pathway, 'created'
+
+        if not update_existing:
+            return None, 'skipped'
+
+        pathway = key_to_pathway.get(key) or self.session.query(Pathway).get(existing[key][0])
+
+        blob_digest = pathway_dict.get('blob_digest')
+
+        if blob_digest is not None and blob_digest == existing.get(key, (None, None))[1]:
+            pathway.source_digest = pathway_dict.get('source_digest')
+            return None, 'unchanged'
+
+        for attribute, value in pathway_dict.items():
+            setattr(pathway, attribute, value)
+
+        # A new timestamp identifies the new version of the graph in the caches
+        pathway.created = datetime.datetime.utcnow()
+
+        return pathway, 'updated'
+
+    def _write_index_rows(self, index_rows):
+        """Write the nodes, genes, centrality and relations of the pathways of a batch in their tables.
+
+        :param dict[str,dict[Pathway,object]] index_rows: indexed attribute to the pathways and their rows
+        """
+        indexers = (
+            ('nodes', self._index_pathway_nodes),
+            ('genes', self._index_pathway_genes),
+            ('centrality', self._index_pathway_centrality),
+            ('relations', self._index_pathway_relations),
+        )
+
+        for attribute, index in indexers:
+            if index_rows[attribute]:
+                index(index_rows[attribute])
+
     def query_pathway_by_name(self, query, limit=None):
         """Return all pathways having the query in their names.
 
@@ -199,3 +1143,13 @@ class Manager(object):
             q = q.limit(limit)
 
         return q.all()
+
+    def search_pathways(self, query, resource_name=None, limit=None):
+        """Return the pathways whose names match the query using the search backend, best matches first.
+
+        :param str query: query string
+        :param Optional[str] resource_name: database name
+        :param Optional[int] limit: limit result query
+        :rtype: list[Pathway]
+        """
+        return self.search_backend.search(query, resource_name=resource_name, limit=limit)
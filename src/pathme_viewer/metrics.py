@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+
+"""This module contains the timing instrumentation of the requests.
+
+The phases of a request (database queries, decoding, merging, serialization...) are timed with :func:`span` while a
+:class:`PhaseTimer` is active in the current thread, so the instrumented functions cost almost nothing when they are
+called outside of a request (e.g., from the command line or in background jobs). The durations are aggregated in
+latency histograms rendered in the Prometheus text format.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+__all__ = [
+    'BUCKETS',
+    'PhaseTimer',
+    'start_timer',
+    'stop_timer',
+    'span',
+    'Histogram',
+    'MetricsRegistry',
+]
+
+#: Upper bounds (in seconds) of the buckets of the latency histograms
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+#: Timer of the request handled by the current thread
+_local = threading.local()
+
+
+class PhaseTimer(object):
+    """Durations of the phases of a request."""
+
+    def __init__(self):
+        """Init the timer, starting the clock of the request."""
+        self.start = time.perf_counter()
+        #: Phase to its total duration in seconds, in order of first occurrence
+        self.phases = OrderedDict()
+
+    @property
+    def elapsed(self):
+        """Return the number of seconds since the timer started.
+
+        :rtype: float
+        """
+        return time.perf_counter() - self.start
+
+    def add(self, phase, seconds):
+        """Add the duration of a phase. Phases occurring several times are summed.
+
+        :param str phase: name of the phase
+        :param float seconds: duration
+        """
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def get_server_timing(self, total=None):
+        """Return the value of the Server-Timing header with the durations of the phases in milliseconds.
+
+        :param Optional[float] total: duration of the request in seconds. Defaults to the time elapsed
+        :rtype: str
+        """
+        metrics = [
+            '{};dur={:.1f}'.format(phase, seconds * 1000)
+            for phase, seconds in self.phases.items()
+        ]
+        metrics.append('total;dur={:.1f}'.format((self.elapsed if total is None else total) * 1000))
+        return ', '.join(metrics)
+
+
+def start_timer():
+    """Start timing the phases of a request in the current thread.
+
+    :rtype: PhaseTimer
+    """
+    timer = _local.timer = PhaseTimer()
+    return timer
+
+
+def stop_timer():
+    """Stop timing the phases of the request handled by the current thread.
+
+    :return: the timer of the request, if any
+    :rtype: Optional[PhaseTimer]
+    """
+    timer = getattr(_local, 'timer', None)
+    _local.timer = None
+    return timer
+
+
+@contextmanager
+def span(phase):
+    """Time a phase of the request handled by the current thread. Does nothing outside of a request.
+
+    :param str phase: name of the phase
+    """
+    timer = getattr(_local, 'timer', None)
+
+    if timer is None:
+        yield
+        return
+
+    t = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        timer.add(phase, time.perf_counter() - t)
+
+
+class Histogram(object):
+    """Cumulative histogram of durations."""
+
+    def __init__(self, buckets=BUCKETS):
+        """Init the histogram.
+
+        :param tuple[float] buckets: increasing upper bounds of the buckets, without the infinite one
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """Add a duration.
+
+        :param float value: duration in seconds
+        """
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+
+        self.sum += value
+        self.count += 1
+
+    def iterate_cumulative_counts(self):
+        """Iterate over the upper bounds of the buckets and the number of durations lower or equal to them.
+
+        :rtype: iter[tuple[str,int]]
+        """
+        total = 0
+
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield ('+Inf' if bound == float('inf') else repr(bound)), total
+
+
+def _format_labels(labels):
+    """Format the labels of a sample in the Prometheus text format.
+
+    :param iter[tuple[str,str]] labels: names and values of the labels
+    :rtype: str
+    """
+    return '{' + ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    ) + '}'
+
+
+class MetricsRegistry(object):
+    """Thread-safe latency histograms of the requests and of their phases by endpoint."""
+
+    def __init__(self, buckets=BUCKETS):
+        """Init the registry.
+
+        :param tuple[float] buckets: increasing upper bounds of the buckets of the histograms
+        """
+        self.buckets = buckets
+
+        #: Endpoint to the histogram of the latencies of its requests
+        self.requests = {}
+        #: Endpoint and phase to the histogram of the durations of the phase
+        self.phases = {}
+        #: Endpoint and status code to the number of requests
+        self.responses = {}
+
+        self._lock = threading.Lock()
+
+    def observe_request(self, endpoint, status, seconds, phases=None):
+        """Add a request.
+
+        :param str endpoint: name of the endpoint
+        :param int status: status code of the response
+        :param float seconds: duration of the request
+        :param Optional[dict[str,float]] phases: durations of the phases of the request
+        """
+        with self._lock:
+            self._get_histogram(self.requests, endpoint).observe(seconds)
+
+            for phase, phase_seconds in (phases or {}).items():
+                self._get_histogram(self.phases, (endpoint, phase)).observe(phase_seconds)
+
+            key = endpoint, status
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def _get_histogram(self, histograms, key):
+        histogram = histograms.get(key)
+
+        if histogram is None:
+            histogram = histograms[key] = Histogram(self.buckets)
+
+        return histogram
+
+    def iterate_prometheus_lines(self, caches=None):
+        """Iterate over the lines of the metrics in the Prometheus text format.
+
+        :param Optional[dict[str,pathme_viewer.cache.LRUCache]] caches: caches whose statistics are reported by name
+        :rtype: iter[str]
+        """
+        with self._lock:
+            yield '# HELP pathme_requests_total Number of requests by endpoint and status code'
+            yield '# TYPE pathme_requests_total counter'
+            for (endpoint, status), count in sorted(self.responses.items()):
+                yield 'pathme_requests_total{} {}'.format(
+                    _format_labels([('endpoint', endpoint), ('status', status)]), count
+                )
+
+            yield '# HELP pathme_request_duration_seconds Latency of the requests by endpoint'
+            yield '# TYPE pathme_request_duration_seconds histogram'
+            for endpoint, histogram in sorted(self.requests.items()):
+                yield from self._iterate_histogram_lines(
+                    'pathme_request_duration_seconds', [('endpoint', endpoint)], histogram
+                )
+
+            yield '# HELP pathme_phase_duration_seconds Duration of the phases of the requests by endpoint'
+            yield '# TYPE pathme_phase_duration_seconds histogram'
+            for (endpoint, phase), histogram in sorted(self.phases.items()):
+                yield from self._iterate_histogram_lines(
+                    'pathme_phase_duration_seconds', [('endpoint', endpoint), ('phase', phase)], histogram
+                )
+
+        if not caches:
+            return
+
+        cache_metrics = (
+            ('hits', 'counter', 'Number of lookups found in the cache'),
+            ('misses', 'counter', 'Number of lookups not found in the cache'),
+            ('evictions', 'counter', 'Number of entries evicted from the cache'),
+            ('entries', 'gauge', 'Number of entries in the cache'),
+            ('size', 'gauge', 'Total size of the entries in the cache'),
+        )
+
+        for attribute, metric_type, description in cache_metrics:
+            name = 'pathme_cache_{}{}'.format(attribute, '_total' if metric_type == 'counter' else '')
+
+            yield '# HELP {} {}'.format(name, description)
+            yield '# TYPE {} {}'.format(name, metric_type)
+
+            for cache_name, cache in sorted(caches.items()):
+                value = len(cache) if attribute == 'entries' else getattr(cache, attribute)
+                yield '{}{} {}'.format(name, _format_labels([('cache', cache_name)]), value)
+
+    @staticmethod
+    def _iterate_histogram_lines(name, labels, histogram):
+        for bound, count in histogram.iterate_cumulative_counts():
+            yield '{}_bucket{} {}'.format(name, _format_labels(labels + [('le', bound)]), count)
+
+        yield '{}_sum{} {!r}'.format(name, _format_labels(labels), histogram.sum)
+        yield '{}_count{} {}'.format(name, _format_labels(labels), histogram.count)
@@ -3,13 +3,17 @@
 """PathMe models."""
 
 import datetime
+import hashlib
+import sys
+from array import array
 
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Table
 from sqlalchemy import LargeBinary, Text
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import deferred, relationship
 
-from pybel import from_bytes
 from .constants import MODULE_NAME, DATABASE_STYLE_DICT
+from .storage import decode_graph
 
 LONGBLOB = 4294967295
 
@@ -18,6 +22,197 @@ Base = declarative_base()
 TABLE_PREFIX = MODULE_NAME
 
 NETWORK_TABLE_NAME = 'pathme_network'
+NODE_TABLE_NAME = 'pathme_node'
+NETWORK_NODE_TABLE_NAME = 'pathme_network_node'
+GENE_TABLE_NAME = 'pathme_gene'
+GENE_SET_TABLE_NAME = 'pathme_gene_set'
+CENTRALITY_TABLE_NAME = 'pathme_centrality'
+EDGE_RELATION_TABLE_NAME = 'pathme_edge_relation'
+
+
+def hash_bel(bel):
+    """Hash a BEL string to the fixed length key used to index nodes.
+
+    :param str bel: BEL string of a node
+    :rtype: str
+    """
+    return hashlib.sha512(bel.encode('utf-8')).hexdigest()
+
+
+def _pack_array(typecode, values):
+    """Serialize numbers as a little-endian array.
+
+    :param str typecode: type code of :class:`array.array`
+    :param iter values: numbers
+    :rtype: bytes
+    """
+    rv = array(typecode, values)
+
+    if sys.byteorder == 'big':
+        rv.byteswap()
+
+    return rv.tobytes()
+
+
+def _unpack_array(typecode, blob):
+    """Deserialize a little-endian array.
+
+    :param str typecode: type code of :class:`array.array`
+    :param bytes blob: serialized array
+    :rtype: array.array
+    """
+    rv = array(typecode)
+    rv.frombytes(blob)
+
+    if sys.byteorder == 'big':
+        rv.byteswap()
+
+    return rv
+
+
+network_node = Table(
+    NETWORK_NODE_TABLE_NAME,
+    Base.metadata,
+    Column('network_id', Integer, ForeignKey('{}.id'.format(NETWORK_TABLE_NAME)), primary_key=True),
+    Column('node_id', Integer, ForeignKey('{}.id'.format(NODE_TABLE_NAME)), primary_key=True, index=True),
+)
+
+
+class Node(Base):
+    """Represents a distinct BEL node present in at least one pathway."""
+    __tablename__ = NODE_TABLE_NAME
+
+    id = Column(Integer, primary_key=True)
+
+    bel_hash = Column(String(128), nullable=False, unique=True, index=True, doc='SHA-512 of the BEL string')
+    bel = Column(Text, nullable=False, doc='BEL string of the node')
+
+    def __str__(self):
+        """Return BEL string."""
+        return self.bel
+
+
+class Gene(Base):
+    """Represents a distinct BEL node of a gene set.
+
+    Genes are only referenced by the gene sets so, unlike nodes, they are kept when their pathways are deleted.
+    """
+    __tablename__ = GENE_TABLE_NAME
+
+    id = Column(Integer, primary_key=True)
+
+    bel_hash = Column(String(128), nullable=False, unique=True, index=True, doc='SHA-512 of the BEL string')
+    bel = Column(Text, nullable=False, doc='BEL string of the gene')
+
+    def __str__(self):
+        """Return BEL string."""
+        return self.bel
+
+
+class GeneSet(Base):
+    """Represents the nodes of a pathway after collapsing it to genes, precomputed to calculate overlaps."""
+    __tablename__ = GENE_SET_TABLE_NAME
+
+    network_id = Column(Integer, ForeignKey('{}.id'.format(NETWORK_TABLE_NAME)), primary_key=True)
+
+    size = Column(Integer, nullable=False, doc='Number of genes')
+    blob = Column(LargeBinary, nullable=False, doc='Sorted identifiers of the genes as little-endian 32-bit integers')
+
+    @staticmethod
+    def pack_gene_ids(gene_ids):
+        """Serialize gene identifiers.
+
+        :param iter[int] gene_ids: identifiers of the genes
+        :rtype: bytes
+        """
+        return _pack_array('I', sorted(gene_ids))
+
+    @property
+    def gene_ids(self):
+        """Return the sorted identifiers of the genes.
+
+        :rtype: array.array
+        """
+        return _unpack_array('I', self.blob)
+
+
+class EdgeRelation(Base):
+    """Represents the relations of the edges between a pair of nodes of a pathway, precomputed to find contradictions.
+
+    Contradictions within a pathway never change so only the pairs shared by several pathways need to be checked when
+    they are merged.
+    """
+    __tablename__ = EDGE_RELATION_TABLE_NAME
+
+    network_id = Column(Integer, ForeignKey('{}.id'.format(NETWORK_TABLE_NAME)), primary_key=True)
+    source_id = Column(Integer, ForeignKey('{}.id'.format(NODE_TABLE_NAME)), primary_key=True)
+    target_id = Column(Integer, ForeignKey('{}.id'.format(NODE_TABLE_NAME)), primary_key=True)
+
+    relations = Column(String(255), nullable=False, doc='Sorted relations of the edges separated by commas')
+    contradicts = Column(Boolean, nullable=False, doc='Whether the relations contradict each other')
+
+    __table_args__ = (
+        Index('ix_{}_pair'.format(EDGE_RELATION_TABLE_NAME), 'source_id', 'target_id'),
+    )
+
+    @staticmethod
+    def join_relations(relations):
+        """Serialize a set of relations.
+
+        :param iter[str] relations: relations
+        :rtype: str
+        """
+        return ','.join(sorted(relations))
+
+    @staticmethod
+    def split_relations(relations):
+        """Deserialize a set of relations.
+
+        :param str relations: serialized relations
+        :rtype: set[str]
+        """
+        return set(relations.split(','))
+
+
+class PathwayCentrality(Base):
+    """Represents the betweenness centrality of the nodes of a pathway, precomputed when it is loaded."""
+    __tablename__ = CENTRALITY_TABLE_NAME
+
+    network_id = Column(Integer, ForeignKey('{}.id'.format(NETWORK_TABLE_NAME)), primary_key=True)
+
+    samples = Column(Integer, nullable=True, doc='Number of pivots sampled to approximate the scores. Exact if null')
+    node_blob = Column(LargeBinary, nullable=False, doc='Identifiers of the nodes by decreasing score')
+    score_blob = Column(LargeBinary, nullable=False, doc='Scores of the nodes as 32-bit floats')
+
+    @staticmethod
+    def pack_ranking(node_ids, scores):
+        """Serialize the nodes and their scores.
+
+        :param list[int] node_ids: identifiers of the nodes by decreasing score
+        :param list[float] scores: scores of the nodes
+        :return: values of the blob columns
+        :rtype: dict[str,bytes]
+        """
+        return {
+            'node_blob': _pack_array('I', node_ids),
+            'score_blob': _pack_array('f', scores),
+        }
+
+    @property
+    def node_ids(self):
+        """Return the identifiers of the nodes by decreasing score.
+
+        :rtype: array.array
+        """
+        return _unpack_array('I', self.node_blob)
+
+    @property
+    def scores(self):
+        """Return the scores of the nodes.
+
+        :rtype: array.array
+        """
+        return _unpack_array('f', self.score_blob)
 
 
 class Pathway(Base):
@@ -40,7 +235,15 @@ class Pathway(Base):
 
     pybel_version = Column(String(16), nullable=False, doc='Version of PyBEL')
     created = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
-    blob = Column(LargeBinary(LONGBLOB), doc='A pickled version of this pathway')
+    # Deferred so that listing and counting pathways does not transfer the pickles. Use
+    # :meth:`pathme_viewer.manager.Manager.get_pathway_with_blob` to load them with the pathway
+    blob = deferred(Column(LargeBinary(LONGBLOB), doc='A pickled version of this pathway'))
+    blob_format = Column(String(16), nullable=True, doc='Codec used to compress the blob. Raw pickle if null')
+
+    source_digest = Column(String(64), nullable=True, doc='SHA-256 of the file the pathway was loaded from')
+    blob_digest = Column(String(64), nullable=True, doc='SHA-256 of the uncompressed pickled pathway')
+
+    nodes = relationship(Node, secondary=network_node, lazy='dynamic', backref='pathways')
 
     def __str__(self):
         """Return pathway name."""
@@ -67,4 +270,4 @@ class Pathway(Base):
 
         :rtype: pybel.BELGraph
         """
-        return from_bytes(self.blob)
+        return decode_graph(self.blob, self.blob_format)
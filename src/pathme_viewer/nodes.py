@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+"""This module contains the in-memory store of the BEL nodes used by the web application."""
+
+import logging
+import threading
+import time
+from array import array
+from collections import defaultdict
+
+__all__ = [
+    'SuggestionIndex',
+    'NodeStore',
+]
+
+log = logging.getLogger(__name__)
+
+
+class SuggestionIndex(object):
+    """Substring index over BEL strings based on unigram/bigram/trigram posting lists.
+
+    Strings are numbered by increasing length so the posting lists, which are sorted by number, enumerate the matches
+    from the shortest to the longest one. A query only scans the posting list of its rarest n-gram.
+    """
+
+    def __init__(self, strings):
+        """Build the index.
+
+        :param iter[str] strings: strings to be indexed
+        """
+        self.strings = tuple(sorted(set(strings), key=lambda string: (len(string), string)))
+        self.lowered = tuple(string.lower() for string in self.strings)
+
+        postings = defaultdict(list)
+
+        for i, text in enumerate(self.lowered):
+            grams = set(text)
+            grams.update(text[j:j + 2] for j in range(len(text) - 1))
+            grams.update(text[j:j + 3] for j in range(len(text) - 2))
+
+            for gram in grams:
+                postings[gram].append(i)
+
+        self._postings = {
+            gram: array('I', ids)
+            for gram, ids in postings.items()
+        }
+
+    def __len__(self):
+        """Return the number of indexed strings."""
+        return len(self.strings)
+
+    def _get_candidates(self, query):
+        """Return the identifiers of the strings that might contain the query, sorted by length.
+
+        :param str query: lower-cased query
+        :rtype: iter[int]
+        """
+        n = min(len(query), 3)
+        grams = {query[j:j + n] for j in range(len(query) - n + 1)}
+
+        try:
+            return min((self._postings[gram] for gram in grams), key=len)
+        except KeyError:  # one of the n-grams is not in any string
+            return ()
+
+    def search(self, query, limit=10):
+        """Return the strings containing the query, ranking prefix matches first and then shorter strings.
+
+        :param str query: query string (case insensitive)
+        :param int limit: maximum number of results
+        :rtype: list[str]
+        :raises ValueError: if the limit is not positive
+        """
+        if limit < 1:
+            raise ValueError('Invalid limit: {}'.format(limit))
+
+        query = query.lower()
+
+        prefix_matches = []
+        other_matches = []
+
+        for i in self._get_candidates(query):
+            text = self.lowered[i]
+
+            if text.startswith(query):
+                prefix_matches.append(i)
+
+                # Candidates come in length order so no later match can be ranked higher
+                if len(prefix_matches) == limit:
+                    break
+
+            elif query in text and len(other_matches) < limit:
+                other_matches.append(i)
+
+        return [
+            self.strings[i]
+            for i in (prefix_matches + other_matches)[:limit]
+        ]
+
+
+class NodeStore(object):
+    """Lazily loaded collection of the distinct BEL strings of the nodes in the database.
+
+    The nodes are streamed from the node table the first time they are needed, so building the web application does
+    not require to decode any pathway.
+    """
+
+    def __init__(self, manager):
+        """Init the node store.
+
+        :param pathme_viewer.manager.Manager manager: PathMe manager
+        """
+        self.manager = manager
+
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self):
+        """Return if the nodes have already been loaded.
+
+        :rtype: bool
+        """
+        return self._index is not None
+
+    @property
+    def index(self):
+        """Return the suggestion index of the nodes, loading them on first access.
+
+        :rtype: SuggestionIndex
+        """
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._load()
+
+        return self._index
+
+    @property
+    def bels(self):
+        """Return the BEL strings of the nodes, loading them on first access.
+
+        :rtype: tuple[str]
+        """
+        return self.index.strings
+
+    def suggest(self, query, limit=10):
+        """Return the BEL strings of the nodes containing the query.
+
+        :param str query: query string (case insensitive)
+        :param int limit: maximum number of results
+        :rtype: list[str]
+        """
+        return self.index.search(query, limit=limit)
+
+    def reset(self):
+        """Forget the loaded nodes so they are loaded again on next access."""
+        with self._lock:
+            self._index = None
+
+    def _load(self):
+        t = time.time()
+
+        index = SuggestionIndex(self.manager.iterate_node_bels())
+
+        log.info('Indexed %d nodes in %.2f seconds', len(index), time.time() - t)
+
+        return index
+
+    def __len__(self):
+        """Return the number of nodes."""
+        return len(self.bels)
+
+    def __iter__(self):
+        """Iterate over the BEL strings of the nodes."""
+        return iter(self.bels)
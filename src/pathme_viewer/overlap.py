@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+
+"""This module contains the calculation of the gene set overlaps between all pairs of a selection of pathways.
+
+The gene sets are stacked in a sparse pathway x gene incidence matrix ``A`` so the sizes of the intersections of all
+pairs are the entries of ``A A^T``. The product is calculated by blocks of rows to bound the memory used and the result
+is cached on disk, keyed by the content of the gene sets. The cache keeps a bounded number of the most recently used
+matrices.
+"""
+
+import hashlib
+import logging
+import os
+import time
+
+import numpy as np
+from scipy import sparse
+
+from .constants import INTERSECTION, JACCARD, OVERLAP_CACHE_DIR, OVERLAP_CACHE_MAX_FILES, OVERLAP_CHUNK_SIZE
+
+__all__ = [
+    'JACCARD',
+    'INTERSECTION',
+    'OverlapMatrix',
+    'build_incidence_matrix',
+    'get_overlap_matrix',
+]
+
+log = logging.getLogger(__name__)
+
+
+def build_incidence_matrix(gene_id_sets):
+    """Build the sparse pathway x gene incidence matrix.
+
+    The columns only cover the genes present in at least one of the gene sets.
+
+    :param list[array.array] gene_id_sets: identifiers of the genes of each pathway
+    :rtype: scipy.sparse.csr_matrix
+    """
+    lengths = np.array([len(gene_ids) for gene_ids in gene_id_sets], dtype=np.int64)
+
+    indptr = np.zeros(len(gene_id_sets) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+
+    if indptr[-1]:
+        gene_ids = np.concatenate([np.frombuffer(gene_ids, dtype=np.uint32) for gene_ids in gene_id_sets if gene_ids])
+        _, indices = np.unique(gene_ids, return_inverse=True)
+        number_of_genes = indices.max() + 1
+    else:
+        indices = np.zeros(0, dtype=np.int64)
+        number_of_genes = 0
+
+    return sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.int32), indices, indptr),
+        shape=(len(gene_id_sets), number_of_genes),
+    )
+
+
+class OverlapMatrix(object):
+    """Sizes of the gene set intersections between all pairs of a list of pathways."""
+
+    def __init__(self, keys, intersections):
+        """Init the overlap matrix.
+
+        :param list[tuple[str,str]] keys: database and identifier of each pathway
+        :param scipy.sparse.csr_matrix intersections: square matrix of the intersection sizes. The diagonal contains the
+         sizes of the gene sets
+        """
+        self.keys = keys
+        self.intersections = intersections
+        self.sizes = intersections.diagonal()
+
+    def __len__(self):
+        """Return the number of pathways."""
+        return len(self.keys)
+
+    @classmethod
+    def from_gene_id_sets(cls, keys, gene_id_sets, chunk_size=OVERLAP_CHUNK_SIZE):
+        """Calculate the overlap matrix of gene sets.
+
+        :param list[tuple[str,str]] keys: database and identifier of each pathway
+        :param list[array.array] gene_id_sets: identifiers of the genes of each pathway
+        :param int chunk_size: number of rows of the matrix calculated at once
+        :rtype: OverlapMatrix
+        """
+        incidence = build_incidence_matrix(gene_id_sets)
+        transposed = incidence.T.tocsc()
+
+        blocks = [
+            (incidence[start:start + chunk_size] @ transposed).tocsr()
+            for start in range(0, incidence.shape[0], chunk_size)
+        ]
+
+        if blocks:
+            intersections = sparse.vstack(blocks, format='csr')
+        else:
+            intersections = sparse.csr_matrix((0, 0), dtype=np.int32)
+
+        return cls(keys, intersections)
+
+    def iterate_rows(self, metric=JACCARD, threshold=0.0, top_k=None, start=0, stop=None):
+        """Iterate over the pathways and their most overlapping pathways, best first.
+
+        :param str metric: score used to filter and rank the overlaps, either "jaccard" or "intersection"
+        :param float threshold: minimum score of the overlaps. Pathways without common genes are never reported
+        :param Optional[int] top_k: maximum number of overlaps reported per pathway
+        :param int start: index of the first pathway
+        :param Optional[int] stop: index after the last pathway
+        :return: index of the pathway and list of index, intersection size and Jaccard index of its overlaps
+        :rtype: iter[tuple[int,list[tuple[int,int,float]]]]
+        """
+        if metric not in {JACCARD, INTERSECTION}:
+            raise ValueError('Invalid metric: {}'.format(metric))
+
+        intersections = self.intersections
+
+        for i in range(start, len(self) if stop is None else min(stop, len(self))):
+            row_start, row_end = intersections.indptr[i], intersections.indptr[i + 1]
+            columns = intersections.indices[row_start:row_end]
+            values = intersections.data[row_start:row_end]
+
+            is_other = (columns != i) & (values > 0)
+            columns, values = columns[is_other], values[is_other]
+
+            jaccard = values / (self.sizes[i] + self.sizes[columns] - values)
+            scores = jaccard if metric == JACCARD else values
+
+            is_kept = scores >= threshold
+            columns, values, jaccard, scores = columns[is_kept], values[is_kept], jaccard[is_kept], scores[is_kept]
+
+            # Sort by decreasing score and then by index for reproducible ties
+            order = np.lexsort((columns, -scores))
+
+            if top_k is not None:
+                order = order[:top_k]
+
+            yield i, [
+                (int(columns[j]), int(values[j]), float(jaccard[j]))
+                for j in order
+            ]
+
+    def save(self, path):
+        """Save the overlap matrix.
+
+        :param str path: path of the .npz file
+        """
+        resources, pathway_ids = zip(*self.keys) if self.keys else ((), ())
+
+        # Written to a temporary file first so concurrent readers never see a partial file
+        temporary_path = '{}.{}.tmp'.format(path, os.getpid())
+
+        with open(temporary_path, 'wb') as file:
+            np.savez(
+                file,
+                data=self.intersections.data,
+                indices=self.intersections.indices,
+                indptr=self.intersections.indptr,
+                shape=np.array(self.intersections.shape),
+                resources=np.array(resources, dtype=str),
+                pathway_ids=np.array(pathway_ids, dtype=str),
+            )
+
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load an overlap matrix.
+
+        :param str path: path of the .npz file
+        :rtype: OverlapMatrix
+        """
+        with np.load(path, allow_pickle=False) as arrays:
+            intersections = sparse.csr_matrix(
+                (arrays['data'], arrays['indices'], arrays['indptr']),
+                shape=tuple(arrays['shape']),
+            )
+            keys = list(zip(arrays['resources'].tolist(), arrays['pathway_ids'].tolist()))
+
+        return cls(keys, intersections)
+
+
+def _get_cache_key(keys, gene_id_sets):
+    """Return the digest of the content of the gene sets of a list of pathways.
+
+    :param list[tuple[str,str]] keys: database and identifier of each pathway
+    :param list[array.array] gene_id_sets: identifiers of the genes of each pathway
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+
+    for (resource_name, pathway_id), gene_ids in zip(keys, gene_id_sets):
+        digest.update('{}\t{}\t{}\n'.format(resource_name, pathway_id, len(gene_ids)).encode('utf-8'))
+        digest.update(gene_ids.tobytes())
+
+    return digest.hexdigest()
+
+
+def _evict_cached_matrices(cache_dir, max_files):
+    """Remove the least recently used matrices of the cache folder until at most a given number remain.
+
+    :param str cache_dir: folder of the cached matrices
+    :param int max_files: maximum number of matrices kept
+    """
+    paths = []
+
+    for entry in os.scandir(cache_dir):
+        if not entry.name.endswith('.npz'):
+            continue
+
+        try:
+            paths.append((entry.stat().st_mtime, entry.path))
+        except FileNotFoundError:  # removed by a concurrent process
+            continue
+
+    paths.sort(reverse=True)
+
+    for _, path in paths[max_files:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+
+
+def get_overlap_matrix(manager, pathways, cache_dir=OVERLAP_CACHE_DIR, chunk_size=OVERLAP_CHUNK_SIZE,
+                       max_cached=OVERLAP_CACHE_MAX_FILES):
+    """Get the overlap matrix of a list of pathways, reading it from the disk cache if it was already calculated.
+
+    Pathways without precomputed gene set (loaded with a previous version and not reindexed) are skipped.
+
+    :param pathme_viewer.manager.Manager manager: PathMe manager
+    :param list[pathme_viewer.models.Pathway] pathways: pathways
+    :param Optional[str] cache_dir: folder of the cached matrices. Not cached if None
+    :param int chunk_size: number of rows of the matrix calculated at once
+    :param int max_cached: maximum number of matrices kept in the cache folder
+    :rtype: OverlapMatrix
+    """
+    pathway_to_gene_ids = manager.get_gene_id_sets(pathways)
+
+    missing = len(pathways) - len(pathway_to_gene_ids)
+    if missing:
+        log.warning('%d pathways do not have a gene set. Please reindex the database', missing)
+
+    selection = sorted(
+        (
+            (pathway.resource_name, pathway.pathway_id), gene_ids
+        )
+        for pathway, gene_ids in pathway_to_gene_ids.items()
+    )
+
+    keys = [key for key, _ in selection]
+    gene_id_sets = [gene_ids for _, gene_ids in selection]
+
+    path = None
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, '{}.npz'.format(_get_cache_key(keys, gene_id_sets)))
+
+        try:
+            rv = OverlapMatrix.load(path)
+        except FileNotFoundError:
+            pass
+        else:
+            # Mark the matrix as recently used so it is evicted last
+            os.utime(path)
+            return rv
+
+    t = time.time()
+    rv = OverlapMatrix.from_gene_id_sets(keys, gene_id_sets, chunk_size=chunk_size)
+    log.info('Calculated the overlaps of %d pathways in %.2f seconds', len(rv), time.time() - t)
+
+    if path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        rv.save(path)
+        _evict_cached_matrices(cache_dir, max_cached)
+
+    return rv
@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+
+"""This module contains the path queries over merged graphs.
+
+The merged graph is indexed once in integer adjacency arrays (CSR) of its successors and predecessors, cached by the
+manager, so queries neither hash the nodes again nor copy the graph to ignore the direction of the edges.
+
+The number of simple paths grows exponentially with their length in dense graphs, so their enumeration stops after a
+maximum number of paths or a time budget. The nodes are indexed in the order of their SHA-512 so the state of the
+depth-first search can be encoded in a cursor and resumed by a later request.
+"""
+
+import time
+
+import numpy as np
+
+from .graph_utils import merge_pathways
+
+__all__ = [
+    'MAX_PATHS',
+    'TIME_BUDGET',
+    'PathIndex',
+    'PathEnumeration',
+    'encode_cursor',
+    'decode_cursor',
+    'is_node_pair_list',
+    'get_path_index',
+]
+
+#: Reasons why an enumeration was truncated
+MAX_PATHS = 'max_paths'
+TIME_BUDGET = 'time_budget'
+
+#: Number of steps of the search between two checks of the time budget
+_TIME_CHECK_INTERVAL = 256
+
+
+def encode_cursor(positions):
+    """Encode the positions of the depth-first search in a cursor.
+
+    :param list[int] positions: index of the next neighbor visited at each depth
+    :rtype: str
+    """
+    return '.'.join(str(position) for position in positions)
+
+
+def decode_cursor(cursor):
+    """Decode a cursor to the positions of the depth-first search.
+
+    :param str cursor: cursor returned by a previous enumeration
+    :rtype: list[int]
+    :raises ValueError: if the cursor is malformed
+    """
+    positions = [int(position) for position in cursor.split('.')]
+
+    if any(position < 0 for position in positions):
+        raise ValueError('Invalid cursor: {}'.format(cursor))
+
+    return positions
+
+
+def is_node_pair_list(pairs):
+    """Return if a decoded JSON body is a list of [source, target] pairs of node identifiers.
+
+    :param pairs: decoded JSON body
+    :rtype: bool
+    """
+    return isinstance(pairs, list) and all(
+        isinstance(pair, list) and len(pair) == 2 and all(isinstance(node_id, str) for node_id in pair)
+        for pair in pairs
+    )
+
+
+def _build_csr(number_of_nodes, sources, targets):
+    """Build the sorted adjacency lists of a graph in CSR arrays.
+
+    :param int number_of_nodes: number of nodes
+    :param numpy.ndarray sources: index of the source of each edge
+    :param numpy.ndarray targets: index of the target of each edge
+    :rtype: tuple[numpy.ndarray,numpy.ndarray]
+    """
+    order = np.lexsort((targets, sources))
+
+    indptr = np.zeros(number_of_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=number_of_nodes), out=indptr[1:])
+
+    return indptr, targets[order]
+
+
+class PathIndex(object):
+    """Integer-indexed adjacency of a graph answering path queries."""
+
+    def __init__(self, nodes, hashes, successors, predecessors):
+        """Init the path index.
+
+        :param list[pybel.dsl.BaseEntity] nodes: nodes sorted by SHA-512
+        :param list[str] hashes: SHA-512 of each node
+        :param tuple[numpy.ndarray,numpy.ndarray] successors: CSR arrays of the successors of each node
+        :param tuple[numpy.ndarray,numpy.ndarray] predecessors: CSR arrays of the predecessors of each node
+        """
+        self.nodes = nodes
+        self.hashes = hashes
+        self.hash_to_index = {
+            node_hash: index
+            for index, node_hash in enumerate(hashes)
+        }
+        self.successors = successors
+        self.predecessors = predecessors
+
+    def __len__(self):
+        """Return the number of nodes."""
+        return len(self.nodes)
+
+    @property
+    def size(self):
+        """Return the number of nodes and edges, used as the size of the index in the cache.
+
+        :rtype: int
+        """
+        return len(self.nodes) + len(self.successors[1])
+
+    @classmethod
+    def from_graph(cls, graph):
+        """Index a graph. Parallel edges are indexed once.
+
+        :param pybel.BELGraph graph: BEL graph
+        :rtype: PathIndex
+        """
+        nodes = sorted(graph, key=lambda node: node.sha512)
+        hashes = [node.sha512 for node in nodes]
+        node_to_index = {
+            node: index
+            for index, node in enumerate(nodes)
+        }
+
+        edges = {
+            (node_to_index[u], node_to_index[v])
+            for u, v in graph.edges()
+            if u != v
+        }
+        edges = np.array(sorted(edges), dtype=np.int32).reshape(-1, 2)
+        sources, targets = edges[:, 0], edges[:, 1]
+
+        return cls(
+            nodes,
+            hashes,
+            _build_csr(len(nodes), sources, targets),
+            _build_csr(len(nodes), targets, sources),
+        )
+
+    def get_index(self, node_hash):
+        """Return the index of a node.
+
+        :param str node_hash: SHA-512 of the node
+        :rtype: Optional[int]
+        """
+        return self.hash_to_index.get(node_hash)
+
+    def get_successors(self, index):
+        """Return the indexes of the successors of a node in increasing order.
+
+        :param int index: index of the node
+        :rtype: list[int]
+        """
+        indptr, indices = self.successors
+        return indices[indptr[index]:indptr[index + 1]].tolist()
+
+    def get_predecessors(self, index):
+        """Return the indexes of the predecessors of a node in increasing order.
+
+        :param int index: index of the node
+        :rtype: list[int]
+        """
+        indptr, indices = self.predecessors
+        return indices[indptr[index]:indptr[index + 1]].tolist()
+
+    def get_neighbors(self, index, undirected=False):
+        """Return the indexes of the nodes reachable from a node in one step in increasing order.
+
+        :param int index: index of the node
+        :param bool undirected: follow the edges in both directions
+        :rtype: list[int]
+        """
+        if not undirected:
+            return self.get_successors(index)
+
+        return sorted(set(self.get_successors(index)).union(self.get_predecessors(index)))
+
+    def get_backward_neighbors(self, index, undirected=False):
+        """Return the indexes of the nodes reaching a node in one step in increasing order.
+
+        :param int index: index of the node
+        :param bool undirected: follow the edges in both directions
+        :rtype: list[int]
+        """
+        if not undirected:
+            return self.get_predecessors(index)
+
+        return self.get_neighbors(index, undirected=True)
+
+    def shortest_path(self, source, target, undirected=False):
+        """Find a shortest path between two nodes with a bidirectional breadth-first search.
+
+        :param int source: index of the first node
+        :param int target: index of the last node
+        :param bool undirected: follow the edges in both directions
+        :return: indexes of the nodes of the path or None if there is no path
+        :rtype: Optional[list[int]]
+        """
+        if source == target:
+            return [source]
+
+        # Node to the previous node in the path from the source / the next node in the path to the target
+        forward_parents = {source: None}
+        backward_parents = {target: None}
+        forward_fringe = [source]
+        backward_fringe = [target]
+
+        meeting_node = None
+
+        while forward_fringe and backward_fringe and meeting_node is None:
+            # Expand the smallest fringe by a whole level
+            if len(forward_fringe) <= len(backward_fringe):
+                forward_fringe, meeting_node = _expand_fringe(
+                    forward_fringe,
+                    lambda node: self.get_neighbors(node, undirected),
+                    forward_parents,
+                    backward_parents,
+                )
+            else:
+                backward_fringe, meeting_node = _expand_fringe(
+                    backward_fringe,
+                    lambda node: self.get_backward_neighbors(node, undirected),
+                    backward_parents,
+                    forward_parents,
+                )
+
+        if meeting_node is None:
+            return None
+
+        return _join_parents(meeting_node, forward_parents, backward_parents)
+
+
+def _expand_fringe(fringe, get_neighbors, parents, other_parents):
+    """Expand the fringe of one side of a bidirectional breadth-first search by a level.
+
+    :param list[int] fringe: nodes reached last by this side
+    :param get_neighbors: function returning the nodes reached from a node by this side
+    :param dict[int,Optional[int]] parents: nodes reached by this side to the node they were reached from. Updated
+    :param dict[int,Optional[int]] other_parents: nodes reached by the other side
+    :return: next fringe and the first node reached by both sides, if any
+    :rtype: tuple[list[int],Optional[int]]
+    """
+    next_fringe = []
+
+    for node in fringe:
+        for neighbor in get_neighbors(node):
+            if neighbor not in parents:
+                parents[neighbor] = node
+                next_fringe.append(neighbor)
+
+            if neighbor in other_parents:
+                return next_fringe, neighbor
+
+    return next_fringe, None
+
+
+def _join_parents(meeting_node, forward_parents, backward_parents):
+    """Build the path through the node where both sides of a bidirectional breadth-first search met.
+
+    :param int meeting_node: node reached by both sides
+    :param dict[int,Optional[int]] forward_parents: node to the previous node in the path from the source
+    :param dict[int,Optional[int]] backward_parents: node to the next node in the path to the target
+    :rtype: list[int]
+    """
+    path = []
+
+    node = meeting_node
+    while node is not None:
+        path.append(node)
+        node = forward_parents[node]
+
+    path.reverse()
+
+    node = backward_parents[meeting_node]
+    while node is not None:
+        path.append(node)
+        node = backward_parents[node]
+
+    return path
+
+
+class PathEnumeration(object):
+    """Depth-first enumeration of the simple paths between two nodes of an indexed graph."""
+
+    def __init__(self, index, source, target, cutoff=None, undirected=False):
+        """Init the enumeration.
+
+        :param PathIndex index: path index of the graph
+        :param int source: index of the first node of the paths
+        :param int target: index of the last node of the paths
+        :param Optional[int] cutoff: maximum number of edges of the paths
+        :param bool undirected: follow the edges in both directions
+        """
+        self.index = index
+        self.source = source
+        self.target = target
+        self.cutoff = len(index) - 1 if cutoff is None else cutoff
+        self.undirected = undirected
+
+        #: Whether the last call to :meth:`iterate_paths` stopped before finding all the paths
+        self.truncated = None
+        #: Reason why the last enumeration was truncated
+        self.reason = None
+        #: Cursor resuming the last enumeration if it was truncated
+        self.cursor = None
+
+        self._node_to_neighbors = {}
+
+    def get_neighbors(self, node):
+        """Return the neighbors of a node, computing them only once.
+
+        :param int node: index of the node
+        :rtype: list[int]
+        """
+        rv = self._node_to_neighbors.get(node)
+
+        if rv is None:
+            rv = self._node_to_neighbors[node] = self.index.get_neighbors(node, self.undirected)
+
+        return rv
+
+    def _restore(self, positions):
+        """Rebuild the path and the stack of the depth-first search from the positions of a cursor.
+
+        :param list[int] positions: index of the next neighbor visited at each depth
+        :rtype: tuple[list,list]
+        :raises ValueError: if the positions do not match the graph
+        """
+        path = [self.source]
+        stack = []
+
+        for depth, position in enumerate(positions):
+            neighbors = self.get_neighbors(path[-1])
+
+            if position > len(neighbors) or depth >= self.cutoff:
+                raise ValueError('Cursor does not match the graph')
+
+            stack.append([neighbors, position])
+
+            if depth == len(positions) - 1:
+                break
+
+            # All the levels but the last one are exploring the neighbor before their position
+            if not position:
+                raise ValueError('Cursor does not match the graph')
+
+            node = neighbors[position - 1]
+
+            if node in path or node == self.target:
+                raise ValueError('Cursor does not match the graph')
+
+            path.append(node)
+
+        return path, stack
+
+    def _search(self, path, stack, deadline=None):
+        """Run the depth-first search, yielding the level of the stack each time it reaches the target.
+
+        The path and the stack are updated in place, so the search stops in a state that can be encoded in a cursor.
+
+        :param list[int] path: nodes of the current path
+        :param list[list] stack: neighbors of each node of the path and the position of the next one visited
+        :param Optional[float] deadline: monotonic time after which the search stops
+        :rtype: iter[list]
+        """
+        visited = set(path)
+        steps = 0
+
+        while stack:
+            steps += 1
+            if deadline is not None and not steps % _TIME_CHECK_INTERVAL and time.monotonic() > deadline:
+                self.reason = TIME_BUDGET
+                return
+
+            level = stack[-1]
+            neighbors, position = level
+
+            if position == len(neighbors):
+                stack.pop()
+                visited.discard(path.pop())
+                continue
+
+            level[1] += 1
+            node = neighbors[position]
+
+            if node == self.target:
+                yield level
+
+            elif node not in visited and len(path) < self.cutoff:
+                path.append(node)
+                visited.add(node)
+                stack.append([self.get_neighbors(node), 0])
+
+    def iterate_paths(self, max_paths=None, time_budget=None, cursor=None):
+        """Iterate over the simple paths between the source and the target.
+
+        Once exhausted, :data:`truncated`, :data:`reason` and :data:`cursor` tell if and why the enumeration stopped
+        early and how to resume it.
+
+        :param Optional[int] max_paths: maximum number of paths
+        :param Optional[float] time_budget: maximum number of seconds spent
+        :param Optional[str] cursor: cursor returned by a previous enumeration of the same paths
+        :return: indexes of the nodes of each path
+        :rtype: iter[list[int]]
+        :raises ValueError: if the cursor is invalid
+        """
+        if cursor:
+            path, stack = self._restore(decode_cursor(cursor))
+        else:
+            path, stack = [self.source], [[self.get_neighbors(self.source), 0]]
+
+        self.truncated, self.reason, self.cursor = False, None, None
+
+        if self.source == self.target or self.cutoff < 1:
+            return
+
+        deadline = None if time_budget is None else time.monotonic() + time_budget
+        number_of_paths = 0
+
+        for level in self._search(path, stack, deadline):
+            # Only truncated if there is another path, which will be the first one found when resuming
+            if max_paths is not None and number_of_paths >= max_paths:
+                level[1] -= 1
+                self.reason = MAX_PATHS
+                break
+
+            number_of_paths += 1
+            yield path + [self.target]
+
+        if stack:
+            self.truncated = True
+            self.cursor = encode_cursor([position for _, position in stack])
+
+
+def get_path_index(manager, pathways):
+    """Get the path index of the merge of a set of pathways from the cache of the manager, building it if needed.
+
+    :param pathme_viewer.manager.Manager manager: PathMe manager
+    :param dict[str,str] pathways: pathway identifier to resource name dictionary
+    :rtype: PathIndex
+    """
+    key = manager.get_merged_graph_key(pathways)
+
+    rv = manager.path_index_cache.get(key)
+
+    if rv is None:
+        rv = PathIndex.from_graph(merge_pathways(pathways))
+        manager.path_index_cache.set(key, rv, size=rv.size)
+
+    return rv
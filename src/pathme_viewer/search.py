@@ -0,0 +1,451 @@
+# -*- coding: utf-8 -*-
+
+"""This module contains the pathway name search backends used for autocompletion.
+
+The backend is chosen according to the database: SQLite uses an FTS5 virtual table, PostgreSQL uses a trigram index
+and any other database (or a SQLite/PostgreSQL installation missing those extensions) uses an in-process token index.
+The database structures are only created by :func:`build_search_backend`, so a manager whose database does not have
+them yet falls back to the token index without writing to the database.
+"""
+
+import bisect
+import logging
+import re
+import threading
+from collections import defaultdict
+
+from sqlalchemy import func, text
+from sqlalchemy.exc import DBAPIError
+
+from .models import NETWORK_TABLE_NAME, Pathway
+
+__all__ = [
+    'PathwaySearchBackend',
+    'SQLiteFTSBackend',
+    'PostgresTrigramBackend',
+    'TokenIndexBackend',
+    'get_search_backend',
+    'build_search_backend',
+]
+
+log = logging.getLogger(__name__)
+
+FTS_TABLE_NAME = '{}_fts'.format(NETWORK_TABLE_NAME)
+TRIGRAM_INDEX_NAME = 'ix_{}_name_trgm'.format(NETWORK_TABLE_NAME)
+
+_token_re = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(string):
+    """Split a string in lower-cased word tokens.
+
+    :param str string: string
+    :rtype: list[str]
+    """
+    return _token_re.findall(string.lower())
+
+
+class PathwaySearchBackend(object):
+    """Base class for pathway name search backends.
+
+    Backends are incrementally updated by the manager when pathways are created or deleted.
+    """
+
+    def __init__(self, manager):
+        """Init the backend.
+
+        :param pathme_viewer.manager.Manager manager: PathMe manager
+        """
+        self.manager = manager
+
+    @property
+    def session(self):
+        """Return the session of the manager."""
+        return self.manager.session
+
+    def is_built(self):
+        """Return if the structures needed by the backend exist in the database, without writing to it.
+
+        :rtype: bool
+        """
+        return True
+
+    def build(self):
+        """Create the structures needed by the backend and index all the pathways of the database.
+
+        :raises sqlalchemy.exc.DBAPIError: if the backend is not supported by the database
+        """
+
+    def add(self, pathways):
+        """Index pathways.
+
+        :param iter[Pathway] pathways: pathways
+        """
+
+    def remove(self, pathway_ids):
+        """Remove pathways from the index.
+
+        :param iter[int] pathway_ids: primary keys of the pathways
+        """
+
+    def remove_resource(self, resource_name):
+        """Remove the pathways of a given database from the index.
+
+        :param str resource_name: name of the database
+        """
+
+    def clear(self):
+        """Remove all pathways from the index."""
+
+    def search(self, query, resource_name=None, limit=None):
+        """Return the pathways whose names match the query, best matches first.
+
+        :param str query: query string
+        :param Optional[str] resource_name: database name
+        :param Optional[int] limit: limit result query
+        :rtype: list[Pathway]
+        """
+        raise NotImplementedError
+
+    def _get_pathways_by_ids(self, pathway_ids):
+        """Get pathways by their primary keys keeping the order of the identifiers.
+
+        :param list[int] pathway_ids: primary keys
+        :rtype: list[Pathway]
+        """
+        if not pathway_ids:
+            return []
+
+        id_to_pathway = {
+            pathway.id: pathway
+            for pathway in self.session.query(Pathway).filter(Pathway.id.in_(pathway_ids))
+        }
+
+        return [
+            id_to_pathway[pathway_id]
+            for pathway_id in pathway_ids
+            if pathway_id in id_to_pathway
+        ]
+
+
+class SQLiteFTSBackend(PathwaySearchBackend):
+    """Search backend based on a SQLite FTS5 virtual table ranked with BM25."""
+
+    def is_built(self):
+        """Return if the FTS5 table exists and can be queried."""
+        try:
+            self.session.execute(text('SELECT rowid FROM {} LIMIT 0'.format(FTS_TABLE_NAME))).fetchall()
+        except DBAPIError:  # the table does not exist or FTS5 is not available
+            self.session.rollback()
+            return False
+
+        return True
+
+    def build(self):
+        """Create the FTS5 table and fill it with all the pathways of the database."""
+        self.session.execute(text(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS {} USING fts5(name, resource_name UNINDEXED)'.format(FTS_TABLE_NAME)
+        ))
+        # Rebuilt from scratch in case it drifted from the pathway table
+        self.clear()
+        self.add(self.session.query(Pathway.id, Pathway.name, Pathway.resource_name))
+        self.session.commit()
+
+    def add(self, pathways):
+        """Index pathways."""
+        rows = [
+            {'id': pathway.id, 'name': pathway.name, 'resource_name': pathway.resource_name}
+            for pathway in pathways
+        ]
+
+        if not rows:
+            return
+
+        self.remove(row['id'] for row in rows)
+        self.session.execute(
+            text('INSERT INTO {} (rowid, name, resource_name) VALUES (:id, :name, :resource_name)'.format(
+                FTS_TABLE_NAME)),
+            rows
+        )
+
+    def remove(self, pathway_ids):
+        """Remove pathways from the index."""
+        rows = [{'id': pathway_id} for pathway_id in pathway_ids]
+
+        if rows:
+            self.session.execute(text('DELETE FROM {} WHERE rowid = :id'.format(FTS_TABLE_NAME)), rows)
+
+    def remove_resource(self, resource_name):
+        """Remove the pathways of a given database from the index."""
+        self.session.execute(
+            text('DELETE FROM {} WHERE resource_name = :resource_name'.format(FTS_TABLE_NAME)),
+            {'resource_name': resource_name}
+        )
+
+    def clear(self):
+        """Remove all pathways from the index."""
+        self.session.execute(text('DELETE FROM {}'.format(FTS_TABLE_NAME)))
+
+    def search(self, query, resource_name=None, limit=None):
+        """Return the pathways whose names contain words starting with the query terms ranked by BM25."""
+        tokens = tokenize(query)
+
+        if not tokens:
+            return []
+
+        params = {
+            # Each term is quoted to escape FTS5 syntax and matched as a prefix
+            'match': ' '.join('"{}"*'.format(token) for token in tokens),
+            'limit': -1 if limit is None else limit,
+        }
+        statement = 'SELECT rowid FROM {0} WHERE {0} MATCH :match'.format(FTS_TABLE_NAME)
+
+        if resource_name is not None:
+            statement += ' AND resource_name = :resource_name'
+            params['resource_name'] = resource_name
+
+        statement += ' ORDER BY rank LIMIT :limit'
+
+        pathway_ids = [
+            pathway_id
+            for pathway_id, in self.session.execute(text(statement), params)
+        ]
+
+        return self._get_pathways_by_ids(pathway_ids)
+
+
+class PostgresTrigramBackend(PathwaySearchBackend):
+    """Search backend based on a PostgreSQL ``pg_trgm`` GIN index ranked by trigram similarity.
+
+    The index is maintained by the database so it does not need to be updated by the manager.
+    """
+
+    def is_built(self):
+        """Return if the trigram index exists."""
+        statement = text('SELECT 1 FROM pg_indexes WHERE indexname = :name')
+        return self.session.execute(statement, {'name': TRIGRAM_INDEX_NAME}).scalar() is not None
+
+    def build(self):
+        """Create the ``pg_trgm`` extension and the trigram index."""
+        self.session.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        self.session.execute(text(
+            'CREATE INDEX IF NOT EXISTS {} ON {} USING gin (lower(name) gin_trgm_ops)'.format(
+                TRIGRAM_INDEX_NAME, NETWORK_TABLE_NAME)
+        ))
+        self.session.commit()
+
+    def search(self, query, resource_name=None, limit=None):
+        """Return the pathways whose names contain the query ranked by trigram similarity."""
+        q = self.session.query(Pathway).filter(func.lower(Pathway.name).contains(query.lower()))
+
+        if resource_name is not None:
+            q = q.filter(Pathway.resource_name == resource_name)
+
+        q = q.order_by(func.similarity(func.lower(Pathway.name), query.lower()).desc(), Pathway.name)
+
+        if limit:
+            q = q.limit(limit)
+
+        return q.all()
+
+
+class TokenIndexBackend(PathwaySearchBackend):
+    """In-process inverted index from the name tokens to the pathways.
+
+    Query terms are matched as prefixes of the tokens and the results are ranked by the number of terms matching whole
+    tokens, then by names starting with the query and then by shorter names.
+    """
+
+    def __init__(self, manager):
+        """Init the backend."""
+        super().__init__(manager)
+
+        self._token_to_ids = None
+        self._tokens = None
+        self._id_to_entry = None
+        self._lock = threading.RLock()
+
+    def _ensure_loaded(self):
+        if self._token_to_ids is not None:
+            return
+
+        self._token_to_ids = defaultdict(set)
+        self._id_to_entry = {}
+        self._tokens = []
+
+        self.add(self.session.query(Pathway.id, Pathway.name, Pathway.resource_name))
+
+    def add(self, pathways):
+        """Index pathways."""
+        with self._lock:
+            if self._token_to_ids is None:  # the whole table will be read when the index is first used
+                return
+
+            for pathway in pathways:
+                self._remove(pathway.id)
+                self._id_to_entry[pathway.id] = pathway.name, pathway.resource_name
+
+                for token in set(tokenize(pathway.name)):
+                    if token not in self._token_to_ids:
+                        bisect.insort(self._tokens, token)
+
+                    self._token_to_ids[token].add(pathway.id)
+
+    def _remove(self, pathway_id):
+        entry = self._id_to_entry.pop(pathway_id, None)
+
+        if entry is None:
+            return
+
+        for token in set(tokenize(entry[0])):
+            ids = self._token_to_ids[token]
+            ids.discard(pathway_id)
+
+            if not ids:
+                del self._token_to_ids[token]
+                del self._tokens[bisect.bisect_left(self._tokens, token)]
+
+    def remove(self, pathway_ids):
+        """Remove pathways from the index."""
+        with self._lock:
+            if self._token_to_ids is None:
+                return
+
+            for pathway_id in pathway_ids:
+                self._remove(pathway_id)
+
+    def remove_resource(self, resource_name):
+        """Remove the pathways of a given database from the index."""
+        with self._lock:
+            if self._token_to_ids is None:
+                return
+
+            self.remove([
+                pathway_id
+                for pathway_id, (_, pathway_resource) in self._id_to_entry.items()
+                if pathway_resource == resource_name
+            ])
+
+    def clear(self):
+        """Remove all pathways from the index."""
+        with self._lock:
+            self._token_to_ids = None
+            self._tokens = None
+            self._id_to_entry = None
+
+    def _get_prefixed_ids(self, term):
+        """Return the identifiers of the pathways having a token starting with the term.
+
+        :param str term: query term
+        :rtype: set[int]
+        """
+        rv = set()
+
+        for i in range(bisect.bisect_left(self._tokens, term), len(self._tokens)):
+            token = self._tokens[i]
+
+            if not token.startswith(term):
+                break
+
+            rv.update(self._token_to_ids[token])
+
+        return rv
+
+    def search(self, query, resource_name=None, limit=None):
+        """Return the pathways with tokens starting with all the terms of the query."""
+        terms = tokenize(query)
+
+        if not terms:
+            return []
+
+        with self._lock:
+            self._ensure_loaded()
+
+            pathway_ids = None
+            for term in sorted(terms, key=len, reverse=True):
+                ids = self._get_prefixed_ids(term)
+                pathway_ids = ids if pathway_ids is None else pathway_ids & ids
+
+                if not pathway_ids:
+                    return []
+
+            entries = [
+                (pathway_id,) + self._id_to_entry[pathway_id]
+                for pathway_id in pathway_ids
+            ]
+
+        if resource_name is not None:
+            entries = [entry for entry in entries if entry[2] == resource_name]
+
+        query = query.lower()
+
+        def rank(entry):
+            tokens = set(tokenize(entry[1]))
+            return -sum(term in tokens for term in terms), not entry[1].lower().startswith(query), len(entry[1])
+
+        entries.sort(key=rank)
+
+        if limit:
+            entries = entries[:limit]
+
+        return self._get_pathways_by_ids([entry[0] for entry in entries])
+
+
+def _get_database_backend_cls(manager):
+    """Return the search backend class relying on the database of the manager.
+
+    :param pathme_viewer.manager.Manager manager: PathMe manager
+    :rtype: Optional[type]
+    """
+    dialect = manager.engine.dialect.name
+
+    if dialect == 'sqlite':
+        return SQLiteFTSBackend
+
+    if dialect == 'postgresql':
+        return PostgresTrigramBackend
+
+
+def get_search_backend(manager):
+    """Return the best pathway search backend already built in the database of the manager.
+
+    The database is only read so this can be called by every manager, including the ones of read-only commands.
+
+    :param pathme_viewer.manager.Manager manager: PathMe manager
+    :rtype: PathwaySearchBackend
+    """
+    backend_cls = _get_database_backend_cls(manager)
+
+    if backend_cls is None:
+        return TokenIndexBackend(manager)
+
+    backend = backend_cls(manager)
+
+    if not backend.is_built():
+        log.info('%s has not been built. Falling back to an in-process index', backend_cls.__name__)
+        return TokenIndexBackend(manager)
+
+    return backend
+
+
+def build_search_backend(manager):
+    """Create or rebuild the best pathway search backend supported by the database of the manager.
+
+    :param pathme_viewer.manager.Manager manager: PathMe manager
+    :rtype: PathwaySearchBackend
+    """
+    backend_cls = _get_database_backend_cls(manager)
+
+    if backend_cls is None:
+        return TokenIndexBackend(manager)
+
+    backend = backend_cls(manager)
+
+    try:
+        backend.build()
+    except DBAPIError:
+        log.warning('%s is not supported by the database. Falling back to an in-process index', backend_cls.__name__)
+        manager.session.rollback()
+        return TokenIndexBackend(manager)
+
+    return backend
@@ -1490,12 +1490,27 @@ function initD3Force(graph, tree) {
             $.ajax({
                 url: "/api/pathway/paths",
                 type: pathForm.attr("method"),
-                dataType: "json",
+                // All paths are streamed as JSON lines so the response is parsed below
+                dataType: args["paths_method"] === "all" ? "text" : "json",
                 data: $.param(args, true),
                 success: function (paths) {
 
                     if (args["paths_method"] === "all") {
 
+                        var lines = paths.split("\n").filter(function (line) {
+                            return line.length > 0;
+                        }).map(JSON.parse);
+
+                        var summary = lines.pop();
+
+                        paths = lines.map(function (line) {
+                            return line.path;
+                        });
+
+                        if (summary.truncated) {
+                            alert("Only the first " + summary.paths + " paths are shown (limit reached: " + summary.reason + ")");
+                        }
+
                         resetAttributes();
 
                         // Apply changes in style for select paths
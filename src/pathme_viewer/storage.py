@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+"""This module contains the codecs used to store the pickled pathway graphs in the database.
+
+The format of each blob is recorded in :data:`pathme_viewer.models.Pathway.blob_format` so rows written with different
+codecs can coexist. Rows without a format were written before compression was supported and are raw pickles.
+"""
+
+import functools
+import lzma
+import time
+import zlib
+
+from pybel import from_bytes, to_bytes
+
+from .constants import BLOB_FORMAT, BLOB_ZSTD_LEVEL
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+__all__ = [
+    'RAW',
+    'ZLIB',
+    'LZMA',
+    'ZSTD',
+    'DEFAULT_BLOB_FORMAT',
+    'get_blob_formats',
+    'compress_blob',
+    'decompress_blob',
+    'encode_graph',
+    'decode_graph',
+    'measure_blob_formats',
+]
+
+RAW = 'raw'
+ZLIB = 'zlib'
+LZMA = 'lzma'
+ZSTD = 'zstd'
+
+
+def _identity(data):
+    return data
+
+
+def _zstd_compress(data, level=BLOB_ZSTD_LEVEL):
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def _zstd_decompress(data):
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+#: Blob format to the functions compressing and decompressing the pickles
+_codecs = {
+    RAW: (_identity, _identity),
+    ZLIB: (lambda data: zlib.compress(data, 9), zlib.decompress),
+    LZMA: (lzma.compress, lzma.decompress),
+}
+
+if zstandard is not None:
+    _codecs[ZSTD] = _zstd_compress, _zstd_decompress
+
+#: Format used to write new blobs. Zstandard decodes the fastest but is an optional dependency
+DEFAULT_BLOB_FORMAT = BLOB_FORMAT or (ZSTD if ZSTD in _codecs else ZLIB)
+
+
+def get_blob_formats():
+    """Return the blob formats available in this installation.
+
+    :rtype: list[str]
+    """
+    return list(_codecs)
+
+
+def _get_codec(blob_format):
+    """Return the compression and decompression functions of a format.
+
+    :param Optional[str] blob_format: blob format. Raw if None
+    :raises ValueError: if the format is unknown or its library is not installed
+    """
+    try:
+        return _codecs[blob_format or RAW]
+    except KeyError:
+        raise ValueError('Unsupported blob format: {}. Available formats: {}'.format(
+            blob_format, ', '.join(_codecs)))
+
+
+def compress_blob(data, blob_format=DEFAULT_BLOB_FORMAT):
+    """Compress a pickled graph.
+
+    :param bytes data: pickled graph
+    :param Optional[str] blob_format: blob format
+    :rtype: bytes
+    """
+    return _get_codec(blob_format)[0](data)
+
+
+def decompress_blob(blob, blob_format=None):
+    """Decompress a stored blob to the pickled graph.
+
+    :param bytes blob: stored blob
+    :param Optional[str] blob_format: blob format. Raw if None
+    :rtype: bytes
+    """
+    return _get_codec(blob_format)[1](blob)
+
+
+def encode_graph(graph, blob_format=DEFAULT_BLOB_FORMAT):
+    """Serialize a BEL graph to a blob.
+
+    :param pybel.BELGraph graph: BEL graph
+    :param Optional[str] blob_format: blob format
+    :rtype: bytes
+    """
+    return compress_blob(to_bytes(graph), blob_format=blob_format)
+
+
+def decode_graph(blob, blob_format=None):
+    """Deserialize a BEL graph from a blob.
+
+    :param bytes blob: stored blob
+    :param Optional[str] blob_format: blob format. Raw if None
+    :rtype: pybel.BELGraph
+    """
+    return from_bytes(decompress_blob(blob, blob_format=blob_format))
+
+
+def _iterate_measured_codecs(blob_formats, zstd_levels=None):
+    """Iterate over the name, compression and decompression functions of the codecs measured.
+
+    :param list[str] blob_formats: formats to measure
+    :param Optional[list[int]] zstd_levels: compression levels of zstd to measure. The level of new blobs if None
+    :rtype: iter[tuple[str,types.FunctionType,types.FunctionType]]
+    """
+    for blob_format in blob_formats:
+        compress, decompress = _get_codec(blob_format)
+
+        if blob_format != ZSTD:
+            yield blob_format, compress, decompress
+            continue
+
+        for level in zstd_levels or [BLOB_ZSTD_LEVEL]:
+            yield '{}-{}'.format(ZSTD, level), functools.partial(_zstd_compress, level=level), decompress
+
+
+def measure_blob_formats(pickles, blob_formats=None, zstd_levels=None):
+    """Measure the size and the time needed to encode and decode pickled graphs with each blob format.
+
+    The decoding time includes unpickling the graphs since it is what a request pays for a cache miss. Each level of
+    zstd is reported as a separate format (e.g., "zstd-3").
+
+    :param list[bytes] pickles: pickled graphs
+    :param Optional[list[str]] blob_formats: formats to measure. All available formats if None
+    :param Optional[list[int]] zstd_levels: compression levels of zstd to measure. The level of new blobs if None
+    :return: one row per format with the total size in bytes, the ratio to the raw size and the times in seconds
+    :rtype: list[dict]
+    """
+    raw_size = sum(len(data) for data in pickles)
+
+    rv = []
+
+    for blob_format, compress, decompress in _iterate_measured_codecs(blob_formats or get_blob_formats(), zstd_levels):
+        t = time.perf_counter()
+        blobs = [compress(data) for data in pickles]
+        encode_time = time.perf_counter() - t
+
+        t = time.perf_counter()
+        for blob in blobs:
+            from_bytes(decompress(blob))
+        decode_time = time.perf_counter() - t
+
+        size = sum(len(blob) for blob in blobs)
+
+        rv.append({
+            'format': blob_format,
+            'size': size,
+            'ratio': size / raw_size if raw_size else 1.0,
+            'encode_time': encode_time,
+            'decode_time': decode_time,
+        })
+
+    return rv
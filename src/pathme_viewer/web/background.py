@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+"""This module contains the asynchronous mode of the expensive graph APIs.
+
+Requests with ``async=true`` are answered at once with a job handle and the request is replayed by a background job
+of the queue of the application. The response of the replayed request is kept gzipped as the result of the job.
+"""
+
+from functools import wraps
+
+from flask import current_app, jsonify, request, url_for
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException
+
+from ..constants import ASYNC
+from ..graph_utils import process_request
+from ..jobs import JobQueueFull
+from .response_cache import CachedResponse, get_response_key
+
+__all__ = [
+    'get_job_json',
+    'asynchronous_view',
+]
+
+
+def get_job_json(job):
+    """Return the status of a job with the URLs to poll it and to get its result.
+
+    :param pathme_viewer.jobs.Job job: job
+    :rtype: dict
+    """
+    rv = job.to_json()
+    rv['status_url'] = url_for('pathme_viewer.get_job', job_id=job.id)
+    rv['result_url'] = url_for('pathme_viewer.get_job_result', job_id=job.id)
+    return rv
+
+
+def _run_request(app, view, path, args):
+    """Replay a request in a background job and return its response.
+
+    :param flask.Flask app: application
+    :param view: view answering the request
+    :param str path: path of the request
+    :param werkzeug.datastructures.MultiDict args: arguments of the request, without the asynchronous flag
+    :rtype: pathme_viewer.web.response_cache.CachedResponse
+    :raises ValueError: if the view aborts the request
+    """
+    with app.test_request_context(path, query_string=args):
+        try:
+            response = app.make_response(view())
+
+            if response.status_code != 200:
+                raise ValueError(response.get_data(as_text=True))
+
+            # Streamed and file responses are read in memory
+            response.direct_passthrough = False
+
+            return CachedResponse.from_response(response)
+
+        except HTTPException as e:
+            raise ValueError(e.description)
+
+        finally:
+            # The database session of the thread is not reused by the requests
+            app.pathme_manager.session.remove()
+
+
+def asynchronous_view(view):
+    """Decorate a view of the graph APIs so it runs in a background job if the request has ``async=true``.
+
+    Identical requests are deduplicated while their job is in progress or its result has not expired.
+
+    :param view: view taking the requested pathways from the arguments of the request
+    :rtype: types.FunctionType
+    """
+
+    @wraps(view)
+    def decorated_view(*args, **kwargs):
+        if request.args.get(ASYNC) != 'true':
+            return view(*args, **kwargs)
+
+        # The view reports the missing pathways
+        versions = current_app.pathme_manager.get_pathway_versions(process_request(request))
+        if versions is None:
+            return view(*args, **kwargs)
+
+        job_args = MultiDict([
+            (key, value)
+            for key, value in request.args.items(multi=True)
+            if key != ASYNC
+        ])
+
+        try:
+            job = current_app.pathme_jobs.submit(
+                get_response_key(request.path, job_args, versions),
+                _run_request,
+                current_app._get_current_object(),
+                view,
+                request.path,
+                job_args,
+            )
+        except JobQueueFull as e:
+            return jsonify(error=str(e)), 503
+
+        response = jsonify(get_job_json(job))
+        response.status_code = 202
+        response.headers['Location'] = url_for('pathme_viewer.get_job', job_id=job.id)
+        return response
+
+    return decorated_view
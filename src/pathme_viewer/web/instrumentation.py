@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+"""This module contains the timing of the requests of the web application.
+
+Every request gets a phase timer while it is handled. Its duration and the durations of its phases are added to the
+metrics registry of the application once its response is built, so the bodies streamed afterwards are not included.
+"""
+
+from flask import request
+
+from ..metrics import MetricsRegistry, start_timer, stop_timer
+
+__all__ = [
+    'init_metrics',
+]
+
+
+def init_metrics(app, server_timing=False):
+    """Time the requests of an application in its metrics registry.
+
+    :param flask.Flask app: application
+    :param bool server_timing: send the durations of the phases in a Server-Timing header
+    """
+    app.pathme_metrics = MetricsRegistry()
+
+    @app.before_request
+    def start_request_timer():
+        start_timer()
+
+    @app.after_request
+    def record_request_timer(response):
+        timer = stop_timer()
+
+        if timer is None:
+            return response
+
+        total = timer.elapsed
+
+        app.pathme_metrics.observe_request(
+            request.endpoint or 'unknown',
+            response.status_code,
+            total,
+            phases=timer.phases,
+        )
+
+        if server_timing:
+            response.headers['Server-Timing'] = timer.get_server_timing(total=total)
+
+        return response
+
+    @app.teardown_request
+    def clear_request_timer(exception=None):
+        # The timer is still set if the request failed before its response was built
+        stop_timer()
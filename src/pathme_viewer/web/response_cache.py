@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+"""This module contains the cache of the responses of the graph APIs.
+
+The responses of these APIs only depend on the arguments of the request and on the versions (creation timestamps) of the
+requested pathways, which are hashed in a strong ETag. Requests with a matching ``If-None-Match`` header get an empty
+304 response without building any graph and the bodies of the other responses are kept gzipped in a bounded cache of
+the manager.
+"""
+
+import gzip
+import hashlib
+import json
+from functools import wraps
+
+from flask import Response, current_app, request
+
+from ..constants import PATHWAYS_ARGUMENT, RESOURCES_ARGUMENT
+from ..graph_utils import process_request
+from ..metrics import span
+
+__all__ = [
+    'CachedResponse',
+    'get_response_key',
+    'get_etag',
+    'cached_response',
+]
+
+#: Compression level of the cached bodies
+GZIP_COMPRESS_LEVEL = 6
+
+#: Headers of the responses kept in the cache besides their content type
+CACHED_HEADERS = ('Content-Disposition',)
+
+
+def get_response_key(path, args, versions):
+    """Return the key of a response in the cache.
+
+    The requested pathways are already identified by their versions so their arguments are left out, and the values
+    of the other arguments are sorted.
+
+    :param str path: path of the request
+    :param werkzeug.datastructures.MultiDict args: arguments of the request
+    :param tuple[tuple[str,str,str]] versions: resource name, pathway identifier and version of the requested pathways
+    :rtype: tuple
+    """
+    arguments = tuple(sorted(
+        (key, tuple(sorted(args.getlist(key))))
+        for key in args
+        if key not in {PATHWAYS_ARGUMENT, RESOURCES_ARGUMENT}
+    ))
+
+    return path, arguments, versions
+
+
+def get_etag(key):
+    """Return the entity tag of the response with a given key (without quotes).
+
+    :param tuple key: key of the response (see :func:`get_response_key`)
+    :rtype: str
+    """
+    return hashlib.sha256(json.dumps(key).encode('utf-8')).hexdigest()[:32]
+
+
+def _get_gzip_etag(etag):
+    """Return the entity tag of the gzipped representation of a response, since strong entity tags must differ.
+
+    :param str etag: entity tag of the response
+    :rtype: str
+    """
+    return etag + '-gzip'
+
+
+class CachedResponse(object):
+    """Gzipped body and headers of a response."""
+
+    def __init__(self, body, content_type, headers):
+        """Init the cached response.
+
+        :param bytes body: gzipped body
+        :param str content_type: content type of the response
+        :param list[tuple[str,str]] headers: other headers of the response
+        """
+        self.body = body
+        self.content_type = content_type
+        self.headers = headers
+
+    @classmethod
+    def from_response(cls, response):
+        """Compress a response.
+
+        :param flask.Response response: response with its whole body in memory
+        :rtype: CachedResponse
+        """
+        return cls(
+            gzip.compress(response.get_data(), compresslevel=GZIP_COMPRESS_LEVEL),
+            response.content_type,
+            [
+                (header, response.headers[header])
+                for header in CACHED_HEADERS
+                if header in response.headers
+            ],
+        )
+
+    def to_response(self, etag, use_gzip=True):
+        """Build a response from the cache.
+
+        :param str etag: entity tag of the response
+        :param bool use_gzip: send the gzipped body. Otherwise it is decompressed
+        :rtype: flask.Response
+        """
+        if use_gzip:
+            response = Response(self.body, content_type=self.content_type, headers=self.headers)
+            response.headers['Content-Encoding'] = 'gzip'
+            response.set_etag(_get_gzip_etag(etag))
+
+        else:
+            response = Response(gzip.decompress(self.body), content_type=self.content_type, headers=self.headers)
+            response.set_etag(etag)
+
+        return _add_validation_headers(response)
+
+
+def _add_validation_headers(response):
+    """Make clients revalidate their copy of a response with its entity tag before using it.
+
+    :param flask.Response response: response
+    :rtype: flask.Response
+    """
+    response.cache_control.no_cache = True
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def cached_response(view):
+    """Decorate a view of the graph APIs so its responses are cached and validated with entity tags.
+
+    Streamed responses are sent while they are generated so only their entity tag is set. Errors are never cached.
+
+    :param view: view taking the requested pathways from the arguments of the request
+    :rtype: types.FunctionType
+    """
+
+    @wraps(view)
+    def decorated_view(*args, **kwargs):
+        manager = current_app.pathme_manager
+
+        with span('versions'):
+            versions = manager.get_pathway_versions(process_request(request))
+
+        # The view reports the missing pathways
+        if versions is None:
+            return view(*args, **kwargs)
+
+        key = get_response_key(request.path, request.args, versions)
+        etag = get_etag(key)
+
+        for candidate in (etag, _get_gzip_etag(etag)):
+            if request.if_none_match.contains(candidate):
+                response = Response(status=304)
+                response.set_etag(candidate)
+                return _add_validation_headers(response)
+
+        entry = manager.response_cache.get(key)
+
+        if entry is None:
+            response = current_app.make_response(view(*args, **kwargs))
+
+            if response.status_code != 200:
+                return response
+
+            # Files are read back in memory whereas generated responses are streamed as they are
+            if response.is_streamed and not response.direct_passthrough:
+                response.set_etag(etag)
+                return _add_validation_headers(response)
+
+            response.direct_passthrough = False
+
+            with span('compress'):
+                entry = CachedResponse.from_response(response)
+
+            manager.response_cache.set(key, entry, size=len(entry.body))
+
+        return entry.to_response(etag, use_gzip='gzip' in request.accept_encodings)
+
+    return decorated_view
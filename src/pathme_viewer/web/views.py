@@ -3,12 +3,13 @@
 """This module contains the PathMe views."""
 
 import datetime
+import json
 import logging
 import sys
-from operator import itemgetter
 
 from flask import (
     Blueprint,
+    Response,
     abort,
     current_app,
     jsonify,
@@ -16,19 +17,27 @@ from flask import (
     request
 )
 from flask_admin.contrib.sqla import ModelView
-from networkx import NetworkXNoPath, all_simple_paths, betweenness_centrality, shortest_path
 from pkg_resources import resource_filename
-from pybel import from_bytes
 from pybel.struct import get_random_path
 from pybel.struct.mutation.collapse import collapse_to_genes
 from pybel.struct.mutation.induction import get_subgraph_by_annotations
 
+from pathme_viewer.centrality import get_betweenness_centrality
 from pathme_viewer.constants import (
     COLLAPSE_TO_GENES,
     DATABASE_STYLE_DICT,
     DATABASE_URL_DICT,
+    NODE_SUGGESTION_LIMIT,
+    NODE_SUGGESTION_MAX_LIMIT,
+    PATHS_BATCH_MAX_PAIRS,
+    PATHS_MAX_PATHS,
+    PATHS_MAX_PATHS_LIMIT,
     PATHS_METHOD,
+    PATHS_TIME_BUDGET,
+    PATHS_TIME_BUDGET_LIMIT,
+    PATHWAYS_ARGUMENT,
     RANDOM_PATH,
+    STREAM,
     UNDIRECTED
 )
 from pathme_viewer.graph_utils import (
@@ -41,6 +50,12 @@ from pathme_viewer.graph_utils import (
     process_overlap_for_venn_diagram
 )
 from pathme_viewer.models import Pathway
+from pathme_viewer.overlap import INTERSECTION, JACCARD, get_overlap_matrix
+from pathme_viewer.paths import PathEnumeration, get_path_index, is_node_pair_list
+from pathme_viewer.jobs import SUCCESS, set_progress
+from pathme_viewer.metrics import span
+from pathme_viewer.web.background import asynchronous_view, get_job_json
+from pathme_viewer.web.response_cache import cached_response
 
 log = logging.getLogger(__name__)
 time_instantiated = str(datetime.datetime.now())
@@ -89,6 +104,8 @@ class PathwayView(ModelView):
         Pathway.authors,
         Pathway.description,
     )
+    # The pickled graphs are not editable and loading them would slow down the forms
+    form_excluded_columns = ('blob', 'nodes')
 
 
 """Redirection to home page"""
@@ -142,6 +159,7 @@ def tutorial():
 def delete_pathways():
     """Delete all pathways."""
     current_app.pathme_manager.delete_all_pathways()
+    current_app.nodes.reset()
 
     return jsonify(
         status=200,
@@ -158,19 +176,7 @@ def get_pathways_with_node():
     if not bel_nodes:
         abort(500, '"{}" is not a valid input for this input'.format(request.args))
 
-    pathways = set()
-
-    for pathway in current_app.pathme_manager.get_all_pathways():
-        # Load networkX graph
-        graph = from_bytes(pathway.blob)
-
-        # Check if node is in the pathway
-        for node in graph:
-
-            if node.as_bel() not in bel_nodes:
-                continue
-
-            pathways.add(pathway)
+    pathways = current_app.pathme_manager.get_pathways_by_nodes(bel_nodes)
 
     return render_template(
         'pathway_table.html',
@@ -181,6 +187,7 @@ def get_pathways_with_node():
 
 
 @pathme.route('/pathway/overlap')
+@cached_response
 def calculate_overlap():
     """Return the overlap between different pathways in order to generate a Venn diagram."""
     pathways = process_request(request)
@@ -188,9 +195,10 @@ def calculate_overlap():
     if len(pathways) < 2:
         return abort(500, 'Only one pathway has been submitted!')
 
-    pathway_data = prepare_venn_diagram_data(current_app.pathme_manager, pathways)
+    with span('overlap'):
+        pathway_data = prepare_venn_diagram_data(current_app.pathme_manager, pathways)
 
-    processed_venn_diagram = process_overlap_for_venn_diagram(pathway_data)
+        processed_venn_diagram = process_overlap_for_venn_diagram(pathway_data)
 
     return render_template(
         'pathway_overlap.html',
@@ -199,6 +207,110 @@ def calculate_overlap():
     )
 
 
+@pathme.route('/api/pathway/overlap_matrix')
+def get_pathway_overlap_matrix():
+    """Stream the gene set overlaps between all pairs of the selected pathways as JSON lines, one per pathway.
+
+    ---
+    tags:
+        - pathway
+
+    parameters:
+      - name: pathways[]
+        description: pathway resource/name pair. All the pathways of the selected databases if not given
+        required: false
+        type: str
+
+      - name: resources[]
+        description: pathway resource/name pair
+        required: false
+        type: str
+
+      - name: databases[]
+        description: databases whose pathways are selected if no pathway is given. All databases if not given
+        required: false
+        type: str
+
+      - name: metric
+        description: score used to filter and rank the overlaps (jaccard or intersection). Defaults to jaccard
+        required: false
+        type: str
+
+      - name: threshold
+        description: minimum score of the overlaps reported
+        required: false
+        type: number
+
+      - name: top_k
+        description: maximum number of overlaps reported per pathway
+        required: false
+        type: integer
+
+      - name: offset
+        description: index of the first pathway reported
+        required: false
+        type: integer
+
+      - name: limit
+        description: maximum number of pathways reported
+        required: false
+        type: integer
+    """
+    manager = current_app.pathme_manager
+
+    if request.args.getlist(PATHWAYS_ARGUMENT):
+        pathways = manager.get_pathways_by_ids(process_request(request))
+
+    elif request.args.getlist('databases[]'):
+        pathways = [
+            pathway
+            for database in request.args.getlist('databases[]')
+            for pathway in manager.get_pathways_from_resource(database)
+        ]
+
+    else:
+        pathways = manager.get_all_pathways()
+
+    metric = request.args.get('metric', default=JACCARD)
+
+    if metric not in {JACCARD, INTERSECTION}:
+        abort(500, '"{}" is not a valid metric. Please use "{}" or "{}"'.format(metric, JACCARD, INTERSECTION))
+
+    offset = request.args.get('offset', default=0, type=int)
+    limit = request.args.get('limit', type=int)
+
+    matrix = get_overlap_matrix(manager, pathways)
+
+    rows = matrix.iterate_rows(
+        metric=metric,
+        threshold=request.args.get('threshold', default=0.0, type=float),
+        top_k=request.args.get('top_k', type=int),
+        start=offset,
+        stop=None if limit is None else offset + limit,
+    )
+
+    def generate_lines():
+        for i, overlaps in rows:
+            resource_name, pathway_id = matrix.keys[i]
+
+            yield json.dumps({
+                'pathway_id': pathway_id,
+                'resource': resource_name,
+                'size': int(matrix.sizes[i]),
+                'overlaps': [
+                    {
+                        'pathway_id': matrix.keys[j][1],
+                        'resource': matrix.keys[j][0],
+                        'intersection': intersection,
+                        'jaccard': jaccard,
+                    }
+                    for j, intersection, jaccard in overlaps
+                ],
+            }) + '\n'
+
+    return Response(generate_lines(), mimetype='application/x-ndjson')
+
+
 @pathme.route('/pathme/viewer')
 def viewer():
     """PathMe page."""
@@ -239,8 +351,10 @@ def viewer():
 
 
 @pathme.route('/api/pathway/')
+@asynchronous_view
+@cached_response
 def get_network():
-    """Build a graph from request and sends it in the given format."""
+    """Build a graph from request and sends it in the given format. It runs in a background job with "async=true"."""
     pathways = process_request(request)
 
     graph = merge_pathways(pathways)
@@ -248,22 +362,26 @@ def get_network():
     annotations = get_annotations_from_request(request)
 
     if annotations:
-        graph = get_subgraph_by_annotations(graph, annotations)
+        with span('annotations'):
+            graph = get_subgraph_by_annotations(graph, annotations)
 
     if COLLAPSE_TO_GENES in request.args:
-        collapse_to_genes(graph)
+        with span('collapse'):
+            # The merged graph is shared with the cache so it is copied before collapsing it in place
+            if not annotations:
+                graph = graph.copy()
+
+            collapse_to_genes(graph)
 
     log.info(
         'Exporting merged graph with {} nodes and {} edges'.format(graph.number_of_nodes(), graph.number_of_edges())
     )
 
-    graph.name = 'Merged graph from {}'.format([pathway_name for pathway_name in pathways])
-    graph.version = '0.0.0'
-
-    return export_graph(graph, request.args.get('format'))
+    return export_graph(graph, request.args.get('format'), stream=STREAM in request.args)
 
 
 @pathme.route('/api/tree/')
+@cached_response
 def get_network_tree():
     """Build a graph and sends the annotation ready to be rendered in the tree."""
     pathways = process_request(request)
@@ -273,16 +391,24 @@ def get_network_tree():
     annotations = get_annotations_from_request(request)
 
     if annotations:
-        graph = get_subgraph_by_annotations(graph, annotations)
+        with span('annotations'):
+            graph = get_subgraph_by_annotations(graph, annotations)
 
     if COLLAPSE_TO_GENES in request.args:
-        collapse_to_genes(graph)
+        with span('collapse'):
+            # The merged graph is shared with the cache so it is copied before collapsing it in place
+            if not annotations:
+                graph = graph.copy()
+
+            collapse_to_genes(graph)
 
     # Return annotation in graph
-    return jsonify(get_tree_annotations(graph))
+    with span('serialize'):
+        return jsonify(get_tree_annotations(graph))
 
 
 @pathme.route('/api/pathway/paths')
+@asynchronous_view
 def get_paths():
     """Return array of shortest/all paths given a source node and target node both belonging in the graph
 
@@ -322,7 +448,8 @@ def get_paths():
 
       - name: paths_method
         in: path
-        description: The method by which paths are generated - either just the shortest path, or all paths
+        description: The method by which paths are generated - either just the shortest path, or all paths. All paths
+         are streamed as JSON lines, one per path, followed by a line telling if the enumeration was truncated
         required: false
         default: shortest
         schema:
@@ -330,16 +457,30 @@ def get_paths():
             enum:
               - all
               - shortest
+
+      - name: max_paths
+        description: The maximum number of paths returned by the all paths method
+        required: false
+        type: integer
+
+      - name: time_budget
+        description: The maximum number of seconds spent enumerating paths by the all paths method
+        required: false
+        type: number
+
+      - name: cursor
+        description: The cursor returned by a truncated enumeration of all paths, to get the next paths
+        required: false
+        type: str
+      - name: async
+        description: If "true", the request runs in a background job and a handle to poll it is returned
+        required: false
+        type: str
     """
     pathways = process_request(request)
 
-    graph = merge_pathways(pathways)
-
-    # Create hash to node info
-    hash_to_node = {
-        node.sha512: node
-        for node in graph
-    }
+    with span('index'):
+        index = get_path_index(current_app.pathme_manager, pathways)
 
     source_id = request.args.get('source')
     if source_id is None:
@@ -353,48 +494,144 @@ def get_paths():
     undirected = UNDIRECTED in request.args
     cutoff = request.args.get('cutoff', default=7, type=int)
 
-    source = hash_to_node.get(source_id)
-    target = hash_to_node.get(target_id)
+    source = index.get_index(source_id)
+    target = index.get_index(target_id)
 
-    if source not in graph or target not in graph:
+    if source is None or target is None:
         log.info('Source/target node not in network')
-        log.info('Nodes in network: %s', graph.nodes())
         abort(500, 'Source/target node not in network')
 
-    if undirected:
-        graph = graph.to_undirected()
-
     if method == 'all':
-        paths = all_simple_paths(graph, source=source, target=target, cutoff=cutoff)
-        return jsonify([
-            [
-                node.sha512
-                for node in path
-            ]
-            for path in paths
-        ])
+        return _stream_all_paths(index, source, target, cutoff, undirected)
 
-    try:
-        paths = shortest_path(graph, source=source, target=target)
-    except NetworkXNoPath:
-        log.debug('No paths between: {} and {}'.format(source, target))
+    with span('search'):
+        path = index.shortest_path(source, target, undirected=undirected)
+
+    if path is None:
+        log.debug('No paths between: {} and {}'.format(source_id, target_id))
 
         # Returns normal message if it is not a random call from graph_controller.js
         if RANDOM_PATH not in request.args:
             return 'No paths between the selected nodes'
 
+        neighbors = index.get_neighbors(source, undirected=undirected)
+
         # In case the random node is an isolated one, returns it alone
-        if not graph.neighbors(source)[0]:
-            return jsonify([source])
+        if not neighbors:
+            return jsonify([source_id])
 
-        paths = shortest_path(graph, source=source, target=graph.neighbors(source)[0])
+        path = [source, neighbors[0]]
 
     return jsonify([
-        node.sha512
-        for node in paths
+        index.hashes[node]
+        for node in path
     ])
 
 
+def _stream_all_paths(index, source, target, cutoff, undirected):
+    """Stream the simple paths between two nodes as JSON lines within the limits given in the request."""
+    max_paths = request.args.get('max_paths', default=PATHS_MAX_PATHS, type=int)
+    time_budget = request.args.get('time_budget', default=PATHS_TIME_BUDGET, type=float)
+
+    if not 0 < max_paths <= PATHS_MAX_PATHS_LIMIT:
+        abort(500, '"max_paths" must be between 1 and {}'.format(PATHS_MAX_PATHS_LIMIT))
+
+    if not 0 < time_budget <= PATHS_TIME_BUDGET_LIMIT:
+        abort(500, '"time_budget" must be between 0 and {} seconds'.format(PATHS_TIME_BUDGET_LIMIT))
+
+    enumeration = PathEnumeration(index, source, target, cutoff=cutoff, undirected=undirected)
+    paths = enumeration.iterate_paths(max_paths=max_paths, time_budget=time_budget, cursor=request.args.get('cursor'))
+
+    # The cursor is checked before the response starts so an invalid one gets an error
+    try:
+        first_path = next(paths, None)
+    except ValueError:
+        abort(500, 'Invalid cursor: {}'.format(request.args.get('cursor')))
+
+    def generate_lines():
+        number_of_paths = 0
+
+        if first_path is not None:
+            number_of_paths += 1
+            yield json.dumps({'path': [index.hashes[node] for node in first_path]}) + '\n'
+
+        for path in paths:
+            number_of_paths += 1
+            set_progress(number_of_paths / max_paths)
+            yield json.dumps({'path': [index.hashes[node] for node in path]}) + '\n'
+
+        yield json.dumps({
+            'paths': number_of_paths,
+            'truncated': enumeration.truncated,
+            'reason': enumeration.reason,
+            'cursor': enumeration.cursor,
+        }) + '\n'
+
+    return Response(generate_lines(), mimetype='application/x-ndjson')
+
+
+@pathme.route('/api/pathway/paths/batch', methods=['POST'])
+def get_paths_batch():
+    """Return the shortest paths between many pairs of nodes of the merged graph.
+
+    ---
+    tags:
+        - paths
+        - pathway
+
+    parameters:
+      - name: pathways[]
+        description: pathway resource/name pair
+        required: true
+        type: str
+
+      - name: resources[]
+        description: pathway resource/name pair
+        required: true
+        type: str
+
+      - name: undirected
+
+      - name: body
+        in: body
+        description: JSON list of source and target identifier pairs
+        required: true
+        schema:
+            type: array
+            items:
+                type: array
+                items:
+                    type: string
+    """
+    pairs = request.get_json(silent=True)
+
+    if not is_node_pair_list(pairs):
+        abort(500, 'The body must be a JSON list of [source, target] pairs')
+
+    if len(pairs) > PATHS_BATCH_MAX_PAIRS:
+        abort(500, 'At most {} pairs can be requested at once'.format(PATHS_BATCH_MAX_PAIRS))
+
+    pathways = process_request(request)
+
+    index = get_path_index(current_app.pathme_manager, pathways)
+    undirected = UNDIRECTED in request.args
+
+    rv = []
+
+    for source_id, target_id in pairs:
+        source = index.get_index(source_id)
+        target = index.get_index(target_id)
+
+        # Unknown nodes and disconnected pairs get no path
+        path = None
+        if source is not None and target is not None:
+            path = index.shortest_path(source, target, undirected=undirected)
+
+        rv.append(None if path is None else [index.hashes[node] for node in path])
+
+    return jsonify(rv)
+
+
 @pathme.route('/api/pathway/paths/random')
 def get_random_paths():
     """Get random paths given the pathways in the graph
@@ -429,6 +666,7 @@ def get_random_paths():
 
 
 @pathme.route('/api/pathway/centrality')
+@asynchronous_view
 def get_nodes_by_betweenness_centrality():
     """Get a list of nodes with the top betweenness-centrality
 
@@ -453,6 +691,16 @@ def get_nodes_by_betweenness_centrality():
         description: The number of top between-nodes to return
         required: true
         type: integer
+
+      - name: samples
+        description: The number of pivots sampled to approximate the betweenness centrality. By default, it is exact
+         for small graphs and approximated for large ones
+        required: false
+        type: integer
+      - name: async
+        description: If "true", the request runs in a background job and a handle to poll it is returned
+        required: false
+        type: str
     """
     node_number = request.args.get('node_number')
 
@@ -464,21 +712,96 @@ def get_nodes_by_betweenness_centrality():
     except:
         abort(500, '"node_number" could not be parsed {}'.format(node_number))
 
-    pathways = process_request(request)
+    samples = request.args.get('samples', type=int)
 
-    graph = merge_pathways(pathways)
+    if samples is not None and samples < 1:
+        abort(500, '"samples" must be a positive number')
 
-    if node_number > graph.number_of_nodes():
-        node_number = graph.number_of_nodes()
+    pathways = process_request(request)
 
-    bw_dict = betweenness_centrality(graph)
+    with span('centrality'):
+        ranking = get_betweenness_centrality(current_app.pathme_manager, pathways, samples=samples)
 
     return jsonify([
-        node.sha512
-        for node, score in sorted(bw_dict.items(), key=itemgetter(1), reverse=True)[:node_number]
+        node_hash
+        for node_hash, score in ranking[:node_number]
     ])
 
 
+@pathme.route('/api/job/<job_id>')
+def get_job(job_id):
+    """Return the status and progress of a background job.
+
+    ---
+    tags:
+        - job
+
+    parameters:
+      - name: job_id
+        in: path
+        description: The identifier of the job returned by a request with "async=true"
+        required: true
+        type: str
+    """
+    job = current_app.pathme_jobs.get(job_id)
+
+    if job is None:
+        abort(404, 'Job "{}" was not found. Its result may have expired'.format(job_id))
+
+    return jsonify(get_job_json(job))
+
+
+@pathme.route('/api/job/<job_id>/result')
+def get_job_result(job_id):
+    """Return the response of the request run by a background job once it has succeeded.
+
+    ---
+    tags:
+        - job
+
+    parameters:
+      - name: job_id
+        in: path
+        description: The identifier of the job returned by a request with "async=true"
+        required: true
+        type: str
+    """
+    job = current_app.pathme_jobs.get(job_id)
+
+    if job is None:
+        abort(404, 'Job "{}" was not found. Its result may have expired'.format(job_id))
+
+    if job.status != SUCCESS:
+        response = jsonify(get_job_json(job))
+        response.status_code = 202 if not job.done else 500
+        return response
+
+    return job.result.to_response(job.id, use_gzip='gzip' in request.accept_encodings)
+
+
+@pathme.route('/api/metrics')
+def get_metrics():
+    """Return the latency histograms of the requests and the statistics of the caches in the Prometheus text format.
+
+    ---
+    tags:
+        - metrics
+    """
+    manager = current_app.pathme_manager
+
+    caches = {
+        'graph': manager.graph_cache,
+        'merged_graph': manager.merged_graph_cache,
+        'path_index': manager.path_index_cache,
+        'centrality': manager.centrality_cache,
+        'response': manager.response_cache,
+    }
+
+    lines = current_app.pathme_metrics.iterate_prometheus_lines(caches=caches)
+
+    return Response(''.join(line + '\n' for line in lines), mimetype='text/plain; version=0.0.4')
+
+
 @pathme.route('/api/autocompletion/pathway_name')
 def api_pathway_autocompletion_resource_specific():
     """Autocompletion for pathway name given a database.
@@ -496,7 +819,7 @@ def api_pathway_autocompletion_resource_specific():
     if not q or not resource:
         return jsonify([])
 
-    query_results = current_app.pathme_manager.query_pathway_by_name_and_resource(q, resource, limit=10)
+    query_results = current_app.pathme_manager.search_pathways(q, resource_name=resource, limit=10)
 
     if not query_results:
         return jsonify([])
@@ -513,6 +836,33 @@ def api_pathways_in_database():
     return jsonify(current_app.pathme_manager.count_pathways())
 
 
+@pathme.route('/api/database/contradictions')
+def api_contradictions_in_database():
+    """Return the node pairs with contradictory relations across all the pathways in the database.
+
+    ---
+    tags:
+        - pathway
+
+    parameters:
+      - name: offset
+        description: index of the first node pair reported
+        required: false
+        type: integer
+
+      - name: limit
+        description: maximum number of node pairs reported
+        required: false
+        type: integer
+    """
+    offset = request.args.get('offset', default=0, type=int)
+    limit = request.args.get('limit', type=int)
+
+    report = current_app.pathme_manager.get_contradiction_report()
+
+    return jsonify(report[offset:] if limit is None else report[offset:offset + limit])
+
+
 @pathme.route('/api/node/suggestion/')
 def get_node_suggestion():
     """Suggests a node
@@ -526,26 +876,27 @@ def get_node_suggestion():
         description: The search term
         required: true
         type: string
+
+      - name: limit
+        in: query
+        description: The maximum number of suggestions (capped by the server)
+        required: false
+        type: integer
     """
     q = request.args.get('q')
 
     if not q:
         return jsonify([])
 
-    nodes = {
-        node
-        for bel, node in current_app.nodes.items()
-        if q.lower() in bel.lower()
-    }
-
-    matching_nodes = [{
-        "text": node.as_bel(),
-        "id": node.as_bel()
-    }
-        for node in nodes
-    ]
-
-    if not matching_nodes:
-        return jsonify([])
+    limit = max(1, min(
+        request.args.get('limit', default=NODE_SUGGESTION_LIMIT, type=int),
+        NODE_SUGGESTION_MAX_LIMIT
+    ))
 
-    return jsonify(sorted(matching_nodes, key=lambda k: len(k["text"])))
+    return jsonify([
+        {
+            "text": bel,
+            "id": bel
+        }
+        for bel in current_app.nodes.suggest(q, limit=limit)
+    ])
@@ -4,6 +4,7 @@
 
 import logging
 import os
+import sys
 import time
 
 from flasgger import Swagger
@@ -14,9 +15,25 @@ from flask_security import Security
 from flask_sqlalchemy import SQLAlchemy
 from flask_wtf.csrf import CSRFProtect
 
-from ..constants import DEFAULT_CACHE_CONNECTION
+from ..constants import (
+    DEFAULT_CACHE_CONNECTION,
+    GRAPH_CACHE_MAX_ENTRIES,
+    GRAPH_CACHE_MAX_SIZE,
+    JOBS_MAX_PENDING,
+    JOBS_MAX_WORKERS,
+    JOBS_RESULT_TTL,
+    MERGED_GRAPH_CACHE_MAX_ENTRIES,
+    MERGED_GRAPH_CACHE_MAX_SIZE,
+    MERGED_GRAPH_CACHE_TTL,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_MAX_SIZE,
+    SERVER_TIMING,
+)
+from ..jobs import JobQueue
 from ..manager import Manager
 from ..models import Base, Pathway
+from ..nodes import NodeStore
+from ..web.instrumentation import init_metrics
 from ..web.views import redirect, pathme, PathwayView
 
 log = logging.getLogger(__name__)
@@ -26,6 +43,25 @@ security = Security()
 swagger = Swagger()
 
 
+def get_peak_memory_usage():
+    """Return the peak resident memory of the process in megabytes.
+
+    :rtype: Optional[float]
+    """
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes whereas macOS reports bytes
+    if sys.platform == 'darwin':
+        return round(max_rss / (1024 * 1024), 1)
+
+    return round(max_rss / 1024, 1)
+
+
 class PathMeSQLAlchemy(SQLAlchemy):
     """PathMe"""
 
@@ -33,14 +69,31 @@ class PathMeSQLAlchemy(SQLAlchemy):
         """Overwrite init app method."""
         super().init_app(app)
 
-        self.manager = Manager(engine=self.engine, session=self.session)
-
-
-def create_app(template_folder=None, static_folder=None):
+        self.manager = Manager(
+            engine=self.engine,
+            session=self.session,
+            graph_cache_max_entries=app.config.get('PATHME_GRAPH_CACHE_MAX_ENTRIES', GRAPH_CACHE_MAX_ENTRIES),
+            graph_cache_max_size=app.config.get('PATHME_GRAPH_CACHE_MAX_SIZE', GRAPH_CACHE_MAX_SIZE),
+            merged_graph_cache_max_entries=app.config.get(
+                'PATHME_MERGED_GRAPH_CACHE_MAX_ENTRIES', MERGED_GRAPH_CACHE_MAX_ENTRIES
+            ),
+            merged_graph_cache_max_size=app.config.get(
+                'PATHME_MERGED_GRAPH_CACHE_MAX_SIZE', MERGED_GRAPH_CACHE_MAX_SIZE
+            ),
+            merged_graph_cache_ttl=app.config.get('PATHME_MERGED_GRAPH_CACHE_TTL', MERGED_GRAPH_CACHE_TTL),
+            response_cache_max_entries=app.config.get(
+                'PATHME_RESPONSE_CACHE_MAX_ENTRIES', RESPONSE_CACHE_MAX_ENTRIES
+            ),
+            response_cache_max_size=app.config.get('PATHME_RESPONSE_CACHE_MAX_SIZE', RESPONSE_CACHE_MAX_SIZE),
+        )
+
+
+def create_app(template_folder=None, static_folder=None, connection=None):
     """Create the Flask application.
 
     :type template_folder: Optional[str]
     :type static_folder: Optional[str]
+    :param Optional[str] connection: SQLAlchemy connection string. Defaults to the PathMe database
     :rtype: flask.Flask
     """
     t = time.time()
@@ -51,7 +104,7 @@ def create_app(template_folder=None, static_folder=None):
         static_folder=(static_folder or '../static'),
     )
 
-    app.config['SQLALCHEMY_DATABASE_URI'] = DEFAULT_CACHE_CONNECTION
+    app.config['SQLALCHEMY_DATABASE_URI'] = connection or DEFAULT_CACHE_CONNECTION
     app.config.setdefault("SQLALCHEMY_TRACK_MODIFICATIONS", False)
     app.config.update(
         SECURITY_REGISTERABLE=True,
@@ -88,15 +141,20 @@ def create_app(template_folder=None, static_folder=None):
 
     admin.add_view(PathwayView(Pathway, app.pathme_manager.session))
 
-    log.info('Caching nodes in app')
+    # Latency histograms of the requests exposed in /api/metrics
+    init_metrics(app, server_timing=app.config.get('PATHME_SERVER_TIMING', SERVER_TIMING))
+
+    # Expensive graph analytics requested with "async=true" run in the background
+    app.pathme_jobs = JobQueue(
+        max_workers=app.config.get('PATHME_JOBS_MAX_WORKERS', JOBS_MAX_WORKERS),
+        max_pending=app.config.get('PATHME_JOBS_MAX_PENDING', JOBS_MAX_PENDING),
+        result_ttl=app.config.get('PATHME_JOBS_RESULT_TTL', JOBS_RESULT_TTL),
+    )
 
-    app.nodes = {
-        node.as_bel(): node
-        for pathway in app.pathme_manager.get_all_pathway_graphs()
-        for node in pathway
-    }
+    # Nodes are streamed from the node table the first time they are needed
+    app.nodes = NodeStore(app.pathme_manager)
 
-    log.info('Done building %s in %.2f seconds', app, time.time() - t)
+    log.info('Done building %s in %.2f seconds (peak memory: %s MB)', app, time.time() - t, get_peak_memory_usage())
     return app
 
 
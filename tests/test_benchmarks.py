@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the comparison of benchmark runs."""
+
+import unittest
+
+from benchmarks.compare import ADDED, FAILED, IMPROVEMENT, REGRESSION, REMOVED, UNCHANGED, compare_results
+
+
+def make_results(**timings):
+    """Build the results of a run from the median timing or error of each benchmark."""
+    return {
+        'benchmarks': {
+            name: {'error': value} if isinstance(value, str) else {'median': value}
+            for name, value in timings.items()
+        }
+    }
+
+
+class TestCompare(unittest.TestCase):
+    """Tests for the comparison of benchmark runs."""
+
+    def test_status(self):
+        """Test the status of the benchmarks between two runs."""
+        baseline = make_results(slower=1.0, faster=1.0, same=1.0, noisy=0.0001, removed=1.0, failed=1.0)
+        current = make_results(slower=1.5, faster=0.5, same=1.1, noisy=0.0005, added=1.0, failed='ValueError')
+
+        self.assertEqual(
+            [
+                ('added', ADDED),
+                ('failed', FAILED),
+                ('faster', IMPROVEMENT),
+                ('noisy', UNCHANGED),
+                ('removed', REMOVED),
+                ('same', UNCHANGED),
+                ('slower', REGRESSION),
+            ],
+            [(name, status) for name, _, _, _, status in compare_results(baseline, current, threshold=0.2)]
+        )
+
+    def test_ratio(self):
+        """Test the ratio of the timings."""
+        (_, old, new, ratio, _), = compare_results(make_results(a=2.0), make_results(a=3.0))
+
+        self.assertEqual((2.0, 3.0, 1.5), (old, new, ratio))
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the in-memory caches."""
+
+import gzip
+import time
+import unittest
+
+from flask import Response
+from werkzeug.datastructures import MultiDict
+
+from pathme_viewer.cache import LRUCache
+from pathme_viewer.web.response_cache import CachedResponse, get_etag, get_response_key
+
+
+class TestLRUCache(unittest.TestCase):
+    """Tests for the least recently used cache."""
+
+    def test_entry_budget(self):
+        """Test that the least recently used entry is evicted."""
+        cache = LRUCache(max_entries=2)
+
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(1, cache.get('a'))
+
+        cache.set('c', 3)
+
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        self.assertEqual(1, cache.evictions)
+
+    def test_size_budget(self):
+        """Test that entries are evicted until the cache is within its size budget."""
+        cache = LRUCache(max_size=10)
+
+        cache.set('a', 1, size=4)
+        cache.set('b', 2, size=4)
+        cache.set('c', 3, size=4)
+
+        self.assertEqual(['b', 'c'], [key for key in ('a', 'b', 'c') if key in cache])
+        self.assertEqual(8, cache.size)
+
+        # Entries larger than the whole budget are not cached
+        cache.set('d', 4, size=11)
+        self.assertNotIn('d', cache)
+
+    def test_oversized_replacement(self):
+        """Test that replacing an entry with a value too large to be cached removes the stale entry."""
+        cache = LRUCache(max_size=10)
+
+        cache.set('a', 1, size=4)
+        cache.set('a', 2, size=11)
+
+        self.assertNotIn('a', cache)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(0, cache.size)
+
+    def test_counters(self):
+        """Test the hit/miss counters."""
+        cache = LRUCache()
+
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', 1)
+        self.assertEqual(1, cache.get('a'))
+
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_discard_where(self):
+        """Test removing entries by key."""
+        cache = LRUCache()
+
+        cache.set(('kegg', 'hsa00010'), 1)
+        cache.set(('kegg', 'hsa00020'), 2)
+        cache.set(('reactome', 'R-HSA-109581'), 3)
+
+        self.assertEqual(2, cache.discard_where(lambda key: key[0] == 'kegg'))
+        self.assertEqual(1, len(cache))
+
+    def test_ttl(self):
+        """Test that entries expire after their time to live."""
+        cache = LRUCache(ttl=0)
+
+        cache.set('a', 1)
+        time.sleep(0.01)
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(1, cache.expirations)
+        self.assertEqual(0, len(cache))
+
+
+class TestResponseCache(unittest.TestCase):
+    """Tests for the cache of the responses of the graph APIs."""
+
+    versions = (('kegg', 'hsa00010', '2018-01-01T00:00:00'),)
+
+    def test_key(self):
+        """Test that the order of the arguments does not change the key but their values and the versions do."""
+        args = MultiDict([('a', '1'), ('a', '2'), ('b', '3')])
+        key = get_response_key('/api/pathway/', args, self.versions)
+
+        self.assertEqual(
+            key,
+            get_response_key('/api/pathway/', MultiDict([('b', '3'), ('a', '2'), ('a', '1')]), self.versions)
+        )
+
+        other_versions = (('kegg', 'hsa00010', '2018-01-02T00:00:00'),)
+
+        for other_key in (
+                get_response_key('/api/tree/', args, self.versions),
+                get_response_key('/api/pathway/', MultiDict([('a', '1'), ('b', '3')]), self.versions),
+                get_response_key('/api/pathway/', args, other_versions),
+        ):
+            self.assertNotEqual(get_etag(key), get_etag(other_key))
+
+    def test_pathway_arguments(self):
+        """Test that the pathway arguments are left out of the key since the versions identify the pathways."""
+        args = MultiDict([('pathways[]', 'hsa00010'), ('resources[]', 'kegg'), ('format', 'bel')])
+
+        self.assertEqual(
+            ('/api/pathway/', (('format', ('bel',)),), self.versions),
+            get_response_key('/api/pathway/', args, self.versions)
+        )
+
+    def test_cached_response(self):
+        """Test that the bodies are gzipped with their headers and the representations have different entity tags."""
+        response = Response(
+            'a\tb\n', content_type='text/tab-separated-values', headers={'Content-Disposition': 'attachment'}
+        )
+        entry = CachedResponse.from_response(response)
+
+        self.assertEqual(b'a\tb\n', gzip.decompress(entry.body))
+
+        compressed = entry.to_response('abc')
+        self.assertEqual(entry.body, compressed.get_data())
+        self.assertEqual('gzip', compressed.headers['Content-Encoding'])
+        self.assertEqual('attachment', compressed.headers['Content-Disposition'])
+
+        plain = entry.to_response('abc', use_gzip=False)
+        self.assertEqual(b'a\tb\n', plain.get_data())
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual('text/tab-separated-values', plain.mimetype)
+
+        self.assertNotEqual(compressed.get_etag(), plain.get_etag())
+        self.assertTrue(plain.cache_control.no_cache)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the betweenness centrality service."""
+
+import unittest
+
+from pybel import BELGraph, to_bytes
+from pybel.dsl import protein
+
+from pathme_viewer.centrality import (
+    calculate_betweenness_centrality, get_betweenness_centrality, get_number_of_samples,
+)
+from pathme_viewer.constants import CENTRALITY_EXACT_MAX_NODES, CENTRALITY_SAMPLES
+from pathme_viewer.manager import Manager
+from pathme_viewer.models import hash_bel
+
+a, b, c, d = [protein(namespace='HGNC', name=name) for name in 'ABCD']
+
+
+class TestCentrality(unittest.TestCase):
+    """Tests for the betweenness centrality."""
+
+    def setUp(self):
+        """Build a path graph with a parallel edge."""
+        self.graph = BELGraph(name='Test', version='1.0.0')
+        self.graph.add_increases(a, b, citation='1', evidence='e')
+        self.graph.add_decreases(a, b, citation='2', evidence='e')
+        self.graph.add_increases(b, c, citation='1', evidence='e')
+        self.graph.add_increases(c, d, citation='1', evidence='e')
+
+    def test_number_of_samples(self):
+        """Test that the exact calculation is chosen for small graphs."""
+        self.assertIsNone(get_number_of_samples(CENTRALITY_EXACT_MAX_NODES))
+        self.assertEqual(CENTRALITY_SAMPLES, get_number_of_samples(CENTRALITY_EXACT_MAX_NODES + 1))
+        self.assertEqual(2, get_number_of_samples(4, samples=2))
+        self.assertIsNone(get_number_of_samples(4, samples=4))
+
+    def test_exact(self):
+        """Test the ranking of the exact betweenness centrality."""
+        samples, ranking = calculate_betweenness_centrality(self.graph)
+
+        self.assertIsNone(samples)
+        self.assertEqual(['p(HGNC:B)', 'p(HGNC:C)'], [bel for bel, score in ranking[:2]])
+        self.assertEqual(ranking[0][1], ranking[1][1])
+
+    def test_approximation_reproducible(self):
+        """Test that the sampled approximation is reproducible."""
+        self.assertEqual(
+            calculate_betweenness_centrality(self.graph, samples=2),
+            calculate_betweenness_centrality(self.graph, samples=2)
+        )
+
+    def test_precomputed(self):
+        """Test that the ranking of a single pathway is read from the scores precomputed at load time."""
+        manager = Manager.from_connection('sqlite://')
+
+        manager.create_pathway({
+            'pathway_id': 'hsa00010',
+            'resource_name': 'kegg',
+            'name': self.graph.name,
+            'version': self.graph.version,
+            'pybel_version': '0.13.2',
+            'number_of_nodes': self.graph.number_of_nodes(),
+            'number_of_edges': self.graph.number_of_edges(),
+            'blob': to_bytes(self.graph),
+            'nodes': {node.as_bel() for node in self.graph},
+            'centrality': calculate_betweenness_centrality(self.graph),
+        })
+
+        # Merging is not needed, so this works outside of the web application
+        ranking = get_betweenness_centrality(manager, {'hsa00010': 'kegg'})
+
+        self.assertEqual([hash_bel('p(HGNC:B)'), hash_bel('p(HGNC:C)')], [node for node, _ in ranking[:2]])
+        self.assertEqual(1, len(manager.centrality_cache))
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the streamed exports."""
+
+import json
+import unittest
+from xml.etree import ElementTree
+
+from pybel import BELGraph, to_bel_lines, to_csv
+from pybel.constants import DECREASES, INCREASES, RELATION
+from pybel.dsl import activity, complex_abundance, hgvs, protein
+from six import StringIO
+
+from pathme_viewer.export import iterate_graph_triplets
+from pathme_viewer.graph_utils import iterate_bel, iterate_csv, iterate_graphml, iterate_json, to_json_custom
+
+a, b, c = [protein(namespace='HGNC', name=name) for name in ('A', 'B', 'C<&>')]
+
+
+class TestStreamedExport(unittest.TestCase):
+    """Tests that the streamed exports are equal to the in-memory ones."""
+
+    def setUp(self):
+        """Build a small BEL graph."""
+        self.graph = BELGraph(name='Test', version='1.0.0')
+        self.graph.add_increases(a, b, citation='1', evidence='e')
+        self.graph.add_decreases(a, b, citation='2', evidence='e')
+        self.graph.add_association(b, c, citation='3', evidence='e')
+
+    def test_json(self):
+        """Test the JSON of the network explorer."""
+        self.assertEqual(
+            json.loads(json.dumps(to_json_custom(self.graph))),
+            json.loads(''.join(iterate_json(self.graph)))
+        )
+
+    def test_bel(self):
+        """Test the BEL Script."""
+        self.assertEqual('\n'.join(to_bel_lines(self.graph)) + '\n', ''.join(iterate_bel(self.graph)))
+
+    def test_csv(self):
+        """Test the tab-separated edge list."""
+        sio = StringIO()
+        to_csv(self.graph, sio)
+
+        self.assertEqual(sio.getvalue(), ''.join(iterate_csv(self.graph)))
+
+    def test_graphml(self):
+        """Test that the GraphML is well formed and contains all nodes and edges."""
+        root = ElementTree.fromstring(''.join(iterate_graphml(self.graph)).encode('utf-8'))
+
+        namespace = '{http://graphml.graphdrawing.org/xmlns}'
+        graph = root.find(namespace + 'graph')
+
+        self.assertEqual(3, len(graph.findall(namespace + 'node')))
+        self.assertEqual(self.graph.number_of_edges(), len(graph.findall(namespace + 'edge')))
+
+    def test_triplets(self):
+        """Test the triplets of the whole database export."""
+        self.assertEqual(
+            {
+                ('p(HGNC:A)', 'increases', 'p(HGNC:B)'),
+                ('p(HGNC:A)', 'decreases', 'p(HGNC:B)'),
+                ('p(HGNC:B)', 'association', 'p(HGNC:"C<&>")'),
+            },
+            set(iterate_graph_triplets(self.graph))
+        )
+
+
+class TestNetworkExplorerJson(unittest.TestCase):
+    """Tests for the JSON of the network explorer."""
+
+    def setUp(self):
+        """Build a graph with a variant, a complex, a modifier and an association in both directions."""
+        self.variant = protein(namespace='HGNC', name='A', variants=[hgvs('p.Ala1Gly')])
+        self.complex = complex_abundance([a, b])
+
+        self.graph = BELGraph(name='Test', version='1.0.0')
+        self.graph.add_increases(self.variant, b, citation='1', evidence='e', subject_modifier=activity('kin'))
+        self.graph.add_decreases(self.complex, c, citation='2', evidence='e')
+        self.graph.add_association(b, c, citation='3', evidence='e')
+        self.graph.add_association(c, b, citation='3', evidence='e')
+
+    def test_nodes(self):
+        """Test that the nodes are sorted by BEL and identified by their SHA-512."""
+        result = to_json_custom(self.graph)
+
+        bels = [node.as_bel() for node in sorted(self.graph, key=lambda node: node.as_bel())]
+        self.assertEqual(bels, [node['bel'] for node in result['nodes']])
+
+        for node in result['nodes']:
+            self.assertEqual(node['bel'], node.get('cname', node['bel']))
+
+        named = {node['bel']: node for node in result['nodes']}
+        self.assertEqual(self.variant.sha512, named[self.variant.as_bel()]['id'])
+        self.assertIn('cname', named[self.variant.as_bel()])
+        self.assertIn('cname', named[self.complex.as_bel()])
+        self.assertNotIn('cname', named[b.as_bel()])
+
+    def test_links(self):
+        """Test that the modifiers are kept and the association is only sent once."""
+        result = to_json_custom(self.graph)
+        bels = [node['bel'] for node in result['nodes']]
+
+        links = {
+            (bels[link['source']], bels[link['target']]): link
+            for link in result['links']
+        }
+
+        # The association is only kept from the smallest BEL string
+        association = tuple(sorted((b.as_bel(), c.as_bel())))
+        self.assertIn(association, links)
+        self.assertNotIn(association[::-1], links)
+
+        # The edges to the members of the variant and complex are added by PyBEL
+        self.assertIn((self.variant.as_bel(), b.as_bel()), links)
+        self.assertIn((self.complex.as_bel(), c.as_bel()), links)
+
+        modified = links[self.variant.as_bel(), b.as_bel()]
+        self.assertEqual(INCREASES, modified[RELATION])
+        self.assertEqual(
+            'act({}, ma(kin)) increases {}'.format(self.variant.as_bel(), b.as_bel()),
+            modified['contexts'][0]['bel'],
+        )
+        self.assertEqual(DECREASES, links[self.complex.as_bel(), c.as_bel()][RELATION])
+        self.assertNotIn(RELATION, links[association])
+
+    def test_stream(self):
+        """Test that the streamed JSON is equal to the in-memory one."""
+        self.assertEqual(
+            json.loads(json.dumps(to_json_custom(self.graph))),
+            json.loads(''.join(iterate_json(self.graph)))
+        )
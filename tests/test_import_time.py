@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the start-up time of the package."""
+
+import unittest
+
+from pathme_viewer import ManagerRegistry
+from pathme_viewer.import_time import get_package_times, parse_import_times
+
+REPORT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _bisect
+import time:       300 |        420 | bisect
+import time:        50 |         50 |     pathme_viewer.constants
+import time:       200 |        250 |   pathme_viewer.storage
+import time:       100 |        350 | pathme_viewer
+Unrelated warning
+"""
+
+
+class TestManagerRegistry(unittest.TestCase):
+    """Tests for the lazy registry of the ComPath managers."""
+
+    def test_lazy(self):
+        """Test that the managers are loaded on first access only."""
+        calls = []
+
+        def loader():
+            calls.append(None)
+            return {'kegg': object}
+
+        registry = ManagerRegistry(loader=loader)
+        self.assertFalse(registry.loaded)
+        self.assertEqual([], calls)
+
+        self.assertIs(object, registry['kegg'])
+        self.assertEqual(['kegg'], list(registry))
+        self.assertEqual(1, len(registry))
+        self.assertNotIn('reactome', registry)
+
+        self.assertTrue(registry.loaded)
+        self.assertEqual(1, len(calls))
+
+
+class TestImportTime(unittest.TestCase):
+    """Tests for the profiling of the imports."""
+
+    def test_parse(self):
+        """Test parsing the report of -X importtime."""
+        import_times = parse_import_times(REPORT.splitlines())
+
+        self.assertEqual(
+            [
+                ('_bisect', 120, 120, 1),
+                ('bisect', 300, 420, 0),
+                ('pathme_viewer.constants', 50, 50, 2),
+                ('pathme_viewer.storage', 200, 250, 1),
+                ('pathme_viewer', 100, 350, 0),
+            ],
+            [
+                (import_time.module, import_time.self_time, import_time.cumulative_time, import_time.depth)
+                for import_time in import_times
+            ]
+        )
+
+        self.assertEqual(
+            [('pathme_viewer', 350), ('bisect', 300), ('_bisect', 120)],
+            get_package_times(import_times)
+        )
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the background jobs."""
+
+import threading
+import time
+import unittest
+
+from pathme_viewer.jobs import FAILURE, PENDING, SUCCESS, JobQueue, JobQueueFull, set_progress
+
+
+def wait(job, timeout=5):
+    """Wait for a job to finish."""
+    deadline = time.monotonic() + timeout
+
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+class TestJobQueue(unittest.TestCase):
+    """Tests for the job queue."""
+
+    def setUp(self):
+        """Create a job queue with a single thread."""
+        self.queue = JobQueue(max_workers=1, max_pending=2, result_ttl=60)
+        self.event = threading.Event()
+
+    def tearDown(self):
+        """Stop the threads of the queue."""
+        self.event.set()
+        self.queue.shutdown()
+
+    def blocking_function(self, value):
+        """Return a value once the test lets it."""
+        set_progress(0.5)
+        self.event.wait(5)
+        return value
+
+    def test_result(self):
+        """Test that the result and the progress of a job are stored."""
+        job = self.queue.submit('a', self.blocking_function, 1)
+        self.assertIs(job, self.queue.get(job.id))
+
+        self.event.set()
+        wait(job)
+
+        self.assertEqual(SUCCESS, job.status)
+        self.assertEqual(1, job.result)
+        self.assertEqual(1.0, job.progress)
+        self.assertIsNotNone(job.to_json()['finished'])
+
+    def test_deduplication(self):
+        """Test that identical jobs are only run once."""
+        job = self.queue.submit('a', self.blocking_function, 1)
+
+        self.assertIs(job, self.queue.submit('a', self.blocking_function, 1))
+        self.assertIsNot(job, self.queue.submit('b', self.blocking_function, 2))
+
+        self.event.set()
+        wait(job)
+
+        # Finished jobs are reused until they expire
+        self.assertIs(job, self.queue.submit('a', self.blocking_function, 1))
+
+    def test_failure(self):
+        """Test that failed jobs keep their error and are run again."""
+        job = self.queue.submit('a', int, 'x')
+        wait(job)
+
+        self.assertEqual(FAILURE, job.status)
+        self.assertIn('invalid literal', job.error)
+        self.assertIsNot(job, self.queue.submit('a', int, 'x'))
+
+    def test_full(self):
+        """Test that jobs are rejected when too many are waiting."""
+        self.queue.submit('a', self.blocking_function, 1)
+        time.sleep(0.1)
+
+        # The first job is running so the next two are waiting
+        for key in 'bc':
+            self.assertEqual(PENDING, self.queue.submit(key, self.blocking_function, 1).status)
+
+        with self.assertRaises(JobQueueFull):
+            self.queue.submit('d', self.blocking_function, 1)
+
+    def test_expiry(self):
+        """Test that finished jobs are forgotten after the time to live of the results."""
+        self.queue.result_ttl = 0
+        job = self.queue.submit('a', int, '1')
+        wait(job)
+
+        time.sleep(0.01)
+        self.assertIsNone(self.queue.get(job.id))
+        self.assertEqual(0, len(self.queue))
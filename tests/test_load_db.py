@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the loading of the PathMe database."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pybel import BELGraph, to_pickle
+from pybel.dsl import protein
+
+from pathme_viewer.load_db import import_from_pathme, import_from_pickle
+from pathme_viewer.manager import Manager
+
+
+class MockBio2BELManager(object):
+    """Bio2BEL manager rebuilt from its connection in the worker processes."""
+
+    def __init__(self, connection):
+        """Init the manager."""
+        self.connection = connection
+
+    @property
+    def engine(self):
+        """Return an object with the URL of the connection, like a SQLAlchemy engine."""
+        return type('Engine', (), {'url': self.connection})()
+
+
+def edge_list_to_bel(path, hgnc_manager):
+    """Convert a file with a comma separated pair of HGNC symbols per line into a BEL graph."""
+    assert isinstance(hgnc_manager, MockBio2BELManager)
+
+    graph = BELGraph(name=os.path.basename(path), version=hgnc_manager.connection)
+    graph.document['description'] = str(os.getpid())
+
+    with open(path) as file:
+        for line in file:
+            source, target = line.strip().split(',')
+            graph.add_increases(protein('HGNC', source), protein('HGNC', target), citation='1', evidence='e')
+
+    return graph
+
+
+class TestImportFromPathMe(unittest.TestCase):
+    """Tests for the conversion of the PathMe files."""
+
+    def setUp(self):
+        """Write a folder of edge lists and create a manager with an in-memory database."""
+        self.folder = tempfile.mkdtemp()
+        self.manager = Manager.from_connection('sqlite://')
+
+        for file_name, content in (('hsa00010.xml', 'A,B\nB,C\n'), ('hsa00020.xml', 'C,D\n')):
+            with open(os.path.join(self.folder, file_name), 'w') as file:
+                file.write(content)
+
+    def tearDown(self):
+        """Remove the folder."""
+        shutil.rmtree(self.folder)
+
+    def test_workers(self):
+        """Test that the files are converted in a pool of processes."""
+        summary = import_from_pathme(
+            self.manager,
+            self.folder,
+            ['hsa00010.xml', 'hsa00020.xml'],
+            edge_list_to_bel,
+            'kegg',
+            workers=2,
+            hgnc_manager=MockBio2BELManager('sqlite:///hgnc.db'),
+        )
+
+        self.assertEqual(2, summary['added'])
+        self.assertEqual(0, summary['failed'])
+
+        pathway = self.manager.get_pathway_by_id('hsa00010', 'kegg')
+        self.assertEqual('sqlite:///hgnc.db', pathway.version)
+        self.assertEqual(2, pathway.number_of_edges)
+        self.assertNotEqual(str(os.getpid()), pathway.description)
+
+        # The files did not change
+        summary = import_from_pathme(
+            self.manager,
+            self.folder,
+            ['hsa00010.xml', 'hsa00020.xml'],
+            edge_list_to_bel,
+            'kegg',
+            workers=2,
+            hgnc_manager=MockBio2BELManager('sqlite:///hgnc.db'),
+        )
+
+        self.assertEqual(2, summary['unchanged'])
+
+
+class TestImportFromPickle(unittest.TestCase):
+    """Tests for the loading of the pickles of PathMe."""
+
+    def setUp(self):
+        """Write the flattened and unflattened pickles of a KEGG pathway and create a manager."""
+        self.folder = tempfile.mkdtemp()
+        self.manager = Manager.from_connection('sqlite://')
+
+        for variant, number_of_edges in (('flatten', 1), ('unflatten', 2)):
+            graph = BELGraph(name=variant, version='1.0.0')
+
+            for i in range(number_of_edges):
+                graph.add_increases(protein('HGNC', 'A'), protein('HGNC', str(i)), citation='1', evidence='e')
+
+            to_pickle(graph, os.path.join(self.folder, 'hsa00010_{}.pickle'.format(variant)))
+
+        self.files = sorted(os.listdir(self.folder))
+
+    def tearDown(self):
+        """Remove the folder."""
+        shutil.rmtree(self.folder)
+
+    def test_kegg_variants(self):
+        """Test that a single variant of each KEGG pathway is loaded and reloading it changes nothing."""
+        summary = import_from_pickle(self.manager, self.folder, self.files, 'kegg')
+        self.assertEqual(1, summary['added'])
+        self.assertEqual('unflatten', self.manager.get_pathway_by_id('hsa00010', 'kegg').name)
+
+        for files in (self.files, self.files[::-1]):
+            summary = import_from_pickle(self.manager, self.folder, files, 'kegg')
+            self.assertEqual({'unchanged': 1}, dict(+summary))
+
+        summary = import_from_pickle(self.manager, self.folder, self.files, 'kegg', flatten=True)
+        self.assertEqual(1, summary['updated'])
+        self.assertEqual('flatten', self.manager.get_pathway_by_id('hsa00010', 'kegg').name)
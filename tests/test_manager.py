@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the PathMe manager."""
+
+import unittest
+
+from pybel import BELGraph, to_bytes
+from pybel.dsl import protein, rna
+from sqlalchemy import inspect
+
+from pathme_viewer.graph_utils import get_gene_bels, get_relation_summary
+from pathme_viewer.manager import Manager
+from pathme_viewer.search import FTS_TABLE_NAME, SQLiteFTSBackend, TokenIndexBackend
+
+
+def make_pathway_dict(pathway_id, graph):
+    """Build the dictionary used to create a KEGG pathway from a BEL graph."""
+    return {
+        'pathway_id': pathway_id,
+        'resource_name': 'kegg',
+        'name': graph.name,
+        'version': graph.version,
+        'pybel_version': '0.13.2',
+        'number_of_nodes': graph.number_of_nodes(),
+        'number_of_edges': graph.number_of_edges(),
+        'blob': to_bytes(graph),
+        'nodes': {node.as_bel() for node in graph},
+        'relations': get_relation_summary(graph),
+        'genes': get_gene_bels(graph.copy()),
+    }
+
+
+class TestManager(unittest.TestCase):
+    """Tests for the manager."""
+
+    def setUp(self):
+        """Create a manager with an in-memory database containing a pathway."""
+        self.manager = Manager.from_connection('sqlite://')
+
+        self.graph = BELGraph(name='Glycolysis', version='1.0.0')
+        self.graph.add_increases(protein('HGNC', 'A'), protein('HGNC', 'B'), citation='1', evidence='e')
+        self.graph.add_increases(rna('HGNC', 'B'), protein('HGNC', 'C'), citation='1', evidence='e')
+
+        self.manager.create_pathway(make_pathway_dict('hsa00010', self.graph))
+        self.manager.session.expunge_all()
+
+    def test_blob_deferred(self):
+        """Test that the pickled graphs are only loaded when requested."""
+        pathway = self.manager.get_pathway_by_id('hsa00010', 'kegg')
+        self.assertIn('blob', inspect(pathway).unloaded)
+
+        self.assertEqual(1, self.manager.count_pathways_from_resource('kegg'))
+        self.assertIn('blob', inspect(self.manager.get_pathways_from_resource('kegg')[0]).unloaded)
+
+        # Deferred columns are loaded on access
+        self.assertEqual(self.graph.number_of_edges(), pathway.as_bel().number_of_edges())
+
+    def test_blob_loaded(self):
+        """Test the blob-loading queries."""
+        pathway = self.manager.get_pathway_with_blob('hsa00010', 'kegg')
+        self.assertNotIn('blob', inspect(pathway).unloaded)
+
+        pathways = list(self.manager.iterate_pathways_with_blobs(resource_name='kegg'))
+        self.assertEqual(1, len(pathways))
+        self.assertNotIn('blob', inspect(pathways[0]).unloaded)
+
+    def test_reindex(self):
+        """Test that reindexing in batches rebuilds the indexes without keeping the pathways in the session."""
+        second = BELGraph(name='Second', version='1.0.0')
+        second.add_increases(protein('HGNC', 'C'), protein('HGNC', 'D'), citation='1', evidence='e')
+        self.manager.create_pathway(make_pathway_dict('hsa00020', second))
+
+        self.assertEqual(2, self.manager.reindex(batch_size=1))
+        self.assertEqual(0, len(self.manager.session.identity_map))
+
+        pathway = self.manager.get_pathway_by_id('hsa00020', 'kegg')
+        self.assertEqual({'p(HGNC:C)', 'p(HGNC:D)'}, {node.bel for node in pathway.nodes})
+        self.assertEqual({pathway: {'g(HGNC:C)', 'g(HGNC:D)'}}, self.manager.get_gene_sets([pathway]))
+
+    def test_search_index(self):
+        """Test that the search index is only created by an explicit build, which repairs a drifted index."""
+        self.assertIsInstance(self.manager.search_backend, TokenIndexBackend)
+        self.assertNotIn(FTS_TABLE_NAME, self.manager.engine.table_names())
+        self.assertEqual(['Glycolysis'], [pathway.name for pathway in self.manager.search_pathways('glyco')])
+
+        self.manager.build_search_index()
+        self.assertIsInstance(self.manager.search_backend, SQLiteFTSBackend)
+
+        # Managers of a database with a search index use it
+        manager = Manager(self.manager.engine, self.manager.session)
+        self.assertIsInstance(manager.search_backend, SQLiteFTSBackend)
+
+        manager.search_backend.clear()
+        self.assertEqual([], manager.search_pathways('glyco'))
+
+        manager.build_search_index()
+        self.assertEqual(['Glycolysis'], [pathway.name for pathway in manager.search_pathways('glyco')])
+
+    def test_gene_sets(self):
+        """Test that the gene sets are stored collapsed to genes and removed with their pathways."""
+        pathway = self.manager.get_pathway_by_id('hsa00010', 'kegg')
+
+        self.assertEqual(
+            {pathway: {'g(HGNC:A)', 'g(HGNC:B)', 'g(HGNC:C)'}},
+            self.manager.get_gene_sets([pathway])
+        )
+
+        self.manager.delete_pathway('hsa00010', 'kegg')
+        self.assertEqual({}, self.manager.get_gene_sets([pathway]))
+
+    def test_pathway_versions(self):
+        """Test that the versions of the pathways are their creation timestamps and missing pathways are detected."""
+        pathway = self.manager.get_pathway_by_id('hsa00010', 'kegg')
+
+        self.assertEqual(
+            (('kegg', 'hsa00010', pathway.created.isoformat()),),
+            self.manager.get_pathway_versions({'hsa00010': 'kegg'})
+        )
+        self.assertIsNone(self.manager.get_pathway_versions({'hsa00010': 'reactome'}))
+        self.assertIsNone(self.manager.get_pathway_versions({'hsa00010': 'kegg', 'hsa00020': 'kegg'}))
+
+
+a, b, c, d = [protein('HGNC', name) for name in 'ABCD']
+
+
+class TestContradictions(unittest.TestCase):
+    """Tests for the relation index."""
+
+    def setUp(self):
+        """Create pathways with contradictions within a pathway and between pathways."""
+        self.manager = Manager.from_connection('sqlite://')
+
+        first = BELGraph(name='First', version='1.0.0')
+        first.add_increases(a, b, citation='1', evidence='e')
+        first.add_increases(b, c, citation='1', evidence='e')
+        first.add_decreases(c, d, citation='1', evidence='e')
+        first.add_increases(c, d, citation='2', evidence='e')
+
+        second = BELGraph(name='Second', version='1.0.0')
+        second.add_decreases(a, b, citation='1', evidence='e')
+        second.add_increases(b, c, citation='2', evidence='e')
+
+        third = BELGraph(name='Third', version='1.0.0')
+        third.add_association(a, b, citation='1', evidence='e')
+
+        for pathway_id, graph in (('hsa1', first), ('hsa2', second), ('hsa3', third)):
+            self.manager.create_pathway(make_pathway_dict(pathway_id, graph))
+
+    def get_pathways(self, *pathway_ids):
+        """Return the KEGG pathways with the given identifiers."""
+        return [self.manager.get_pathway_by_id(pathway_id, 'kegg') for pathway_id in pathway_ids]
+
+    def test_merge(self):
+        """Test the contradictions of merged pathways."""
+        self.assertEqual(
+            [(c.sha512, d.sha512, {'increases', 'decreases'})],
+            self.manager.get_contradictions(self.get_pathways('hsa1')),
+        )
+        self.assertEqual(
+            sorted([
+                (a.sha512, b.sha512, {'increases', 'decreases'}),
+                (c.sha512, d.sha512, {'increases', 'decreases'}),
+            ]),
+            self.manager.get_contradictions(self.get_pathways('hsa1', 'hsa2')),
+        )
+        self.assertEqual([], self.manager.get_contradictions(self.get_pathways('hsa2', 'hsa3')))
+
+    def test_not_indexed(self):
+        """Test that pathways loaded without relations are reported."""
+        graph = BELGraph(name='Fourth', version='1.0.0')
+        graph.add_increases(a, b, citation='1', evidence='e')
+
+        pathway_dict = make_pathway_dict('hsa4', graph)
+        del pathway_dict['relations']
+        self.manager.create_pathway(pathway_dict)
+
+        self.assertIsNone(self.manager.get_contradictions(self.get_pathways('hsa1', 'hsa4')))
+
+    def test_report(self):
+        """Test the contradiction report of the whole database."""
+        self.assertEqual(
+            [
+                {
+                    'source': 'p(HGNC:A)',
+                    'target': 'p(HGNC:B)',
+                    'relations': ['association', 'decreases', 'increases'],
+                    'pathways': [('kegg', 'hsa1'), ('kegg', 'hsa2'), ('kegg', 'hsa3')],
+                },
+                {
+                    'source': 'p(HGNC:C)',
+                    'target': 'p(HGNC:D)',
+                    'relations': ['decreases', 'increases'],
+                    'pathways': [('kegg', 'hsa1')],
+                },
+            ],
+            self.manager.get_contradiction_report(),
+        )
+
+        self.manager.delete_pathway('hsa1', 'kegg')
+        self.assertEqual([], self.manager.get_contradiction_report())
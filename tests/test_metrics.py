@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the timing instrumentation."""
+
+import unittest
+
+from pathme_viewer.cache import LRUCache
+from pathme_viewer.metrics import Histogram, MetricsRegistry, span, start_timer, stop_timer
+
+
+class TestPhaseTimer(unittest.TestCase):
+    """Tests for the timing of the phases of a request."""
+
+    def tearDown(self):
+        """Stop the timer of the thread."""
+        stop_timer()
+
+    def test_span(self):
+        """Test that repeated phases are summed in order of first occurrence."""
+        timer = start_timer()
+
+        for phase in ('db', 'decode', 'db'):
+            with span(phase):
+                pass
+
+        self.assertEqual(['db', 'decode'], list(timer.phases))
+        self.assertIs(timer, stop_timer())
+
+        server_timing = timer.get_server_timing(total=0.0123)
+        self.assertTrue(server_timing.startswith('db;dur='))
+        self.assertTrue(server_timing.endswith(', total;dur=12.3'))
+
+    def test_no_timer(self):
+        """Test that spans do nothing outside of a request, even if the phase fails."""
+        with self.assertRaises(ValueError):
+            with span('db'):
+                raise ValueError
+
+        self.assertIsNone(stop_timer())
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Tests for the latency histograms."""
+
+    def test_histogram(self):
+        """Test that the counts of the buckets are cumulative."""
+        histogram = Histogram(buckets=(0.1, 1.0))
+
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+
+        self.assertEqual([('0.1', 2), ('1.0', 3), ('+Inf', 4)], list(histogram.iterate_cumulative_counts()))
+        self.assertEqual(4, histogram.count)
+        self.assertAlmostEqual(2.65, histogram.sum)
+
+    def test_prometheus(self):
+        """Test the Prometheus text format."""
+        registry = MetricsRegistry(buckets=(0.1,))
+        registry.observe_request('get_network', 200, 0.05, phases={'db': 0.01})
+        registry.observe_request('get_network', 500, 0.5)
+
+        cache = LRUCache()
+        cache.set('a', 1, size=3)
+        cache.get('a')
+
+        lines = list(registry.iterate_prometheus_lines(caches={'graph': cache}))
+
+        for line in (
+                'pathme_requests_total{endpoint="get_network",status="200"} 1',
+                'pathme_requests_total{endpoint="get_network",status="500"} 1',
+                'pathme_request_duration_seconds_bucket{endpoint="get_network",le="0.1"} 1',
+                'pathme_request_duration_seconds_bucket{endpoint="get_network",le="+Inf"} 2',
+                'pathme_request_duration_seconds_count{endpoint="get_network"} 2',
+                'pathme_phase_duration_seconds_count{endpoint="get_network",phase="db"} 1',
+                'pathme_cache_hits_total{cache="graph"} 1',
+                'pathme_cache_size{cache="graph"} 3',
+        ):
+            self.assertIn(line, lines)
+
+        self.assertIn('# TYPE pathme_request_duration_seconds histogram', lines)
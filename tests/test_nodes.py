@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the node suggestion index."""
+
+import unittest
+
+from pathme_viewer.nodes import SuggestionIndex
+
+BEL_NODES = [
+    'p(HGNC:TP53)',
+    'g(HGNC:TP53)',
+    'r(HGNC:TP53)',
+    'p(HGNC:TP53BP1)',
+    'complex(p(HGNC:MDM2), p(HGNC:TP53))',
+    'p(HGNC:MDM2)',
+    'a(CHEBI:"ATP")',
+]
+
+
+class TestSuggestionIndex(unittest.TestCase):
+    """Tests for the n-gram suggestion index."""
+
+    def setUp(self):
+        """Build the index."""
+        self.index = SuggestionIndex(BEL_NODES)
+
+    def test_substring(self):
+        """Test that the results are the same as a case insensitive substring scan."""
+        for query in ('tp', 'Tp53', 'hgnc:', 'mdm2)', 'p(', 'a', 'ATP'):
+            expected = {
+                bel
+                for bel in BEL_NODES
+                if query.lower() in bel.lower()
+            }
+            self.assertEqual(expected, set(self.index.search(query, limit=len(BEL_NODES))), msg=query)
+
+    def test_no_match(self):
+        """Test queries without matches."""
+        self.assertEqual([], self.index.search('xyz'))
+        self.assertEqual([], self.index.search('tp53x'))
+
+    def test_ranking(self):
+        """Test that prefix matches come first, then shorter matches."""
+        self.assertEqual(
+            ['g(HGNC:TP53)', 'p(HGNC:TP53)', 'r(HGNC:TP53)', 'p(HGNC:TP53BP1)'],
+            self.index.search('tp53', limit=4),
+        )
+        self.assertEqual(['p(HGNC:MDM2)', 'p(HGNC:TP53)'], self.index.search('p(HGNC', limit=2))
+        self.assertEqual(['complex(p(HGNC:MDM2), p(HGNC:TP53))'], self.index.search('c', limit=1))
+
+    def test_limit(self):
+        """Test that the number of results is limited."""
+        self.assertEqual(2, len(self.index.search('hgnc', limit=2)))
+
+    def test_invalid_limit(self):
+        """Test that a limit that is not positive is rejected."""
+        for limit in (0, -1):
+            with self.assertRaises(ValueError, msg=limit):
+                self.index.search('tp53', limit=limit)
+
+    def test_single_character(self):
+        """Test that a single character query only scans the strings containing it."""
+        candidates = self.index._get_candidates('"')
+        self.assertEqual(['a(CHEBI:"ATP")'], [self.index.strings[i] for i in candidates])
+
+        self.assertEqual(['a(CHEBI:"ATP")'], self.index.search('"'))
+        self.assertEqual([], self.index.search('z'))
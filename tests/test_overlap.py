@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the pathway overlap matrix."""
+
+import os
+import tempfile
+import unittest
+from array import array
+from collections import namedtuple
+from itertools import combinations
+
+from pathme_viewer.overlap import INTERSECTION, OverlapMatrix, get_overlap_matrix
+
+keys = [('kegg', 'hsa00010'), ('kegg', 'hsa00020'), ('reactome', 'R-HSA-109581'), ('wikipathways', 'WP100')]
+gene_id_sets = [
+    array('I', [1, 2, 3, 4]),
+    array('I', [3, 4, 5]),
+    array('I', [10, 20]),
+    array('I', [1, 2, 3, 4, 5, 6]),
+]
+
+MockPathway = namedtuple('MockPathway', ['resource_name', 'pathway_id'])
+
+
+class MockManager(object):
+    """Manager returning the gene sets of the test pathways."""
+
+    def get_gene_id_sets(self, pathways):
+        """Return the gene set of each pathway."""
+        key_to_gene_ids = dict(zip(keys, gene_id_sets))
+
+        return {
+            pathway: key_to_gene_ids[pathway]
+            for pathway in pathways
+        }
+
+
+class TestOverlapMatrix(unittest.TestCase):
+    """Tests for the overlap matrix."""
+
+    def setUp(self):
+        """Calculate the overlaps in several chunks."""
+        self.matrix = OverlapMatrix.from_gene_id_sets(keys, gene_id_sets, chunk_size=3)
+
+    def test_intersections(self):
+        """Test that the overlaps are the intersections of the gene sets."""
+        self.assertEqual([4, 3, 2, 6], self.matrix.sizes.tolist())
+
+        for i, j in combinations(range(len(keys)), r=2):
+            expected = len(set(gene_id_sets[i]) & set(gene_id_sets[j]))
+            self.assertEqual(expected, self.matrix.intersections[i, j])
+            self.assertEqual(expected, self.matrix.intersections[j, i])
+
+    def test_rows(self):
+        """Test the ranking and filtering of the overlaps."""
+        rows = dict(self.matrix.iterate_rows())
+
+        # Pathways without common genes are not reported
+        self.assertEqual([], rows[2])
+        self.assertEqual([(3, 4, 4 / 6), (1, 2, 2 / 5)], rows[0])
+
+        rows = dict(self.matrix.iterate_rows(metric=INTERSECTION, threshold=3, top_k=1))
+        self.assertEqual([(0, 4, 4 / 6)], rows[3])
+        self.assertEqual([], rows[0][1:])
+
+        self.assertEqual([1, 2], [i for i, _ in self.matrix.iterate_rows(start=1, stop=3)])
+
+    def test_save_load(self):
+        """Test that the overlap matrix is saved and loaded from the disk."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'overlaps.npz')
+
+            self.matrix.save(path)
+            matrix = OverlapMatrix.load(path)
+
+        self.assertEqual(keys, matrix.keys)
+        self.assertEqual(list(self.matrix.iterate_rows()), list(matrix.iterate_rows()))
+
+
+class TestOverlapCache(unittest.TestCase):
+    """Tests for the disk cache of the overlap matrices."""
+
+    def test_eviction(self):
+        """Test that the least recently used matrices are removed from the cache folder."""
+        manager = MockManager()
+        selections = [
+            [MockPathway(*key) for key in keys[:stop]]
+            for stop in (2, 3, 4)
+        ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            def get_cached():
+                return sorted(os.listdir(directory))
+
+            first = get_overlap_matrix(manager, selections[0], cache_dir=directory, max_cached=2)
+            first_file, = get_cached()
+            get_overlap_matrix(manager, selections[1], cache_dir=directory, max_cached=2)
+            second_file, = set(get_cached()) - {first_file}
+
+            os.utime(os.path.join(directory, first_file), (0, 0))
+            os.utime(os.path.join(directory, second_file), (1, 1))
+
+            # Reading the first matrix from the cache makes it the most recently used one
+            self.assertEqual(first.keys, get_overlap_matrix(manager, selections[0], cache_dir=directory).keys)
+            self.assertEqual(sorted([first_file, second_file]), get_cached())
+
+            get_overlap_matrix(manager, selections[2], cache_dir=directory, max_cached=2)
+            cached = get_cached()
+
+        self.assertEqual(2, len(cached))
+        self.assertIn(first_file, cached)
+        self.assertNotIn(second_file, cached)
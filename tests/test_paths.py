@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the path queries."""
+
+import unittest
+
+import networkx as nx
+from pybel import BELGraph
+from pybel.dsl import protein
+
+from pathme_viewer.paths import MAX_PATHS, PathEnumeration, PathIndex, is_node_pair_list
+
+nodes = [protein(namespace='HGNC', name='P{}'.format(i)) for i in range(6)]
+
+
+class TestPathIndex(unittest.TestCase):
+    """Tests for the shortest paths of the path index."""
+
+    def setUp(self):
+        """Build a directed path with a shortcut, a parallel edge and an isolated node."""
+        self.graph = BELGraph(name='Test', version='1.0.0')
+
+        for u, v in zip(nodes, nodes[1:4]):
+            self.graph.add_increases(u, v, citation='1', evidence='e')
+
+        self.graph.add_decreases(nodes[0], nodes[1], citation='2', evidence='e')
+        self.graph.add_increases(nodes[1], nodes[3], citation='1', evidence='e')
+        self.graph.add_node_from_data(nodes[5])
+
+        self.index = PathIndex.from_graph(self.graph)
+
+    def get_path(self, source, target, undirected=False):
+        """Return the nodes of the shortest path between two nodes, or None if there is no path."""
+        path = self.index.shortest_path(
+            self.index.get_index(source.sha512), self.index.get_index(target.sha512), undirected=undirected,
+        )
+
+        return path if path is None else [self.index.nodes[node] for node in path]
+
+    def test_index(self):
+        """Test that the nodes are indexed by SHA-512 and parallel edges are indexed once."""
+        self.assertEqual(sorted(node.sha512 for node in self.graph), self.index.hashes)
+        self.assertEqual(4, len(self.index.successors[1]))
+        self.assertIsNone(self.index.get_index('missing'))
+
+    def test_shortest_path(self):
+        """Test the shortest paths in both directions."""
+        self.assertEqual([nodes[0], nodes[1], nodes[3]], self.get_path(nodes[0], nodes[3]))
+        self.assertEqual([nodes[2]], self.get_path(nodes[2], nodes[2]))
+        self.assertIsNone(self.get_path(nodes[3], nodes[0]))
+        self.assertIsNone(self.get_path(nodes[0], nodes[5], undirected=True))
+
+    def test_undirected(self):
+        """Test that edges are followed backwards in undirected mode without changing the graph."""
+        self.assertEqual([nodes[3], nodes[1], nodes[0]], self.get_path(nodes[3], nodes[0], undirected=True))
+        self.assertEqual([nodes[2], nodes[1], nodes[0]], self.get_path(nodes[2], nodes[0], undirected=True))
+        self.assertIsNone(self.get_path(nodes[2], nodes[0]))
+
+
+class TestPathEnumeration(unittest.TestCase):
+    """Tests for the enumeration of all simple paths."""
+
+    def setUp(self):
+        """Build a complete directed graph on the first five nodes and an edge towards the last one."""
+        self.graph = BELGraph(name='Test', version='1.0.0')
+
+        for u in nodes[:5]:
+            for v in nodes[:5]:
+                if u != v:
+                    self.graph.add_increases(u, v, citation='1', evidence='e')
+
+        self.graph.add_increases(nodes[5], nodes[4], citation='1', evidence='e')
+
+        self.index = PathIndex.from_graph(self.graph)
+        self.source, self.target = self.get_index(nodes[0]), self.get_index(nodes[4])
+
+    def get_index(self, node):
+        """Return the index of a node."""
+        return self.index.get_index(node.sha512)
+
+    def get_nodes(self, paths):
+        """Return the set of the nodes of each path."""
+        return {
+            tuple(self.index.nodes[node] for node in path)
+            for path in paths
+        }
+
+    def test_all_paths(self):
+        """Test that the same paths as networkx are found."""
+        for cutoff in (1, 2, 4):
+            enumeration = PathEnumeration(self.index, self.source, self.target, cutoff=cutoff)
+            paths = list(enumeration.iterate_paths())
+
+            expected = nx.all_simple_paths(self.graph, nodes[0], nodes[4], cutoff=cutoff)
+
+            self.assertEqual(set(map(tuple, expected)), self.get_nodes(paths))
+            self.assertFalse(enumeration.truncated)
+            self.assertIsNone(enumeration.cursor)
+
+    def test_undirected(self):
+        """Test that edges are followed backwards in undirected mode."""
+        enumeration = PathEnumeration(self.index, self.source, self.get_index(nodes[5]), undirected=True)
+        paths = list(enumeration.iterate_paths())
+
+        expected = nx.all_simple_paths(self.graph.to_undirected(), nodes[0], nodes[5])
+
+        self.assertEqual(set(map(tuple, expected)), self.get_nodes(paths))
+
+    def test_cursor(self):
+        """Test that following the cursors returns every path once."""
+        enumeration = PathEnumeration(self.index, self.source, self.target)
+        expected = list(enumeration.iterate_paths())
+
+        pages = []
+        cursor = None
+
+        while True:
+            enumeration = PathEnumeration(self.index, self.source, self.target)
+            page = list(enumeration.iterate_paths(max_paths=4, cursor=cursor))
+            pages.append(page)
+
+            if not enumeration.truncated:
+                break
+
+            self.assertEqual(MAX_PATHS, enumeration.reason)
+            cursor = enumeration.cursor
+
+        # 16 paths in pages of 4 without an empty last page
+        self.assertEqual(16, len(expected))
+        self.assertEqual([4, 4, 4, 4], [len(page) for page in pages])
+        self.assertEqual(expected, [path for page in pages for path in page])
+
+    def test_invalid_cursor(self):
+        """Test that cursors not matching the graph are rejected."""
+        enumeration = PathEnumeration(self.index, self.source, self.target)
+
+        for cursor in ('a', '-1', '9', '0.1', '1.1.1.1.1.1'):
+            with self.assertRaises(ValueError):
+                list(enumeration.iterate_paths(cursor=cursor))
+
+
+class TestNodePairs(unittest.TestCase):
+    """Tests for the validation of the body of the batch path queries."""
+
+    def test_valid(self):
+        """Test lists of pairs of node identifiers."""
+        self.assertTrue(is_node_pair_list([]))
+        self.assertTrue(is_node_pair_list([['a', 'b'], ['b', 'c']]))
+
+    def test_malformed(self):
+        """Test that malformed bodies and pairs are rejected."""
+        for pairs in (None, {'a': 'b'}, ['a', 'b'], [['a']], [['a', 'b', 'c']], [[['a'], 'b']], [['a', 1]]):
+            self.assertFalse(is_node_pair_list(pairs), msg=pairs)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the pathway blob formats."""
+
+import unittest
+
+from pybel import BELGraph, to_bytes
+from pybel.dsl import protein
+
+from pathme_viewer.storage import (
+    RAW, ZLIB, ZSTD, decode_graph, decompress_blob, encode_graph, get_blob_formats, measure_blob_formats,
+)
+
+
+class TestStorage(unittest.TestCase):
+    """Tests for the blob codecs."""
+
+    def setUp(self):
+        """Build a small BEL graph."""
+        self.graph = BELGraph(name='Glycolysis', version='1.0.0')
+        self.graph.add_increases(protein('HGNC', 'A'), protein('HGNC', 'B'), citation='1', evidence='e')
+
+    def test_round_trip(self):
+        """Test that graphs are decoded as they were encoded with every format."""
+        for blob_format in get_blob_formats():
+            blob = encode_graph(self.graph, blob_format=blob_format)
+            graph = decode_graph(blob, blob_format)
+
+            self.assertEqual(self.graph.name, graph.name, msg=blob_format)
+            self.assertEqual(set(self.graph.edges()), set(graph.edges()), msg=blob_format)
+
+    def test_raw(self):
+        """Test that blobs without format are read as raw pickles."""
+        data = to_bytes(self.graph)
+
+        self.assertEqual(data, encode_graph(self.graph, blob_format=RAW))
+        self.assertEqual(data, decompress_blob(data, None))
+
+    def test_unknown_format(self):
+        """Test that unknown formats are rejected."""
+        with self.assertRaises(ValueError):
+            encode_graph(self.graph, blob_format='gzip2')
+
+    def test_measure(self):
+        """Test that each format is measured once."""
+        rows = measure_blob_formats([to_bytes(self.graph)], blob_formats=[RAW, ZLIB])
+
+        self.assertEqual([RAW, ZLIB], [row['format'] for row in rows])
+        self.assertEqual(1.0, rows[0]['ratio'])
+
+    @unittest.skipIf(ZSTD not in get_blob_formats(), 'zstandard is not installed')
+    def test_measure_zstd_levels(self):
+        """Test that each level of zstd is measured separately."""
+        rows = measure_blob_formats([to_bytes(self.graph)], blob_formats=[ZSTD], zstd_levels=[1, 9])
+
+        self.assertEqual(['zstd-1', 'zstd-9'], [row['format'] for row in rows])